@@ -8,6 +8,10 @@ Modules:
 - drive_manager
     - drive_manager.py
         - DriveManager: A class responsible for managing USB drives.
+            - Attributes:
+                - drive_list (list[str]): The USB drives found by the last refresh.
+                - selected_drive (str | None): The drive the keys are read from and saved to.
+                - key_cache (KeyFileCache): The key files read ahead of time from drives with keys.
             - Methods:
                 - __init__(): Initializes the DriveManager instance.
                 - refresh() -> list[str]: Refreshes and returns a list of USB drives.
@@ -15,13 +19,24 @@ Modules:
                 - read_files(path: str) -> list[str]: Reads and returns a list of filenames from the specified disk path.
                 - save_to_drive(data: bytes, destination_name: str) -> bool: Saves binary data to a file on the selected drive.
 
+    - key_cache.py
+        - DriveKeys: The key material read from a drive (drive, identity, encrypted_key, public_key).
+        - KeyFileCache: Reads the encrypted private key and the public key of drives on a background thread, parsing the public key there too, and serves them until the device or modification time of a key file changes.
+            - Methods:
+                - __init__(max_entries=KEY_CACHE_SIZE): Initializes an empty cache.
+                - prefetch(drives): Starts reading the key files of drives in the background, and forgets other drives.
+                - load(drive) -> DriveKeys: Returns the key files of a drive, read ahead of time if they have not changed since.
+                - close(): Stops the background thread.
+
 - gui
     - drive_selection.py
         - DriveSelectionWidget: A widget for selecting a drive from a list of connected drives.
+            - Signals:
+                - drives_refreshed (list): Emitted with the connected drives every time the list is refreshed.
             - Methods:
                 - __init__(mode=DriveSelectorMode.STANDARD): Initializes the DriveSelectionWidget.
                 - init_ui(): Initializes the user interface.
-                - refresh_drives(): Refreshes the list of connected drives.
+                - refresh_drives(): Refreshes the list of connected drives, prefetching the key files of drives with keys.
                 - get_connected_drives(): Retrieves the list of connected drives based on the mode.
                 - select_drive(): Selects the currently highlighted drive in the list.
 
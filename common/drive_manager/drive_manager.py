@@ -3,6 +3,8 @@ from pathlib import Path
 
 import psutil
 
+from common.drive_manager.key_cache import KeyFileCache
+
 logger = logging.getLogger("global_logger")
 
 class DriveManager:
@@ -10,6 +12,11 @@ class DriveManager:
     DriveManager is a class responsible for managing USB drives. It provides functionalities to list available drives,
     detect drives with specific key files, read files from a drive, and save data to a selected drive.
 
+    Attributes:
+        drive_list (list[str]): The USB drives found by the last refresh.
+        selected_drive (str | None): The drive the keys are read from and saved to.
+        key_cache (KeyFileCache): The key files read ahead of time from drives with keys.
+
     Methods:
         __init__():
         refresh() -> list[str]:
@@ -29,6 +36,7 @@ class DriveManager:
         logger.info("Drive manager's instance created")
         self.drive_list = []
         self.selected_drive = None
+        self.key_cache = KeyFileCache()
 
     def refresh(self) -> list[str]:
         """
@@ -0,0 +1,164 @@
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from Crypto.PublicKey import RSA
+
+logger = logging.getLogger("global_logger")
+
+PRIVATE_KEY_FILE = "private_key.enc"
+PUBLIC_KEY_FILE = "public_key.key"
+KEY_CACHE_SIZE = 4
+
+class DriveKeys(NamedTuple):
+    """
+    DriveKeys is the key material read from a drive, as it was when the files were read.
+
+    Attributes:
+        drive (str): The drive the files were read from.
+        identity (tuple): The device and modification time of both key files, which key the cache.
+        encrypted_key (bytes): The content of the encrypted private key file.
+        public_key (RSA.RsaKey | None): The parsed public key, or None if the drive holds no valid one.
+
+    """
+
+    drive: str
+    identity: tuple
+    encrypted_key: bytes
+    public_key: RSA.RsaKey | None
+
+class KeyFileCache:
+    """
+    KeyFileCache reads the key files of drives ahead of time, so signing does not wait for the drive.
+
+    `prefetch` reads the encrypted private key and the public key of drives on a background thread, and
+    parses the public key there too. `load` then only checks the modification times of the files and
+    returns what was read, leaving just the decryption of the private key to be done once the PIN is
+    known. An entry is used only while both files keep the device and modification time they had when
+    they were read; otherwise the files are read again. Entries of drives no longer prefetched are
+    dropped, so the cache holds the key material of connected drives only.
+
+    Methods:
+        __init__(max_entries: int = KEY_CACHE_SIZE):
+        prefetch(drives: Iterable[str]):
+            Starts reading the key files of drives in the background, and forgets other drives.
+        load(drive: str) -> DriveKeys:
+            Returns the key files of a drive, read ahead of time if they have not changed since.
+        close():
+            Stops the background thread.
+
+    """
+
+    def __init__(self, max_entries: int = KEY_CACHE_SIZE):
+        """
+        Initializes an empty cache. The background thread is started on the first prefetch.
+
+        Args:
+            max_entries (int, optional): The number of drives whose key files are kept. Defaults to KEY_CACHE_SIZE.
+
+        """
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._executor = None
+
+    def prefetch(self, drives: Iterable[str]):
+        """
+        Starts reading the key files of drives in the background, and forgets the key files of other drives.
+
+        Drives whose files are already cached or being read are skipped, so this can be called on every
+        refresh of the drive list.
+
+        Args:
+            drives (Iterable[str]): The connected drives holding keys.
+
+        """
+        drives = list(drives)
+        with self._lock:
+            for drive in [drive for drive in self._entries if drive not in drives]:
+                logger.info("Forgetting prefetched key files of %s", drive)
+                del self._entries[drive]
+            missing = [drive for drive in drives if drive not in self._entries and drive not in self._pending]
+            if not missing:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="key-prefetch")
+            self._pending.update(missing)
+        for drive in missing:
+            self._executor.submit(self._prefetch_drive, drive)
+
+    def load(self, drive: str) -> DriveKeys:
+        """
+        Args:
+            drive (str): The drive holding the key files.
+
+        Returns:
+            DriveKeys: The key files of the drive, from the cache if neither changed since they were read.
+
+        Raises:
+            FileNotFoundError: If the drive holds no encrypted private key.
+            OSError: If the key files cannot be read.
+
+        """
+        identity = _key_files_identity(drive)
+        with self._lock:
+            keys = self._entries.get(drive)
+        if keys is not None and keys.identity == identity:
+            logger.info("Using prefetched key files of %s", drive)
+            return keys
+        return self._read(drive)
+
+    def close(self):
+        """
+        Stops the background thread, after the read in progress.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    def _prefetch_drive(self, drive: str):
+        try:
+            self._read(drive)
+            logger.info("Prefetched key files of %s", drive)
+        except OSError as e:
+            logger.warning("Could not prefetch key files of %s: %s", drive, e)
+        finally:
+            with self._lock:
+                self._pending.discard(drive)
+
+    def _read(self, drive: str) -> DriveKeys:
+        # The identity is taken before reading, so files changed meanwhile are read again on the next load.
+        identity = _key_files_identity(drive)
+        encrypted_key = (Path(drive) / PRIVATE_KEY_FILE).read_bytes()
+        keys = DriveKeys(drive, identity, encrypted_key, _read_public_key(drive))
+        with self._lock:
+            self._entries[drive] = keys
+            self._entries.move_to_end(drive)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return keys
+
+def _key_files_identity(drive: str) -> tuple:
+    identity = []
+    for name in (PRIVATE_KEY_FILE, PUBLIC_KEY_FILE):
+        try:
+            stat = (Path(drive) / name).stat()
+            identity.append((stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            identity.append(None)
+    return tuple(identity)
+
+def _read_public_key(drive: str) -> RSA.RsaKey | None:
+    try:
+        return RSA.import_key((Path(drive) / PUBLIC_KEY_FILE).read_bytes())
+    except FileNotFoundError:
+        return None
+    except (ValueError, IndexError, TypeError):
+        logger.warning("Invalid public key file on %s", drive)
+        return None
@@ -7,10 +7,12 @@ Modules:
 
 - drive_selection.py
     - DriveSelectionWidget: A widget for selecting a drive from a list of connected drives.
+        - Signals:
+            - drives_refreshed (list): Emitted with the connected drives every time the list is refreshed.
         - Methods:
             - __init__(mode=DriveSelectorMode.STANDARD): Initializes the DriveSelectionWidget.
             - init_ui(): Initializes the user interface.
-            - refresh_drives(): Refreshes the list of connected drives.
+            - refresh_drives(): Refreshes the list of connected drives, prefetching the key files of drives with keys.
             - get_connected_drives(): Retrieves the list of connected drives based on the mode.
             - select_drive(): Selects the currently highlighted drive in the list.
 
@@ -3,7 +3,7 @@ import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtWidgets import QHBoxLayout, QLabel, QListWidget, QPushButton, QVBoxLayout, QWidget
 
 from common.drive_manager.drive_manager import DriveManager
@@ -18,6 +18,9 @@ class DriveSelectionWidget(QWidget):
     """
         DriveSelectionWidget is a QWidget that allows users to select a drive from a list of connected drives.
 
+    Signals:
+        drives_refreshed (list): Emitted with the connected drives every time the list is refreshed.
+
     Attributes:
         mode (DriveSelectorMode): Mode of the drive selector, either 'STANDARD' or 'WITH_KEYS'.
         drive_manager (DriveManager): Manages the drives.
@@ -36,6 +39,8 @@ class DriveSelectionWidget(QWidget):
 
     """
 
+    drives_refreshed = pyqtSignal(list)
+
     def __init__(self, mode=DriveSelectorMode.STANDARD):
         """
         DriveSelectionWidget constructor.
@@ -107,7 +112,9 @@ class DriveSelectionWidget(QWidget):
         3. Removes any drives from the drive list that are no longer connected.
         4. If there is only one drive in the list and no drive is currently selected,
            it selects the first drive and marks it as selected.
-        5. Logs the refresh action.
+        5. In `DriveSelectorMode.WITH_KEYS` mode, starts reading the key files of the drives in the background,
+           so signing does not wait for the drive.
+        6. Emits the connected drives with the drives_refreshed signal.
 
         Returns:
             None
@@ -130,6 +137,10 @@ class DriveSelectionWidget(QWidget):
             self.select_drive()
             self.is_drive_selected = True
 
+        if self.mode == DriveSelectorMode.WITH_KEYS:
+            self.drive_manager.key_cache.prefetch(connected_drives)
+        self.drives_refreshed.emit(connected_drives)
+
     def get_connected_drives(self):
         """
         Retrieves a list of connected drives based on the current mode.
@@ -20,17 +20,18 @@ def compress_old_log(log_file):
         log_file.unlink()
 
 
-def initialize(log_file):
-    """Initializes the new global logger instance"""
+def initialize(log_file, *, console=True):
+    """Initializes the new global logger instance, also logging to stdout unless console is False"""
     compress_old_log(log_file)
 
+    handlers = [logging.FileHandler(log_file, encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s - [%(levelname)s] - %(module)-20s - %(funcName)-40s: %(message)s",
-        handlers=[
-            logging.FileHandler(log_file, encoding="utf-8"),
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=handlers
     )
 
 
@@ -15,11 +15,12 @@ Modules:
                 - start_verifying_file(pub_key_path, pdf_path): Starts the process of verifying a PDF file, showing a progress dialog and running the verification in a separate thread.
                 - update_progress(message, value): Updates the progress dialog with the current progress message and value.
                 - handle_status(status_code, message): Handles the status updates from the signing or verifying process, showing appropriate messages to the user.
-                - verify_sign(): Initiates the process of verifying a PDF file by selecting the PDF and public key files and starting the verification.
-                - sign_pdf(): Initiates the process of signing a PDF file by opening a PIN dialog, selecting the PDF file, and starting the signing.
+                - verify_sign(): Initiates the process of verifying a PDF file by selecting the PDF and public key files, or using the keyring named in SIGNING_KEYRING, and starting the verification.
+                - sign_pdf(): Initiates the process of signing a PDF file by opening a PIN dialog, unless the key session holds the key of the selected drive, selecting the PDF file, and starting the signing.
                 - select_pdf_file(): Opens a file dialog to select a PDF file for signing or verifying.
                 - select_pub_key_file(): Opens a file dialog to select a public key file for verifying a PDF.
                 - close_application(): Closes the application and logs the closure.
+                - closeEvent(event): Drops the key kept unlocked by the key session, if any, when the window closes.
 
     - sign_thread.py
         - SignThread: A QThread subclass to handle the process of signing a PDF file in a separate thread.
@@ -27,11 +28,12 @@ Modules:
                 - progress_update (str, int): Emitted to update the progress of the signing process.
                 - status (SignState, str): Emitted to update the status of the signing process.
             - Attributes:
-                - pin (str): The PIN code used for RSA key decryption.
+                - pin (str | None): The PIN code used for RSA key decryption, or None if the key session holds the key.
                 - drive_manager (DriveManager): The drive manager instance to manage the drive operations.
                 - pdf_path (str): The file path of the PDF to be signed.
+                - key_session (KeySession | None): The session keeping the key unlocked between signatures, if enabled.
             - Methods:
-                - __init__(pin, drive_manager, pdf_path): Initializes the SignThread class with the provided PIN, drive manager, and PDF path.
+                - __init__(pin, drive_manager, pdf_path, key_session=None): Initializes the SignThread class with the provided PIN, drive manager, PDF path and key session.
                 - run(): Executes the signing process, emitting progress updates and status changes.
 
     - verify_thread.py
@@ -40,7 +42,7 @@ Modules:
                 - progress_update (str, int): Emitted to update the progress of the verification process.
                 - status (VerifyState, str): Emitted to update the status of the verification process.
             - Attributes:
-                - pub_key_path (str): The file path to the public key used for verification.
+                - pub_key_path (str): The file path to the public key used for verification, or a keyring directory.
                 - pdf_path (str): The file path to the PDF file to be verified.
             - Methods:
                 - __init__(pub_key_path, pdf_path): Initializes the VerifyThread instance with the provided public key path and PDF path.
@@ -56,24 +58,263 @@ Modules:
                 - FINISHED (int): Indicates that the verification process has finished successfully.
                 - ERRORED (int): Indicates that an error occurred during the verification process.
 
+- main.py
+    - Starts the GUI, or the command line interface when arguments are given.
+
+- cli.py
+    - run(argv) -> int: Runs the command line interface of the main application and returns its exit status.
+    - build_parser() -> argparse.ArgumentParser: Returns the parser of the command line, with one subcommand per operation.
+        - sign-batch PATH... [--drive DRIVE] [--output-dir DIR] [--workers N] [--merkle | --manifest] [--batch-size N]: Decrypts the private key once and signs many PDF files in parallel, printing one line per file. With --merkle, each batch of files costs a single RSA operation.
+        - verify-batch PATH... --key KEY... | --keyring DIR [--format jsonl|csv] [--report FILE] [--workers N] [--cache FILE]: Verifies many PDF files in parallel and streams a report with one row per file. With --cache, files unchanged since an earlier run are not read again.
+        - watch DIR... --output-dir DIR --failed-dir DIR [--drive DRIVE] [--workers N] [--settle SECONDS]: Decrypts the private key once and signs every PDF file dropped into the spool directories until interrupted.
+        - agent [--drive DRIVE] [--socket PATH] [--idle-timeout SECONDS] [--max-requests N]: Decrypts the private key once and serves signature requests on a Unix socket, printing the SIGNING_AGENT_SOCK line to export.
+        - prepare PDF --key KEY [--output FILE] [--context FILE] [--manifest]: Prepares a copy of a PDF file (PDF.prepared.pdf by default, or PDF itself in place) for signing elsewhere, writes its signing context and prints the hex digest to sign.
+        - sign-digest DIGEST [--drive DRIVE]: Signs a hex digest with the key agent or the key on a drive and prints the hex signature.
+        - finalize CONTEXT SIGNATURE: Stores a hex signature in the prepared PDF file named by a signing context.
+        - abort CONTEXT: Removes the prepared copy, or truncates a PDF file prepared in place back to its original size, and deletes the signing context.
+        - sign-stream [--drive DRIVE] [--name NAME]: Signs a PDF read from standard input and writes the signed PDF to standard output.
+        - verify-stream --key KEY... | --keyring DIR [--format jsonl|csv] [--name NAME]: Verifies a PDF read from standard input and writes one report row.
+        - serve [--drive DRIVE] [--host HOST] [--port PORT] [--key KEY... | --keyring DIR] [--workers N] [--max-upload BYTES]: Decrypts the private key once and serves the HTTP signing and verification endpoints until interrupted. Requests must carry the bearer token in SIGNING_SERVICE_TOKEN when it is set, which it must be to listen on an address other than loopback.
+    - unlock_private_key(drive) -> RSA.RsaKey | AgentKey: Returns the key held by the key agent named in SIGNING_AGENT_SOCK, or asks for the PIN and decrypts the private key stored on a drive.
+    - load_public_keys(key_paths, keyring, required=True) -> list[RSA.RsaKey] | Keyring: Reads the public key files, or opens the keyring given or named in SIGNING_KEYRING.
+    - select_key_drive(drive) -> DriveManager: Returns a drive manager with the given drive, or the first drive with keys, selected.
+
 - utils
+    - async_utils.py
+        - ProgressEvent: One progress update of an operation (message, value).
+        - AsyncOperation: A blocking operation running on a thread executor, awaitable for its result and asynchronously iterable for its progress events.
+            - Methods:
+                - __init__(function, *args, executor=None, **kwargs): Starts the operation from a running event loop.
+                - emit(message, value): Reports a progress update from any thread.
+                - done() -> bool: Returns whether the operation has finished.
+        - set_default_executor(executor): Sets the executor used by operations started without one.
+        - sign_pdf_async(pdf_path, rsa_key, output_path=None, chunk_size=None, executor=None) -> AsyncOperation: Signs a PDF file without blocking the event loop.
+        - sign_bytes_async(pdf_data, rsa_key, chunk_size=None, executor=None) -> AsyncOperation: Signs in-memory PDF content without blocking the event loop.
+        - verify_pdf_async(pdf_path, public_key, executor=None) -> AsyncOperation: Verifies a PDF file without blocking the event loop.
+        - verify_bytes_async(pdf_data, public_key, executor=None) -> AsyncOperation: Verifies in-memory PDF content without blocking the event loop.
+        - decrypt_rsa_key_async(pin, drive_manager, executor=None) -> AsyncOperation: Decrypts the private key without blocking the event loop.
+
+    - batch_utils.py
+        - BatchResult: The outcome of one file of a batch operation (path, ok, elapsed_ms, error).
+        - PdfInput: A PDF file found by `expand_pdf_inputs` (path, name), where name is its path relative to the directory or fixed part of the glob pattern it was found under.
+        - expand_pdf_paths(patterns) -> Iterator[str]: Expands paths, directories and glob patterns into the paths of PDF files.
+        - expand_pdf_inputs(patterns) -> Iterator[PdfInput]: Expands paths, directories and glob patterns into PDF files with their relative names, kept under the output directory of a batch.
+        - sign_batch(pdf_paths, rsa_key, output_dir=None, workers=None, chunk_size=None) -> Iterator[BatchResult]: Signs many PDF files in parallel with a pool of worker processes that receive the key once, yielding results as files complete. Files are written under their relative name in output_dir, and a file whose output path another file of the batch already took fails unsigned.
+        - sign_merkle_batch(pdf_paths, rsa_key, output_dir=None, workers=None, batch_size=MERKLE_BATCH_SIZE) -> Iterator[BatchResult]: Signs many PDF files in parallel with one RSA operation per batch, over the root of a Merkle tree of their digests.
+        - VerifyReport: One row of a batch verification report (path, status, signers, elapsed_ms, bytes_hashed, error).
+        - verify_batch(pdf_paths, public_keys, workers=None, cache_path=None) -> Iterator[VerifyReport]: Verifies many PDF files in parallel with a pool of worker processes that parse the public keys once, optionally sharing a verification cache.
+        - write_report(reports, stream, report_format="jsonl") -> Counter: Writes report rows as JSON lines or CSV as they come and returns the number of files by status.
+        - run_bounded(executor, jobs, max_pending) -> Iterator: Runs jobs on an executor with at most a fixed number of them submitted at a time.
+        - create_worker_pool(workers, rsa_key=None, public_keys=(), cache_path=None) -> ProcessPoolExecutor: Starts a pool of worker processes that import the signing key and the public keys, or open the keyring, and open the verification cache, once.
+        - sign_in_worker(pdf_path, output_path=None, chunk_size=None) -> BatchResult: Signs one PDF file with the key of the worker process.
+        - verify_in_worker(pdf_path) -> VerifyReport: Verifies one PDF file with the public keys of the worker process.
+        - report_results(pdf_path, results, elapsed_ms) -> VerifyReport: Returns the report row of a verified PDF file.
+
+    - http_service.py
+        - ServiceMetrics: Counts the requests of a signing server and tracks the jobs it has admitted.
+            - Methods:
+                - admit() -> bool: Takes a job slot if one is free, or counts a rejection.
+                - release(): Frees a job slot.
+                - record(endpoint, status, elapsed, received=0): Counts a finished request.
+                - snapshot() -> dict: Returns the current values as a dictionary.
+                - render() -> str: Returns the current values in the Prometheus text format.
+        - SigningServer: A threading HTTP server that streams uploads to temporary files and signs or verifies them on a pool of worker processes started with it, answering 429 with queue-depth headers when all job slots are in use. With a token, every endpoint but /health requires it as a bearer token; without one, only loopback addresses are accepted.
+            - Endpoints: POST /sign[?manifest=1], POST /verify, GET /health, GET /metrics.
+            - Methods:
+                - __init__(address, rsa_key, public_keys=(), workers=None, max_upload=MAX_UPLOAD_SIZE, spool_dir=None, token=None): Starts the worker processes and binds the server socket, refusing addresses other than loopback without a token.
+                - run_job(function, *args): Runs a job on the worker pool and waits for its result.
+                - server_close(): Closes the socket and stops the worker processes.
+        - ServiceRequestHandler: Serves the endpoints of a SigningServer, one connection per thread.
+
+    - key_agent.py
+        - default_socket_path() -> str: Returns the agent socket path from SIGNING_AGENT_SOCK, or a per-user path in the runtime directory.
+        - KeyAgent: Holds an unlocked private key and signs SHA-256 digests for local processes over a Unix domain socket, with pipelined requests, a per-connection request limit and an idle lock.
+            - Methods:
+                - __init__(socket_path, rsa_key, drive_manager=None, idle_timeout=IDLE_TIMEOUT, max_requests=MAX_REQUESTS_PER_CONNECTION): Initializes the agent.
+                - run(): Serves requests until `stop` is called, then removes the socket.
+                - lock(): Drops the private key.
+                - locked() -> bool: Returns whether the private key has been dropped.
+                - stop(): Asks `run` to return. Safe to call from any thread or signal handler.
+        - AgentKey: A private key held by a KeyAgent, usable wherever the signing functions take an RSA key, including worker processes.
+            - Methods:
+                - public_key() -> RSA.RsaKey: Returns the public key of the agent, fetched once.
+                - size_in_bytes() -> int: Returns the size of the key modulus, in bytes.
+                - sign_digest(digest) -> bytes: Returns the PKCS#1 v1.5 signature of a SHA-256 digest.
+                - sign_digests(digests) -> list[bytes]: Signs many digests, pipelining the requests.
+                - lock(): Asks the agent to drop the private key.
+                - unlock(pin): Asks the agent to decrypt the private key from its drive again.
+                - close(): Closes the connection.
+        - encode_frame(message_type, payload) -> bytes: Returns a key agent message, framed with its length.
+
+    - remote_signing.py
+        - SigningContext: The opaque state `finalize_pdf` needs to store a signature in a prepared PDF file (path, identity, contents_offset, contents_size, signed_attributes, public_key, unsigned_attributes, original_size).
+            - Methods:
+                - encode() -> bytes: Serializes the context as JSON.
+                - decode(data) -> SigningContext: Reads a context serialized by `encode`.
+        - prepare_pdf(pdf_path, public_key, output_path=None, chunk_size=None) -> tuple[bytes, SigningContext]: Writes the signature section with an empty placeholder, to a copy next to the input unless output_path is the input itself, and returns the 32-byte digest to sign with `sign_digest`, without the private key.
+        - finalize_pdf(context, signature): Checks a signature made elsewhere against the public key and writes it over the placeholder with a single positioned write.
+        - abort_pdf(context): Undoes `prepare_pdf` by removing the prepared copy, or truncating a file prepared in place back to its original size.
+
+    - stream_utils.py
+        - sign_stream(source, output, rsa_key, name="<stdin>"): Copies PDF content from a binary stream to another while hashing it, then writes the signature section, keeping only the head, the tail and the signature sections of the content in memory.
+        - verify_stream(source, public_key, name="<stdin>") -> list[SignatureResult]: Verifies all digital signatures of PDF content read from a binary stream in a single forward pass, following the hash chain of the signatures as their byte ranges stream by.
+
+    - key_session.py
+        - KeySession: Keeps the private key unlocked between GUI signatures, bound to the identity of its drive, and drops it when the drive is removed, after an idle timeout or a number of signatures, overwriting its private components.
+            - Attributes:
+                - idle_timeout (float): The seconds without signatures after which the key is dropped.
+                - max_uses (int): The number of signatures after which the key is dropped.
+            - Methods:
+                - __init__(idle_timeout, max_uses=SESSION_MAX_USES): Initializes an empty session.
+                - signing_key(drive, unlock) -> ContextManager[RSA.RsaKey]: Lends the key of a drive for one signature, unlocking it first if the session holds none.
+                - holds_key(drive) -> bool: Returns whether the next signature with the key of the drive needs no PIN.
+                - retain_drives(drives): Drops the key if its drive is no longer connected or it has been idle for too long.
+                - clear(): Drops the key.
+        - session_from_environment() -> KeySession | None: Returns a key session configured by SIGNING_SESSION_IDLE and SIGNING_SESSION_MAX_USES, or None if disabled.
+
+    - keyring.py
+        - Keyring: A read-only mapping from key identifier to the public keys in a directory, with a persistent index of the key identifier, size and modification time of every key file, and an LRU of parsed keys.
+            - Attributes:
+                - directory (str): The directory holding the key files.
+            - Methods:
+                - __init__(directory, cache_size=KEYRING_CACHE_SIZE): Opens a keyring and brings its index up to date.
+                - refresh(): Indexes the key files added or changed since the index was written, and forgets removed ones.
+                - path_of(identifier) -> str: Returns the path to the file holding a key.
+        - index_public_keys(public_key) -> Mapping[bytes, RSA.RsaKey]: Returns a key, a list of keys or a keyring as a mapping by key identifier.
+        - open_keyring(directory) -> Keyring: Returns the keyring of a directory, shared by the whole process.
+
+    - verify_cache.py
+        - VerificationCache: Remembers the verdicts of `verify_pdf` in an SQLite database in write-ahead logging mode, shared by processes, keyed by file identity, public key fingerprint and last signature digest, with least-recently-used eviction.
+            - Attributes:
+                - path (str): The path to the database file.
+                - hits (int), misses (int): The number of verdicts returned from the cache and of files verified.
+                - bytes_hashed (int): The number of bytes hashed to verify files.
+            - Methods:
+                - __init__(path, max_entries=CACHE_MAX_ENTRIES): Opens the database, creating it if needed.
+                - verify(pdf_path, public_key, progress_signal=None) -> list[SignatureResult]: Returns the cached verdict of a PDF file, or verifies it and caches the verdict.
+                - lookup(pdf_path, public_keys) -> list[SignatureResult] | None: Returns the cached verdict of a PDF file after reading only its trailer, if the file has not changed.
+                - store(pdf_path, public_keys, results, identity): Caches the verdict of a PDF file, unless it changed while it was verified.
+                - close(): Closes the database.
+        - keys_fingerprint(public_keys) -> bytes: Returns the SHA-256 hash of the sorted key identifiers of the accepted signers.
+
+    - watch_utils.py
+        - Inotify: A minimal wrapper of the Linux inotify API, reached through the C library.
+            - Methods:
+                - add_watch(path, mask) -> int: Starts watching a directory for the given events.
+                - read_events() -> list[tuple[int, int, str]]: Reads the pending events as (watch descriptor, mask, name) tuples.
+                - fileno() -> int: Returns the file descriptor to wait on.
+                - close(): Closes the inotify instance.
+        - SpoolWatcher: Signs every PDF file dropped into spool directories once it has settled, moving files that cannot be signed to a failure directory.
+            - Methods:
+                - __init__(directories, rsa_key, output_dir, failed_dir, workers=None, settle_time=SETTLE_TIME, on_result=None): Initializes the watcher.
+                - run(): Watches the directories and signs new files until `stop` is called.
+                - stop(): Asks `run` to return once the files in flight are done. Safe to call from any thread or signal handler.
+                - close(): Releases the wake-up pipe. Also called on leaving a `with` block.
+
     - pdf_utils.py
-        - sign_pdf(pdf_path, rsa_key, progress_signal=None): Signs a PDF file using the provided RSA key.
+        - sign_pdf(pdf_path, rsa_key, progress_signal=None, output_path=None, chunk_size=None): Signs a PDF file using the provided RSA key, adding a revision after any earlier signatures.
             - Args:
                 - pdf_path (str): The path to the PDF file to be signed.
                 - rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
                 - progress_signal (optional): A signal to report progress, if applicable.
+                - output_path (str, optional): The path the signed PDF is written to, leaving the input untouched. Defaults to signing in place.
+                - chunk_size (int, optional): Signs a manifest of the digests of chunks of this size, hashed by several threads. Defaults to None.
             - Raises:
                 - Exception: If an error occurs during the signing process.
-        - verify_pdf(pdf_path, public_key, progress_signal=None) -> bool: Verifies the digital signature of a PDF file.
+        - verify_pdf(pdf_path, public_key, progress_signal=None) -> list[SignatureResult]: Verifies all digital signatures of a PDF file in a single pass.
             - Args:
                 - pdf_path (str): The file path to the PDF document to be verified.
-                - public_key (RSA.RsaKey): The public RSA key used to verify the signature.
+                - public_key (RSA.RsaKey | Iterable[RSA.RsaKey]): The public RSA key, or the keys of all signers, used to verify the signatures.
                 - progress_signal (optional): A signal to report progress, if applicable.
             - Returns:
-                - bool: True if the PDF signature is valid, False otherwise.
+                - list[SignatureResult]: The result of every signature, in signing order.
             - Raises:
                 - Exception: If an error occurs during the verification process.
+        - sign_bytes(pdf_data, rsa_key, output=None, progress_signal=None, chunk_size=None) -> bytes | None: Signs in-memory PDF content without touching the filesystem.
+            - Args:
+                - pdf_data (bytes | bytearray | memoryview | BinaryIO): The PDF content to be signed.
+                - rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
+                - output (BinaryIO, optional): A binary stream the signed PDF is written to.
+                - progress_signal (optional): A signal to report progress, if applicable.
+            - Returns:
+                - bytes | None: The signed PDF content, or None if it was written to `output`.
+        - verify_bytes(pdf_data, public_key, progress_signal=None) -> list[SignatureResult]: Verifies all digital signatures of in-memory PDF content.
+            - Args:
+                - pdf_data (bytes | bytearray | memoryview | BinaryIO): The signed PDF content.
+                - public_key (RSA.RsaKey | Iterable[RSA.RsaKey]): The public RSA key, or the keys of all signers, used to verify the signatures.
+                - progress_signal (optional): A signal to report progress, if applicable.
+            - Returns:
+                - list[SignatureResult]: The result of every signature, in signing order.
+        - prepare_document(document, signature_size, progress_signal=None, chunk_size=None) -> tuple: Builds the signature section with an empty placeholder and hashes what it will cover.
+        - SignatureResult: The verification result of one signature (index, byte_range, intact, public_key, error, key_id, changed_ranges, valid).
+        - get_signed_ranges(byte_range) -> list[tuple[int, int]]: Returns the (offset, length) ranges of the file covered by a signature byte range.
+        - read_signature_info(pdf_path) -> list[PdfDictionary]: Reads the signature dictionaries of a PDF file from its last trailer only, for screening many files.
+            - Args:
+                - pdf_path (str): The path to the PDF file.
+            - Returns:
+                - list[PdfDictionary]: The signature dictionaries in signing order, empty if the PDF file is not signed.
+            - Raises:
+                - FileNotFoundError: If the PDF file does not exist.
+                - ValueError: If the trailer of the PDF file is malformed.
+
+    - manifest.py
+        - Manifest: The digests of fixed-size chunks of the bytes covered by a signature (chunk_size, digests).
+        - hash_chunks(document, byte_ranges, chunk_size, appended_parts=(), threads=HASH_THREADS) -> list[bytes]: Hashes the signed parts of a PDF file as chunks, several chunks at a time.
+        - manifest_hash(previous_digest, manifest) -> SHA256Hash: Returns the hash a signature with a manifest signs.
+        - manifest_size(document_size, chunk_size) -> int: Returns the maximum size of the manifest attribute for a document.
+        - encode_manifest(manifest) -> bytes / get_manifest(signed_data) -> Manifest | None: Stores and reads the manifest of a signature.
+        - locate_changes(byte_ranges, manifest, digests) -> list[tuple[int, int]]: Finds the parts of a file whose chunks do not match a manifest.
+
+    - merkle.py
+        - MerkleProof: The inclusion proof of one document digest in a signed Merkle tree (digest, index, count, path).
+        - merkle_tree(digests) -> tuple[bytes, list[MerkleProof]]: Builds a Merkle tree over document digests and returns its root and the proof of every document.
+        - merkle_root(proof) -> bytes: Returns the root of the Merkle tree that a proof leads to.
+        - proof_size(count) -> int: Returns the maximum size of the proof attribute for a batch of documents.
+        - encode_proof(proof) -> bytes / decode_proof(encoded) -> MerkleProof: Converts a proof to and from its DER encoding.
+        - get_proof(signed_data) -> MerkleProof | None: Returns the Merkle proof of a batch signature, if any.
+        - document_digest(signed_data) -> bytes: Returns the digest of the signed document, which the next signature continues from.
+        - digest_matches(signed_data, digest) -> bool: Checks that a signature covers a document digest, directly or through its Merkle proof.
+        - create_batch_signatures(rsa_key, digests) -> list[bytes]: Signs many document digests with a single RSA operation.
+        - verify_root(public_key, signed_data) -> bool: Verifies the root signature of a batch signature, remembering roots already verified.
+
+    - pdf_document.py
+        - PdfDocument: Shared, memory-mapped access to the bytes of a PDF file for a single sign or verify operation.
+            - Methods:
+                - __init__(pdf_path=None, writable=False, data=None): Opens and maps the PDF file, or wraps in-memory PDF content.
+                - from_bytes(source) -> PdfDocument: Wraps in-memory PDF content or the content of a binary stream.
+                - tail(length) -> bytes: Returns the last bytes of the mapped content.
+                - release(offset, length): Drops the pages of an already processed range from the process memory.
+                - append(data): Appends data to the end of the PDF file.
+                - copy_to(output_path, data): Writes a clone of the PDF content followed by data to another file.
+                - patch(offset, data): Overwrites bytes of the PDF file in place with a single positioned write.
+                - close(): Unmaps and closes the PDF file.
+
+    - pdf_trailer.py
+        - PdfTrailer: Lazy parser of the last trailer of a PDF file and the objects it references.
+            - Attributes:
+                - startxref (int): The offset of the last cross-reference section.
+                - dictionary (PdfDictionary): The last trailer dictionary.
+            - Methods:
+                - __init__(buffer): Parses the last trailer of the PDF content.
+                - lookup(number): Returns the cross-reference entry of an object.
+                - resolve(value): Resolves an indirect reference to the referenced object.
+                - info() -> PdfDictionary | None: Returns the document information dictionary.
+        - FileBuffer: A bytes-like view of an open PDF file that reads only the slices it is asked for.
+        - find_startxref(pdf_tail) -> int: Finds the offset of the last cross-reference section.
+
+    - cms.py
+        - SignedData: The fields of a parsed CMS SignedData signature (key_id, digest, signed_attributes, signature, unsigned_attributes).
+        - key_id(public_key) -> bytes: Returns the subject key identifier of a key, the SHA-256 hash of its SubjectPublicKeyInfo.
+        - placeholder_size(rsa_key, unsigned_attributes_size=0) -> int: Returns the size to reserve for a CMS signature made with a key.
+        - build_signed_attributes(digest) -> bytes: Builds the signed attributes (content type and message digest) of a detached signature.
+        - sign_attributes(rsa_key, signed_attributes) -> bytes: Signs the signed attributes with PKCS#1 v1.5 and SHA-256, locally or through a key agent (AgentKey).
+        - sign_digest(rsa_key, digest) -> bytes: Signs a SHA-256 digest computed elsewhere with PKCS#1 v1.5, locally or through a key agent.
+        - build_signed_data(signer_key_id, signed_attributes, signature, unsigned_attributes=None) -> bytes: Builds a detached CMS SignedData structure without certificates.
+        - parse_signed_data(contents) -> SignedData: Parses a CMS SignedData structure, ignoring trailing zero padding.
+        - verify_signed_data(public_key, signed_data) -> bool: Verifies the signature of the signed attributes.
+
+    - file_utils.py
+        - clone_file(source_file, destination_file, size) -> str: Copies the start of a file with a FICLONE reflink, copy_file_range, sendfile or a buffered copy, whichever the system supports first.
 
     - crypto_utils.py
         - read_public_key(public_key_path) -> RSA.RsaKey: Reads an RSA public key from the specified file path.
@@ -86,7 +327,7 @@ Modules:
                 - KeyError: If the key is invalid or corrupted.
                 - FileNotFoundError: If the specified file does not exist.
                 - Exception: For any other unexpected errors during key decryption.
-        - decrypt_rsa_key(pin, drive_manager, progress_signal=None) -> RSA.RsaKey: Decrypts an RSA private key using a provided PIN and drive manager.
+        - decrypt_rsa_key(pin, drive_manager, progress_signal=None) -> RSA.RsaKey: Decrypts an RSA private key using a provided PIN and drive manager, from the key files it read ahead of time if they have not changed.
             - Args:
                 - pin (str): The PIN used to decrypt the RSA key.
                 - drive_manager: An object that manages the drive where the encrypted key is stored.
@@ -0,0 +1,456 @@
+import argparse
+import getpass
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+from utils.batch_utils import (
+    MERKLE_BATCH_SIZE,
+    REPORT_FORMATS,
+    VerifyReport,
+    expand_pdf_inputs,
+    expand_pdf_paths,
+    report_results,
+    sign_batch,
+    sign_merkle_batch,
+    verify_batch,
+    write_report,
+)
+from utils.cms import sign_digest
+from utils.crypto_utils import decrypt_rsa_key, read_public_key
+from utils.http_service import MAX_UPLOAD_SIZE, SERVICE_TOKEN_ENV, SigningServer
+from utils.key_agent import (
+    AGENT_SOCKET_ENV,
+    IDLE_TIMEOUT,
+    MAX_REQUESTS_PER_CONNECTION,
+    AgentKey,
+    KeyAgent,
+    default_socket_path,
+)
+from utils.keyring import KEYRING_ENV, Keyring, open_keyring
+from utils.manifest import MANIFEST_CHUNK_SIZE
+from utils.remote_signing import SigningContext, abort_pdf, finalize_pdf, prepare_pdf
+from utils.stream_utils import sign_stream, verify_stream
+from utils.watch_utils import SETTLE_TIME, SpoolWatcher
+
+from common.drive_manager.drive_manager import DriveManager
+
+logger = logging.getLogger("global_logger")
+
+def run(argv: list[str]) -> int:
+    """
+    Runs the command line interface of the main application.
+
+    Args:
+        argv (list[str]): The command line arguments, without the program name.
+
+    Returns:
+        int: The exit status of the command.
+
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.command(args)
+    except Exception as e:
+        logger.exception("Command failed")
+        print(f"Error: {e}", file=sys.stderr)  # noqa: T201
+        return 1
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Returns:
+        argparse.ArgumentParser: The parser of the command line, with one subcommand per operation.
+
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description="Sign and verify PDF files without the GUI.")
+    commands = parser.add_subparsers(required=True, metavar="COMMAND")
+
+    _add_batch_commands(commands)
+    _add_service_commands(commands)
+    _add_remote_signing_commands(commands)
+    _add_stream_commands(commands)
+    return parser
+
+def sign_batch_command(args: argparse.Namespace) -> int:
+    """
+    Decrypts the private key once and signs every matching PDF file, printing one line per file.
+
+    Returns:
+        int: 0 if every file was signed, 1 otherwise.
+
+    """
+    rsa_key = unlock_private_key(args.drive)
+    pdf_paths = expand_pdf_inputs(args.paths)
+    if args.merkle:
+        results = sign_merkle_batch(pdf_paths, rsa_key, args.output_dir, args.workers, args.batch_size)
+    else:
+        chunk_size = MANIFEST_CHUNK_SIZE if args.manifest else None
+        results = sign_batch(pdf_paths, rsa_key, args.output_dir, args.workers, chunk_size)
+
+    signed = failed = 0
+    for result in results:
+        if result.ok:
+            signed += 1
+            print(f"OK\t{result.path}\t{result.elapsed_ms:.1f} ms", flush=True)  # noqa: T201
+        else:
+            failed += 1
+            print(f"FAILED\t{result.path}\t{result.error}", flush=True)  # noqa: T201
+
+    print(f"Signed {signed} file(s), {failed} failed.", file=sys.stderr)  # noqa: T201
+    return 1 if failed else 0
+
+def verify_batch_command(args: argparse.Namespace) -> int:
+    """
+    Verifies every matching PDF file against the given public keys and streams a report.
+
+    Returns:
+        int: 0 if every file is valid, 1 otherwise.
+
+    """
+    public_keys = load_public_keys(args.key, args.keyring)
+    reports = verify_batch(expand_pdf_paths(args.paths), public_keys, args.workers, args.cache)
+    if args.report is None:
+        statuses = write_report(reports, sys.stdout, args.format)
+    else:
+        with Path(args.report).open("w", encoding="utf-8", newline="") as report_file:
+            statuses = write_report(reports, report_file, args.format)
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    print(f"Verified {statuses.total()} file(s): {summary or 'none'}.", file=sys.stderr)  # noqa: T201
+    return 0 if statuses.total() == statuses["valid"] else 1
+
+def watch_command(args: argparse.Namespace) -> int:
+    """
+    Decrypts the private key once and signs files dropped into the spool directories until SIGINT or SIGTERM.
+
+    Returns:
+        int: 0 once the watcher has stopped.
+
+    """
+    rsa_key = unlock_private_key(args.drive)
+
+    def print_result(result):
+        status = "OK" if result.ok else "FAILED"
+        print(f"{status}\t{result.path}\t{result.error or f'{result.elapsed_ms:.1f} ms'}", flush=True)  # noqa: T201
+
+    with SpoolWatcher(
+        args.directories, rsa_key, args.output_dir, args.failed_dir, args.workers, args.settle, print_result
+    ) as watcher:
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: watcher.stop())
+        print(f"Watching {', '.join(watcher.directories)}. Press Ctrl+C to stop.", file=sys.stderr)  # noqa: T201
+        watcher.run()
+    return 0
+
+def serve_command(args: argparse.Namespace) -> int:
+    """
+    Decrypts the private key once and serves the HTTP signing endpoints until SIGINT or SIGTERM.
+
+    Returns:
+        int: 0 once the server has stopped.
+
+    """
+    rsa_key = unlock_private_key(args.drive)
+    public_keys = load_public_keys(args.key, args.keyring, required=False)
+    token = os.environ.get(SERVICE_TOKEN_ENV)
+    with SigningServer(
+        (args.host, args.port), rsa_key, public_keys, args.workers, args.max_upload, token=token
+    ) as server:
+        # shutdown() waits for serve_forever() to return, so it cannot run in the signal handler itself.
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: threading.Thread(target=server.shutdown).start())
+        host, port = server.server_address[:2]
+        print(f"Serving on http://{host}:{port}. Press Ctrl+C to stop.", file=sys.stderr)  # noqa: T201
+        server.serve_forever()
+    return 0
+
+def agent_command(args: argparse.Namespace) -> int:
+    """
+    Decrypts the private key once and serves signature requests on a Unix socket until SIGINT or SIGTERM.
+
+    Returns:
+        int: 0 once the agent has stopped.
+
+    """
+    drive_manager = select_key_drive(args.drive)
+    rsa_key = decrypt_rsa_key(getpass.getpass("PIN: "), drive_manager)
+    agent = KeyAgent(
+        args.socket or default_socket_path(), rsa_key, drive_manager, args.idle_timeout, args.max_requests
+    )
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: agent.stop())
+    print(f"{AGENT_SOCKET_ENV}={agent.socket_path}; export {AGENT_SOCKET_ENV};", flush=True)  # noqa: T201
+    agent.run()
+    return 0
+
+def prepare_command(args: argparse.Namespace) -> int:
+    """
+    Prepares a PDF file for signing, writes its signing context and prints the hex digest to sign.
+
+    Returns:
+        int: 0 once the file is prepared.
+
+    """
+    chunk_size = MANIFEST_CHUNK_SIZE if args.manifest else None
+    digest, context = prepare_pdf(args.pdf, read_public_key(args.key), args.output, chunk_size)
+    context_path = args.context or f"{context.path}.sigctx"
+    Path(context_path).write_bytes(context.encode())
+    print(digest.hex())  # noqa: T201
+    print(f"Signing context written to {context_path}.", file=sys.stderr)  # noqa: T201
+    return 0
+
+def sign_digest_command(args: argparse.Namespace) -> int:
+    """
+    Signs a hex SHA-256 digest and prints the hex signature.
+
+    Returns:
+        int: 0 once the digest is signed.
+
+    """
+    rsa_key = unlock_private_key(args.drive)
+    print(sign_digest(rsa_key, bytes.fromhex(args.digest)).hex())  # noqa: T201
+    return 0
+
+def finalize_command(args: argparse.Namespace) -> int:
+    """
+    Stores a hex signature in the PDF file named by a signing context.
+
+    Returns:
+        int: 0 once the signature is stored.
+
+    """
+    context = SigningContext.decode(Path(args.context).read_bytes())
+    finalize_pdf(context, bytes.fromhex(args.signature))
+    print(f"Signed {context.path}.", file=sys.stderr)  # noqa: T201
+    return 0
+
+def abort_command(args: argparse.Namespace) -> int:
+    """
+    Removes a prepared copy, or restores a PDF file prepared in place, named by a signing context.
+
+    Returns:
+        int: 0 once the preparation is undone.
+
+    """
+    context = SigningContext.decode(Path(args.context).read_bytes())
+    abort_pdf(context)
+    Path(args.context).unlink()
+    print(f"Aborted the preparation of {context.path}.", file=sys.stderr)  # noqa: T201
+    return 0
+
+def sign_stream_command(args: argparse.Namespace) -> int:
+    """
+    Signs a PDF read from standard input and writes the signed PDF to standard output.
+
+    Returns:
+        int: 0 once the signed PDF is written.
+
+    """
+    rsa_key = unlock_private_key(args.drive)
+    sign_stream(sys.stdin.buffer, sys.stdout.buffer, rsa_key, args.name)
+    return 0
+
+def verify_stream_command(args: argparse.Namespace) -> int:
+    """
+    Verifies a PDF read from standard input and writes one report row.
+
+    Returns:
+        int: 0 if the PDF is valid, 1 otherwise.
+
+    """
+    public_keys = load_public_keys(args.key, args.keyring)
+    start = time.perf_counter()
+    try:
+        report = report_results(
+            args.name, verify_stream(sys.stdin.buffer, public_keys, args.name), (time.perf_counter() - start) * 1000
+        )
+    except Exception as e:  # noqa: BLE001 - verify_stream logs the error, which goes in the report row
+        report = VerifyReport(args.name, "error", (), (time.perf_counter() - start) * 1000, error=str(e))
+    statuses = write_report([report], sys.stdout, args.format)
+    return 0 if statuses["valid"] else 1
+
+def unlock_private_key(drive: str | None):
+    """
+    Returns the private key held by the key agent named in SIGNING_AGENT_SOCK, or asks for the PIN and
+    decrypts the private key stored on a drive.
+
+    Args:
+        drive (str | None): The drive holding the encrypted key, or None to use the key agent if one is
+            set, else the first drive with keys.
+
+    Returns:
+        RSA.RsaKey | AgentKey: The RSA private key.
+
+    Raises:
+        ValueError: If no drive with keys is found.
+
+    """
+    if drive is None and os.environ.get(AGENT_SOCKET_ENV):
+        agent_key = AgentKey()
+        logger.info("Using the key agent at %s", agent_key.socket_path)
+        agent_key.public_key()
+        return agent_key
+
+    return decrypt_rsa_key(getpass.getpass("PIN: "), select_key_drive(drive))
+
+def load_public_keys(key_paths: list[str], keyring: str | None, *, required: bool = True) -> list | Keyring:
+    """
+    Returns the public keys of the accepted signers, read from key files or from a keyring.
+
+    Args:
+        key_paths (list[str]): The public key files. A keyring is only used if there are none.
+        keyring (str | None): The keyring directory, or None to use the one named in SIGNING_KEYRING, if set.
+        required (bool, optional): Whether keys must be given. Defaults to True.
+
+    Returns:
+        list[RSA.RsaKey] | Keyring: The public keys, the keyring, or an empty list if none are given.
+
+    Raises:
+        ValueError: If keys are required and none are given, or the keyring directory does not exist.
+
+    """
+    if key_paths:
+        return [read_public_key(path) for path in key_paths]
+    keyring = keyring or os.environ.get(KEYRING_ENV)
+    if keyring:
+        return open_keyring(keyring)
+    if required:
+        msg = f"No public keys given. Pass --key or --keyring, or set {KEYRING_ENV}."
+        raise ValueError(msg)
+    return []
+
+def select_key_drive(drive: str | None) -> DriveManager:
+    """
+    Args:
+        drive (str | None): The drive holding the encrypted key, or None to use the first drive with keys.
+
+    Returns:
+        DriveManager: A drive manager with the drive selected.
+
+    Raises:
+        ValueError: If no drive with keys is found.
+
+    """
+    drive_manager = DriveManager()
+    if drive is None:
+        drives = drive_manager.list_drives_with_keys()
+        if not drives:
+            msg = "No drive with keys found. Plug in the key drive or pass --drive."
+            raise ValueError(msg)
+        drive = drives[0]
+
+    drive_manager.selected_drive = drive
+    return drive_manager
+
+def _add_batch_commands(commands: argparse._SubParsersAction):
+    sign = commands.add_parser("sign-batch", help="Sign many PDF files in parallel with one PIN entry.")
+    sign.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns such as 'in/**/*.pdf'.")
+    sign.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the first drive with keys.")
+    sign.add_argument(
+        "--output-dir",
+        help="Write signed files here instead of signing in place, keeping their path below the directory or pattern.",
+    )
+    sign.add_argument("--workers", type=int, help="The number of worker processes. Defaults to the number of CPUs.")
+    mode = sign.add_mutually_exclusive_group()
+    mode.add_argument("--merkle", action="store_true", help="Sign each batch of files with a single RSA operation.")
+    mode.add_argument(
+        "--manifest", action="store_true", help="Sign a manifest of 4 MB chunk digests, hashed by several threads."
+    )
+    sign.add_argument("--batch-size", type=int, default=MERKLE_BATCH_SIZE, help="The number of files per Merkle batch.")
+    sign.set_defaults(command=sign_batch_command)
+
+    verify = commands.add_parser("verify-batch", help="Verify many PDF files in parallel and write a report.")
+    verify.add_argument("paths", nargs="+", help="PDF files, directories or glob patterns such as 'in/**/*.pdf'.")
+    _add_key_arguments(verify)
+    verify.add_argument("--format", choices=REPORT_FORMATS, default="jsonl", help="The report format.")
+    verify.add_argument("--report", help="The report file. Defaults to stdout.")
+    verify.add_argument("--workers", type=int, help="The number of worker processes. Defaults to the number of CPUs.")
+    verify.add_argument("--cache", help="An SQLite file of earlier verdicts, skipping files unchanged since.")
+    verify.set_defaults(command=verify_batch_command)
+
+def _add_service_commands(commands: argparse._SubParsersAction):
+    watch = commands.add_parser("watch", help="Sign every PDF file dropped into spool directories until interrupted.")
+    watch.add_argument("directories", nargs="+", help="The spool directories to watch.")
+    watch.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the first drive with keys.")
+    watch.add_argument("--output-dir", required=True, help="Write signed files here.")
+    watch.add_argument("--failed-dir", required=True, help="Move files that cannot be signed here.")
+    watch.add_argument("--workers", type=int, help="The number of worker processes. Defaults to the number of CPUs.")
+    watch.add_argument(
+        "--settle", type=float, default=SETTLE_TIME, help="Seconds without writes before a file is signed."
+    )
+    watch.set_defaults(command=watch_command)
+
+    serve = commands.add_parser("serve", help="Sign and verify PDF files uploaded over HTTP until interrupted.")
+    serve.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the first drive with keys.")
+    serve.add_argument(
+        "--host", default="127.0.0.1", help=f"The address to listen on. Other than loopback, {SERVICE_TOKEN_ENV} must be set."
+    )
+    serve.add_argument("--port", type=int, default=8080, help="The port to listen on.")
+    keys = serve.add_mutually_exclusive_group()
+    keys.add_argument(
+        "--key", action="append", default=[], help="A public key file accepted by /verify. Defaults to the signing key."
+    )
+    keys.add_argument("--keyring", help=f"A directory of public keys accepted by /verify. Defaults to ${KEYRING_ENV}.")
+    serve.add_argument("--workers", type=int, help="The number of worker processes. Defaults to the number of CPUs.")
+    serve.add_argument("--max-upload", type=int, default=MAX_UPLOAD_SIZE, help="The largest accepted upload, in bytes.")
+    serve.set_defaults(command=serve_command)
+
+    agent = commands.add_parser("agent", help="Hold the unlocked key and sign digests for other commands.")
+    agent.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the first drive with keys.")
+    agent.add_argument("--socket", help=f"The socket path. Defaults to ${AGENT_SOCKET_ENV} or a per-user path.")
+    agent.add_argument(
+        "--idle-timeout", type=float, default=IDLE_TIMEOUT, help="Seconds without signing before the key is dropped."
+    )
+    agent.add_argument(
+        "--max-requests", type=int, default=MAX_REQUESTS_PER_CONNECTION, help="Requests served per connection."
+    )
+    agent.set_defaults(command=agent_command)
+
+def _add_remote_signing_commands(commands: argparse._SubParsersAction):
+    prepare = commands.add_parser("prepare", help="Prepare a PDF file for signing elsewhere and print its digest.")
+    prepare.add_argument("pdf", help="The PDF file to prepare.")
+    prepare.add_argument("--key", required=True, help="The public key file of the signer.")
+    prepare.add_argument(
+        "--output", help="Write the prepared file here, or pass PDF itself to prepare in place. Defaults to PDF.prepared.pdf."
+    )
+    prepare.add_argument("--context", help="The signing context file. Defaults to the prepared file plus .sigctx.")
+    prepare.add_argument("--manifest", action="store_true", help="Sign a manifest of 4 MB chunk digests.")
+    prepare.set_defaults(command=prepare_command)
+
+    sign_digest_parser = commands.add_parser("sign-digest", help="Sign a hex SHA-256 digest printed by prepare.")
+    sign_digest_parser.add_argument("digest", help="The hex digest.")
+    sign_digest_parser.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the key agent.")
+    sign_digest_parser.set_defaults(command=sign_digest_command)
+
+    finalize = commands.add_parser("finalize", help="Store a signature made by sign-digest in a prepared file.")
+    finalize.add_argument("context", help="The signing context file written by prepare.")
+    finalize.add_argument("signature", help="The hex signature printed by sign-digest.")
+    finalize.set_defaults(command=finalize_command)
+
+    abort = commands.add_parser("abort", help="Undo prepare for a signature that will not come.")
+    abort.add_argument("context", help="The signing context file written by prepare.")
+    abort.set_defaults(command=abort_command)
+
+def _add_stream_commands(commands: argparse._SubParsersAction):
+    sign = commands.add_parser("sign-stream", help="Sign a PDF read from standard input to standard output.")
+    sign.add_argument("--drive", help="The drive holding private_key.enc. Defaults to the key agent.")
+    sign.add_argument("--name", default="-", help="The name of the PDF in log messages.")
+    sign.set_defaults(command=sign_stream_command)
+
+    verify = commands.add_parser("verify-stream", help="Verify a PDF read from standard input and print a report row.")
+    _add_key_arguments(verify)
+    verify.add_argument("--format", choices=REPORT_FORMATS, default="jsonl", help="The format of the report row.")
+    verify.add_argument("--name", default="-", help="The path written in the report row.")
+    verify.set_defaults(command=verify_stream_command)
+
+def _add_key_arguments(parser: argparse.ArgumentParser):
+    keys = parser.add_mutually_exclusive_group()
+    keys.add_argument("--key", action="append", default=[], help="A public key file. Repeat for several signers.")
+    keys.add_argument(
+        "--keyring", help=f"A directory of public keys, found by the key ID of each signature. Defaults to ${KEYRING_ENV}."
+    )
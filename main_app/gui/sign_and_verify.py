@@ -1,9 +1,12 @@
 import logging
+import os
 
 from gui.enums import SignState, VerifyState
 from gui.sign_thread import SignThread
 from gui.verify_thread import VerifyThread
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog, QPushButton, QVBoxLayout, QWidget
+from utils.key_session import session_from_environment
+from utils.keyring import KEYRING_ENV
 
 from common.gui.drive_selection import DriveSelectionWidget
 from common.gui.enums import DriveSelectorMode
@@ -41,6 +44,8 @@ class SignVerifyWindow(QWidget):
         Opens a file dialog to select a public key file for verifying a PDF.
     close_application():
         Closes the application and logs the closure.
+    closeEvent(event):
+        Drops the key kept unlocked by the key session, if any, when the window closes.
 
     """
 
@@ -57,6 +62,11 @@ class SignVerifyWindow(QWidget):
         """
         super().__init__()
         logger.info("Instance of Sign and Verify created")
+        try:
+            self.key_session = session_from_environment()
+        except ValueError:
+            logger.exception("Invalid key session settings, asking for the PIN on every signature")
+            self.key_session = None
         self.init_ui()
 
     def init_ui(self):
@@ -94,6 +104,8 @@ class SignVerifyWindow(QWidget):
         layout.addWidget(self.quit_button)
 
         self.drive_selection_widget = DriveSelectionWidget(DriveSelectorMode.WITH_KEYS)
+        if self.key_session is not None:
+            self.drive_selection_widget.drives_refreshed.connect(self.key_session.retain_drives)
         layout.addWidget(self.drive_selection_widget)
 
         self.setLayout(layout)
@@ -104,7 +116,7 @@ class SignVerifyWindow(QWidget):
         This method sets up a progress dialog to inform the user about the signing process and starts a separate thread to handle the signing operation.
 
         Args:
-            pin (str): The PIN code required for signing the PDF.
+            pin (str | None): The PIN code required for signing the PDF, or None if the key session holds the key.
             pdf_path (str): The file path of the PDF to be signed.
 
         Attributes:
@@ -119,7 +131,7 @@ class SignVerifyWindow(QWidget):
         self.progress_dialog.setAutoReset(True)
         self.progress_dialog.show()
 
-        self.keygen_thread = SignThread(pin, self.drive_selection_widget.drive_manager, pdf_path)
+        self.keygen_thread = SignThread(pin, self.drive_selection_widget.drive_manager, pdf_path, self.key_session)
         self.keygen_thread.progress_update.connect(self.update_progress)
         self.keygen_thread.status.connect(self.handle_status)
         self.keygen_thread.start()
@@ -193,7 +205,8 @@ class SignVerifyWindow(QWidget):
         """
         Verifies the digital signature of a selected PDF file using a selected public key file.
         This method prompts the user to select a PDF file and a public key file. If both files are selected,
-        it initiates the verification process.
+        it initiates the verification process. When SIGNING_KEYRING names a keyring directory, the public key
+        of each signature is taken from it and no key file is asked for.
 
         Returns:
             None
@@ -203,7 +216,7 @@ class SignVerifyWindow(QWidget):
         if not pdf_path:
             return
 
-        pub_key_path = self.select_pub_key_file()
+        pub_key_path = os.environ.get(KEYRING_ENV) or self.select_pub_key_file()
         if pdf_path:
             self.start_verifying_file(pub_key_path, pdf_path)
 
@@ -219,10 +232,19 @@ class SignVerifyWindow(QWidget):
         5. Opens a file selection dialog for the user to select a PDF file.
         6. If a PDF file is selected, starts the signing process with the entered PIN and selected PDF file.
 
+        The PIN is not asked for while the key session holds the unlocked key of the selected drive.
+
         Returns:
             None
 
         """
+        drive = self.drive_selection_widget.drive_manager.selected_drive
+        if self.key_session is not None and drive and self.key_session.holds_key(drive):
+            pdf_path = self.select_pdf_file()
+            if pdf_path:
+                self.start_signing_file(None, pdf_path)
+            return
+
         pin_dialog = PinPadDialog()
         logger.info("Opened PinPad")
         if pin_dialog.exec():
@@ -277,3 +299,15 @@ class SignVerifyWindow(QWidget):
         logger.info("Application closed by user")
         self.close()
 
+    def closeEvent(self, event):  # noqa: N802 - Qt event handler
+        """
+        Drops the key kept unlocked by the key session, if any, when the window closes.
+
+        Args:
+            event (QCloseEvent): The close event.
+
+        """
+        if self.key_session is not None:
+            self.key_session.clear()
+        super().closeEvent(event)
+
@@ -3,6 +3,7 @@ import logging
 from gui.enums import SignState
 from PyQt6.QtCore import QThread, pyqtSignal
 from utils.crypto_utils import decrypt_rsa_key
+from utils.key_session import KeySession
 from utils.pdf_utils import sign_pdf
 
 logger = logging.getLogger("global_logger")
@@ -16,9 +17,10 @@ class SignThread(QThread):
         status (SignState, str): Emitted to update the status of the signing process.
 
     Attributes:
-        pin (str): The PIN code used for RSA key decryption.
+        pin (str | None): The PIN code used for RSA key decryption, or None if the key session holds the key.
         drive_manager (DriveManager): The drive manager instance to manage the drive operations.
         pdf_path (str): The file path of the PDF to be signed.
+        key_session (KeySession | None): The session keeping the key unlocked between signatures, if enabled.
 
     Methods:
         run(): Executes the signing process, emitting progress updates and status changes.
@@ -28,20 +30,24 @@ class SignThread(QThread):
     progress_update = pyqtSignal(str, int)
     status = pyqtSignal(SignState, str)
 
-    def __init__(self, pin, drive_manager, pdf_path):
+    def __init__(self, pin, drive_manager, pdf_path, key_session: KeySession | None = None):
         """
         Initializes the SignThread class with the provided PIN, drive manager, and PDF path.
 
         Args:
-            pin (str): The personal identification number used for authentication.
+            pin (str | None): The personal identification number used for authentication, or None if the key
+                session holds the key.
             drive_manager (DriveManager): An instance of the DriveManager class to manage drive operations.
             pdf_path (str): The file path to the PDF document to be signed.
+            key_session (KeySession, optional): The session keeping the key unlocked between signatures.
+                Defaults to None, which decrypts the key for this signature only.
 
         """
         super().__init__()
         self.pin = pin
         self.drive_manager = drive_manager
         self.pdf_path = pdf_path
+        self.key_session = key_session
 
     def run(self):
         """
@@ -49,7 +55,7 @@ class SignThread(QThread):
 
         This method performs the following steps:
         1. Emits a progress update indicating the start of RSA key decryption.
-        2. Decrypts the RSA key using the provided PIN and drive manager.
+        2. Decrypts the RSA key using the provided PIN and drive manager, unless the key session holds it.
         3. Emits a progress update indicating the start of PDF file signing.
         4. Signs the PDF file using the decrypted RSA key.
         5. Emits a progress update indicating the finalization of the process.
@@ -64,12 +70,23 @@ class SignThread(QThread):
         """
         try:
             self.progress_update.emit("Initializing RSA key decryption...", 10)
-            self.rsa_key = decrypt_rsa_key(self.pin, self.drive_manager, self.progress_update)
-            self.progress_update.emit("Initializing PDF File signing...", 10)
-            sign_pdf(self.pdf_path, self.rsa_key, self.progress_update)
+            if self.key_session is None:
+                rsa_key = self._unlock()
+                self.progress_update.emit("Initializing PDF File signing...", 10)
+                sign_pdf(self.pdf_path, rsa_key, self.progress_update)
+            else:
+                with self.key_session.signing_key(self.drive_manager.selected_drive, self._unlock) as rsa_key:
+                    self.progress_update.emit("Initializing PDF File signing...", 10)
+                    sign_pdf(self.pdf_path, rsa_key, self.progress_update)
             self.progress_update.emit("Finalizing process...", 95)
             self.progress_update.emit("Done!", 100)
             self.status.emit(SignState.FINISHED, "PDF File signed successfully.")
         except Exception as e:
             logger.exception("Error during signing PDF File")
             self.status.emit(SignState.ERRORED, str(e))
+
+    def _unlock(self):
+        if self.pin is None:
+            msg = "The unlocked key session has expired. Sign again to enter the PIN."
+            raise ValueError(msg)
+        return decrypt_rsa_key(self.pin, self.drive_manager, self.progress_update)
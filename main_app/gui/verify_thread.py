@@ -1,8 +1,10 @@
 import logging
+from pathlib import Path
 
 from gui.enums import VerifyState
 from PyQt6.QtCore import QThread, pyqtSignal
 from utils.crypto_utils import read_public_key
+from utils.keyring import open_keyring
 from utils.pdf_utils import verify_pdf
 
 logger = logging.getLogger("global_logger")
@@ -15,7 +17,7 @@ class VerifyThread(QThread):
         status (VerifyState, str): Emitted to update the status of the verification process.
 
     Args:
-        pub_key_path (str): The file path to the public key used for verification.
+        pub_key_path (str): The file path to the public key used for verification, or a keyring directory.
         pdf_path (str): The file path to the PDF file to be verified.
 
     Methods:
@@ -31,7 +33,7 @@ class VerifyThread(QThread):
         Initializes the VerifyThread instance with the provided public key path and PDF path.
 
         Args:
-            pub_key_path (str): The file path to the public key.
+            pub_key_path (str): The file path to the public key, or a keyring directory.
             pdf_path (str): The file path to the PDF document to be verified.
 
         """
@@ -45,9 +47,10 @@ class VerifyThread(QThread):
 
         This method performs the following steps:
         1. Emits a progress update indicating the start of reading the public key.
-        2. Reads the public key from the specified path.
+        2. Reads the public key from the specified path, or opens the keyring of the specified directory.
         3. Emits a progress update indicating the start of PDF file verification.
-        4. Verifies the PDF file using the provided public key.
+        4. Verifies all signatures of the PDF file, requiring every signature to be intact and the public key
+           to have made at least one of them.
         5. Emits progress updates throughout the verification process.
         6. Emits a final progress update upon completion.
         7. Emits a status signal indicating the success or failure of the verification process.
@@ -62,13 +65,31 @@ class VerifyThread(QThread):
         """
         try:
             self.progress_update.emit("Reading public key...", 10)
-            self.public_key = read_public_key(self.pub_key_path)
+            if Path(self.pub_key_path).is_dir():
+                self.public_key = open_keyring(self.pub_key_path)
+            else:
+                self.public_key = read_public_key(self.pub_key_path)
             logger.exception("Error during verifying PDF File")
             self.progress_update.emit("Initializing PDF File verification...", 10)
-            verify_pdf(self.pdf_path, self.public_key, self.progress_update)
+            results = verify_pdf(self.pdf_path, self.public_key, self.progress_update)
+            for result in results:
+                if not result.intact:
+                    msg = f"Signature {result.index + 1} of {len(results)}: {result.error}"
+                    raise ValueError(msg)  # noqa: TRY301
+            signed = [result.index + 1 for result in results if result.valid]
+            if not signed:
+                msg = "Signature verification failed."
+                raise ValueError(msg)  # noqa: TRY301
             self.progress_update.emit("Finalizing process...", 95)
             self.progress_update.emit("Done!", 100)
-            self.status.emit(VerifyState.FINISHED, "PDF File verified successfully.")
+            if len(results) == 1:
+                self.status.emit(VerifyState.FINISHED, "PDF File verified successfully.")
+            else:
+                self.status.emit(
+                    VerifyState.FINISHED,
+                    f"PDF File verified successfully. The key made signature {', '.join(map(str, signed))} "
+                    f"of {len(results)}, and all signatures are intact.",
+                )
         except Exception as e:
             logger.exception("Error during verifying PDF File")
             self.status.emit(VerifyState.ERRORED, str(e))
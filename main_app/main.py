@@ -1,18 +1,23 @@
 import sys
 from pathlib import Path
 
-from PyQt6.QtWidgets import QApplication
-
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from gui.sign_and_verify import SignVerifyWindow
-
 from common.drive_manager.drive_manager import DriveManager
 from common.logger.logger import MAIN_LOG_FILE, initialize
 
-logger = initialize(MAIN_LOG_FILE)
-
 if __name__ == "__main__":
+    # Command line arguments select the headless interface, which keeps stdout for its own output.
+    if len(sys.argv) > 1:
+        from cli import run
+
+        logger = initialize(MAIN_LOG_FILE, console=False)
+        sys.exit(run(sys.argv[1:]))
+
+    from gui.sign_and_verify import SignVerifyWindow
+    from PyQt6.QtWidgets import QApplication
+
+    logger = initialize(MAIN_LOG_FILE)
     dev_manager = DriveManager()
 
 
@@ -20,4 +25,3 @@ if __name__ == "__main__":
     window = SignVerifyWindow()
     window.show()
     sys.exit(app.exec())
-
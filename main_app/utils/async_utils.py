@@ -0,0 +1,169 @@
+import asyncio
+import functools
+import logging
+from collections.abc import Callable
+from concurrent.futures import Executor
+from typing import NamedTuple
+
+from utils.crypto_utils import decrypt_rsa_key
+from utils.pdf_utils import sign_bytes, sign_pdf, verify_bytes, verify_pdf
+
+logger = logging.getLogger("global_logger")
+
+_default_executor = None
+
+class ProgressEvent(NamedTuple):
+    """
+    ProgressEvent is one progress update of an operation, as emitted through its progress signal.
+
+    Attributes:
+        message (str): The progress message.
+        value (int): The progress, from 0 to 100.
+
+    """
+
+    message: str
+    value: int
+
+class AsyncOperation:
+    """
+    AsyncOperation runs a blocking sign, verify or decrypt operation on an executor without blocking the event loop.
+
+    The operation is awaitable for its result and asynchronously iterable for its progress events. It
+    passes itself to the operation as the progress signal: every `emit` call from the worker thread is
+    handed over to the event loop. The executor must run in this process, since RSA keys cannot be
+    pickled; process-level parallelism is provided by the batch functions (see `sign_batch`).
+
+    Example:
+        operation = sign_pdf_async("invoice.pdf", rsa_key)
+        async for event in operation:
+            print(event.message, event.value)
+        await operation
+
+    Methods:
+        __init__(function: Callable, *args, executor: Executor | None = None, **kwargs):
+        emit(message: str, value: int):
+            Reports a progress update from any thread.
+        done() -> bool:
+            Returns whether the operation has finished.
+
+    """
+
+    _finished = object()
+
+    def __init__(self, function: Callable, *args, executor: Executor | None = None, **kwargs):
+        """
+        Starts the operation on an executor. Must be called from a running event loop.
+
+        Args:
+            function (Callable): The blocking function. It must accept a `progress_signal` keyword argument.
+            *args: The positional arguments of the function.
+            executor (Executor, optional): The thread executor to run the function on. Defaults to the executor
+                set with `set_default_executor`, or the default executor of the event loop.
+            **kwargs: The keyword arguments of the function.
+
+        """
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        self._future = self._loop.run_in_executor(
+            executor or _default_executor, functools.partial(function, *args, progress_signal=self, **kwargs)
+        )
+        self._future.add_done_callback(lambda _: self._events.put_nowait(self._finished))
+
+    def emit(self, message: str, value: int):
+        """
+        Reports a progress update. Safe to call from the thread running the operation.
+
+        Args:
+            message (str): The progress message.
+            value (int): The progress, from 0 to 100.
+
+        """
+        self._loop.call_soon_threadsafe(self._events.put_nowait, ProgressEvent(message, value))
+
+    def done(self) -> bool:
+        """
+        Returns:
+            bool: True if the operation has finished, successfully or not.
+
+        """
+        return self._future.done()
+
+    def __await__(self):
+        return self._future.__await__()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ProgressEvent:
+        if self._events.empty() and self._future.done():
+            raise StopAsyncIteration
+        event = await self._events.get()
+        if event is self._finished:
+            raise StopAsyncIteration
+        return event
+
+def set_default_executor(executor: Executor | None):
+    """
+    Sets the executor used by operations started without one.
+
+    Args:
+        executor (Executor | None): The thread executor, or None for the default executor of the event loop.
+
+    """
+    global _default_executor  # noqa: PLW0603
+    _default_executor = executor
+
+def sign_pdf_async(pdf_path: str, rsa_key, output_path: str | None = None, chunk_size: int | None = None,
+                   executor: Executor | None = None) -> AsyncOperation:
+    """
+    Signs a PDF file on an executor (see `sign_pdf`).
+
+    Returns:
+        AsyncOperation: The running operation, awaitable for None.
+
+    """
+    return AsyncOperation(
+        sign_pdf, pdf_path, rsa_key, output_path=output_path, chunk_size=chunk_size, executor=executor
+    )
+
+def sign_bytes_async(pdf_data, rsa_key, chunk_size: int | None = None,
+                     executor: Executor | None = None) -> AsyncOperation:
+    """
+    Signs in-memory PDF content on an executor (see `sign_bytes`).
+
+    Returns:
+        AsyncOperation: The running operation, awaitable for the signed PDF content.
+
+    """
+    return AsyncOperation(sign_bytes, pdf_data, rsa_key, chunk_size=chunk_size, executor=executor)
+
+def verify_pdf_async(pdf_path: str, public_key, executor: Executor | None = None) -> AsyncOperation:
+    """
+    Verifies all signatures of a PDF file on an executor (see `verify_pdf`).
+
+    Returns:
+        AsyncOperation: The running operation, awaitable for the list of SignatureResult.
+
+    """
+    return AsyncOperation(verify_pdf, pdf_path, public_key, executor=executor)
+
+def verify_bytes_async(pdf_data, public_key, executor: Executor | None = None) -> AsyncOperation:
+    """
+    Verifies all signatures of in-memory PDF content on an executor (see `verify_bytes`).
+
+    Returns:
+        AsyncOperation: The running operation, awaitable for the list of SignatureResult.
+
+    """
+    return AsyncOperation(verify_bytes, pdf_data, public_key, executor=executor)
+
+def decrypt_rsa_key_async(pin: str, drive_manager, executor: Executor | None = None) -> AsyncOperation:
+    """
+    Decrypts the private key stored on a drive on an executor (see `decrypt_rsa_key`).
+
+    Returns:
+        AsyncOperation: The running operation, awaitable for the RSA private key.
+
+    """
+    return AsyncOperation(decrypt_rsa_key, pin, drive_manager, executor=executor)
@@ -0,0 +1,485 @@
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import NamedTuple
+
+from Crypto.PublicKey import RSA
+from utils.cms import placeholder_size
+from utils.keyring import Keyring
+from utils.merkle import create_batch_signatures, proof_size
+from utils.pdf_document import PdfDocument
+from utils.pdf_utils import SignatureResult, add_signature_to_pdf, prepare_document, sign_pdf, verify_pdf
+from utils.verify_cache import VerificationCache
+
+logger = logging.getLogger("global_logger")
+
+GLOB_CHARACTERS = "*?["
+JOBS_PER_WORKER = 4
+MERKLE_BATCH_SIZE = 1024
+REPORT_FORMATS = ("jsonl", "csv")
+
+# State set up once per worker process by the pool initializer.
+_worker_state = {}
+
+class BatchResult(NamedTuple):
+    """
+    BatchResult holds the outcome of one file of a batch operation.
+
+    Attributes:
+        path (str): The path to the PDF file.
+        ok (bool): Whether the operation succeeded.
+        elapsed_ms (float): The time the worker spent on the file, in milliseconds.
+        error (str | None): The error message if the operation failed.
+
+    """
+
+    path: str
+    ok: bool
+    elapsed_ms: float
+    error: str | None = None
+
+class VerifyReport(NamedTuple):
+    """
+    VerifyReport is one row of a batch verification report.
+
+    Attributes:
+        path (str): The path to the PDF file.
+        status (str): `valid` if every signature is valid, `invalid` if any is not, or `error` if the file
+            could not be verified at all.
+        signers (tuple[str, ...]): The hex key fingerprints named by the signatures, in signing order.
+        elapsed_ms (float): The time the worker spent on the file, in milliseconds.
+        bytes_hashed (int): The number of bytes of the file that were hashed.
+        error (str | None): The first error found, if any.
+
+    """
+
+    path: str
+    status: str
+    signers: tuple
+    elapsed_ms: float
+    bytes_hashed: int = 0
+    error: str | None = None
+
+class PdfInput(NamedTuple):
+    """
+    PdfInput is a PDF file found by `expand_pdf_inputs`.
+
+    Attributes:
+        path (str): The path to the PDF file.
+        name (str): The path of the file relative to the directory, or to the part of the glob pattern before
+            its first wildcard, it was found under. A batch writing to an output directory keeps it there.
+
+    """
+
+    path: str
+    name: str
+
+class _PreparedFile(NamedTuple):
+    path: str
+    output_path: str | None
+    stat: tuple
+    section: bytearray
+    byte_range: list
+    digest: bytes
+    elapsed_ms: float
+
+def expand_pdf_paths(patterns: Iterable[str]) -> Iterator[str]:
+    """
+    Expands paths, directories and glob patterns into the paths of PDF files (see `expand_pdf_inputs`).
+
+    Args:
+        patterns (Iterable[str]): File paths, directory paths or glob patterns.
+
+    Yields:
+        str: The path to a PDF file.
+
+    """
+    return (pdf_input.path for pdf_input in expand_pdf_inputs(patterns))
+
+def expand_pdf_inputs(patterns: Iterable[str]) -> Iterator[PdfInput]:
+    """
+    Expands paths, directories and glob patterns into PDF files, with their path relative to where they were found.
+
+    Directories yield the PDF files directly inside them. Glob patterns support `**`, and a file they match
+    is named relative to the part of the pattern before its first wildcard, so `in/**/*.pdf` names
+    `in/a/x.pdf` as `a/x.pdf`. Directories and patterns are read lazily, so a large corpus is never
+    listed in memory at once. Each path is yielded only once.
+
+    Args:
+        patterns (Iterable[str]): File paths, directory paths or glob patterns.
+
+    Yields:
+        PdfInput: A PDF file and its relative name.
+
+    """
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = (
+                PdfInput(str(file), file.name)
+                for file in path.iterdir() if file.suffix.lower() == ".pdf" and file.is_file()
+            )
+        elif any(character in pattern for character in GLOB_CHARACTERS):
+            anchor = Path(path.anchor) if path.is_absolute() else Path()
+            fixed_parts = itertools.takewhile(
+                lambda part: not any(character in part for character in GLOB_CHARACTERS),
+                path.relative_to(anchor).parts,
+            )
+            root = anchor.joinpath(*fixed_parts)
+            matches = (
+                PdfInput(str(file), str(file.relative_to(root)))
+                for file in root.glob(str(path.relative_to(root))) if file.is_file()
+            )
+        else:
+            matches = [PdfInput(pattern, path.name)]
+
+        for match in matches:
+            if match.path not in seen:
+                seen.add(match.path)
+                yield match
+
+def sign_batch(pdf_paths: Iterable[str | PdfInput], rsa_key: RSA.RsaKey, output_dir: str | None = None,
+               workers: int | None = None, chunk_size: int | None = None) -> Iterator[BatchResult]:
+    """
+    Signs many PDF files in parallel with a pool of worker processes.
+
+    The key is sent to each worker once, when the worker starts, and imported there a single time. Results
+    are yielded as the files complete, not in input order. A file that cannot be signed yields a failed
+    result and does not stop the batch. Only a few jobs per worker are queued at a time, so the paths
+    may come from a lazy iterator over a large directory.
+
+    Args:
+        pdf_paths (Iterable[str | PdfInput]): The paths to the PDF files to be signed, or the files found by
+            `expand_pdf_inputs`.
+        rsa_key (RSA.RsaKey): The RSA key to use for signing.
+        output_dir (str, optional): A directory the signed files are written to under their relative name
+            (see `PdfInput`), or their file name for plain paths, leaving the inputs untouched. A file whose
+            output path is already taken by another file of the batch fails without being signed.
+            Defaults to signing in place.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): Signs a manifest of chunk digests of this size (see `sign_document`).
+            Defaults to None.
+
+    Yields:
+        BatchResult: The result of each file, in completion order.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    logger.info("Signing batch with %d workers", workers)
+    with create_worker_pool(workers, rsa_key) as executor:
+        jobs = (
+            (sign_in_worker, path, output_path, chunk_size) if error is None else (_reject_file, path, error)
+            for path, output_path, error in _plan_outputs(pdf_paths, output_dir)
+        )
+        yield from run_bounded(executor, jobs, workers * JOBS_PER_WORKER)
+
+def create_worker_pool(workers: int, rsa_key: RSA.RsaKey | None = None,
+                       public_keys: Iterable[RSA.RsaKey] | Keyring = (),
+                       cache_path: str | None = None) -> ProcessPoolExecutor:
+    """
+    Creates a pool of worker processes that each import the keys once, when they start.
+
+    Args:
+        workers (int): The number of worker processes.
+        rsa_key (RSA.RsaKey | AgentKey, optional): The RSA key to sign with, for `sign_in_worker` jobs.
+        public_keys (Iterable[RSA.RsaKey] | Keyring, optional): The public keys of all accepted signers, or
+            a keyring that each worker opens from its index, for `verify_in_worker` jobs.
+        cache_path (str, optional): The database of a `VerificationCache` opened by each worker,
+            for `verify_in_worker` jobs. Defaults to None.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+
+    """
+    # A key held by a key agent is sent as is, and each worker connects to the agent itself.
+    signing_key = rsa_key.export_key("DER") if isinstance(rsa_key, RSA.RsaKey) else rsa_key
+    # A keyring is sent as its directory, so workers only parse the keys that sign the files they get.
+    if isinstance(public_keys, Keyring):
+        verifying_keys = public_keys.directory
+    else:
+        verifying_keys = [key.public_key().export_key("DER") for key in public_keys]
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(signing_key, verifying_keys, cache_path)
+    )
+
+def sign_in_worker(pdf_path: str, output_path: str | None = None, chunk_size: int | None = None) -> BatchResult:
+    """
+    Signs a PDF file with the key of a worker process of a pool made by `create_worker_pool`.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be signed.
+        output_path (str, optional): The path the signed file is written to. Defaults to signing in place.
+        chunk_size (int, optional): Signs a manifest of chunk digests of this size. Defaults to None.
+
+    Returns:
+        BatchResult: The result of the file. Errors are reported in the result, not raised.
+
+    """
+    start = time.perf_counter()
+    try:
+        sign_pdf(pdf_path, _worker_state["rsa_key"], output_path=output_path, chunk_size=chunk_size)
+    except Exception as e:  # noqa: BLE001 - sign_pdf logs the error, the batch goes on with the next file
+        return BatchResult(pdf_path, ok=False, elapsed_ms=_elapsed_ms(start), error=str(e))
+    return BatchResult(pdf_path, ok=True, elapsed_ms=_elapsed_ms(start))
+
+def sign_merkle_batch(pdf_paths: Iterable[str | PdfInput], rsa_key: RSA.RsaKey, output_dir: str | None = None,
+                      workers: int | None = None, batch_size: int = MERKLE_BATCH_SIZE) -> Iterator[BatchResult]:
+    """
+    Signs many PDF files in parallel with one RSA operation per batch of files.
+
+    The files are taken in batches. The workers hash every file of a batch first, then the root of a
+    Merkle tree over their digests is signed once (see `create_batch_signatures`), and the workers write
+    each file with the root signature and its own inclusion proof. The private key never leaves this
+    process. A file that changed between the two steps fails and is not written.
+
+    Args:
+        pdf_paths (Iterable[str | PdfInput]): The paths to the PDF files to be signed, or the files found by
+            `expand_pdf_inputs`.
+        rsa_key (RSA.RsaKey): The RSA key to use for signing.
+        output_dir (str, optional): A directory the signed files are written to under their relative name
+            (see `PdfInput`), or their file name for plain paths, leaving the inputs untouched. A file whose
+            output path is already taken by another file of the batch fails without being signed.
+            Defaults to signing in place.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        batch_size (int, optional): The maximum number of files covered by one RSA operation.
+            Defaults to MERKLE_BATCH_SIZE.
+
+    Yields:
+        BatchResult: The result of each file, in completion order.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    logger.info("Signing Merkle batches of up to %d files with %d workers", batch_size, workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in itertools.batched(_plan_outputs(pdf_paths, output_dir), batch_size, strict=False):
+            signature_size = placeholder_size(rsa_key, proof_size(len(batch)))
+            prepared = []
+            jobs = (
+                (_prepare_file, path, output_path, signature_size) if error is None else (_reject_file, path, error)
+                for path, output_path, error in batch
+            )
+            for result in run_bounded(executor, jobs, workers * JOBS_PER_WORKER):
+                if isinstance(result, BatchResult):
+                    yield result
+                else:
+                    prepared.append(result)
+            if not prepared:
+                continue
+
+            signatures = create_batch_signatures(rsa_key, [file.digest for file in prepared])
+            jobs = (
+                (_write_prepared_file, file, signature)
+                for file, signature in zip(prepared, signatures, strict=True)
+            )
+            yield from run_bounded(executor, jobs, workers * JOBS_PER_WORKER)
+
+def verify_batch(pdf_paths: Iterable[str], public_keys: Iterable[RSA.RsaKey] | Keyring,
+                 workers: int | None = None, cache_path: str | None = None) -> Iterator[VerifyReport]:
+    """
+    Verifies many PDF files in parallel with a pool of worker processes.
+
+    The public keys are sent to each worker once and parsed there a single time. Keys of a keyring are
+    parsed by a worker when it first gets a file they signed. Results are yielded as the files complete,
+    and only a few jobs per worker are in flight, so memory use does not depend on the number of files.
+
+    Args:
+        pdf_paths (Iterable[str]): The paths to the PDF files to be verified.
+        public_keys (Iterable[RSA.RsaKey] | Keyring): The public keys of all accepted signers, or a keyring.
+        workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+        cache_path (str, optional): The database of a `VerificationCache` shared by the workers, which
+            skip files verified earlier with the same keys. Defaults to None.
+
+    Yields:
+        VerifyReport: The report row of each file, in completion order.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    if not isinstance(public_keys, Keyring):
+        public_keys = list(public_keys)
+
+    logger.info("Verifying batch with %d workers and %d public keys", workers, len(public_keys))
+    with create_worker_pool(workers, public_keys=public_keys, cache_path=cache_path) as executor:
+        jobs = ((verify_in_worker, path) for path in pdf_paths)
+        yield from run_bounded(executor, jobs, workers * JOBS_PER_WORKER)
+
+def verify_in_worker(pdf_path: str) -> VerifyReport:
+    """
+    Verifies a PDF file with the public keys of a worker process of a pool made by `create_worker_pool`.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be verified.
+
+    Returns:
+        VerifyReport: The report row of the file. Errors are reported in the row, not raised.
+
+    """
+    start = time.perf_counter()
+    cache = _worker_state["cache"]
+    bytes_hashed = cache.bytes_hashed if cache is not None else 0
+    try:
+        if cache is None:
+            results = verify_pdf(pdf_path, _worker_state["public_keys"])
+        else:
+            results = cache.verify(pdf_path, _worker_state["public_keys"])
+    except Exception as e:  # noqa: BLE001 - verify_pdf logs the error, the batch goes on with the next file
+        return VerifyReport(pdf_path, "error", (), _elapsed_ms(start), error=str(e))
+
+    report = report_results(pdf_path, results, _elapsed_ms(start))
+    # A verdict found in the cache hashed nothing.
+    return report._replace(bytes_hashed=cache.bytes_hashed - bytes_hashed) if cache is not None else report
+
+def report_results(pdf_path: str, results: list[SignatureResult], elapsed_ms: float) -> VerifyReport:
+    """
+    Args:
+        pdf_path (str): The path to the verified PDF file.
+        results (list[SignatureResult]): The result of every signature of the file.
+        elapsed_ms (float): The time spent on the file, in milliseconds.
+
+    Returns:
+        VerifyReport: The report row of the file.
+
+    """
+    errors = [f"Signature {result.index + 1}: {result.error}" for result in results if not result.valid]
+    return VerifyReport(
+        pdf_path,
+        "invalid" if errors else "valid",
+        tuple(result.key_id.hex() for result in results if result.key_id is not None),
+        elapsed_ms,
+        # The content of a signature is hashed once it has been parsed, which sets its key identifier.
+        sum(result.byte_range[1] + result.byte_range[3] for result in results if result.key_id is not None),
+        errors[0] if errors else None,
+    )
+
+def write_report(reports: Iterable[VerifyReport], stream, report_format: str = "jsonl") -> Counter:
+    """
+    Writes report rows to a text stream as they come, one line per file.
+
+    Args:
+        reports (Iterable[VerifyReport]): The report rows.
+        stream (TextIO): The stream to write to.
+        report_format (str, optional): `jsonl` for JSON lines or `csv` for CSV with a header row.
+            Defaults to "jsonl".
+
+    Returns:
+        Counter: The number of files by status.
+
+    Raises:
+        ValueError: If the report format is not supported.
+
+    """
+    if report_format not in REPORT_FORMATS:
+        msg = f"Unsupported report format: {report_format}"
+        raise ValueError(msg)
+
+    writer = None
+    if report_format == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(VerifyReport._fields)
+
+    statuses = Counter()
+    for report in reports:
+        statuses[report.status] += 1
+        if writer is not None:
+            writer.writerow(report._replace(signers=";".join(report.signers), elapsed_ms=f"{report.elapsed_ms:.1f}"))
+        else:
+            stream.write(json.dumps(report._replace(elapsed_ms=round(report.elapsed_ms, 1))._asdict()) + "\n")
+        stream.flush()
+    return statuses
+
+def run_bounded(executor: Executor, jobs: Iterable[tuple[Callable, ...]], max_pending: int) -> Iterator:
+    """
+    Runs jobs on an executor with at most a fixed number of them submitted at a time.
+
+    Args:
+        executor (Executor): The executor to run the jobs on.
+        jobs (Iterable[tuple[Callable, ...]]): The jobs as a function followed by its arguments.
+        max_pending (int): The maximum number of jobs submitted and not yet consumed.
+
+    Yields:
+        The result of each job, in completion order.
+
+    """
+    pending = set()
+    for function, *arguments in jobs:
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from (future.result() for future in done)
+        pending.add(executor.submit(function, *arguments))
+
+    for future in as_completed(pending):
+        yield future.result()
+
+def _init_worker(signing_key, verifying_keys: list[bytes] | str, cache_path: str | None):
+    _worker_state["rsa_key"] = RSA.import_key(signing_key) if isinstance(signing_key, bytes) else signing_key
+    if isinstance(verifying_keys, str):
+        _worker_state["public_keys"] = Keyring(verifying_keys)
+    else:
+        _worker_state["public_keys"] = [RSA.import_key(key_der) for key_der in verifying_keys]
+    _worker_state["cache"] = VerificationCache(cache_path) if cache_path is not None else None
+
+def _prepare_file(pdf_path: str, output_path: str | None, signature_size: int) -> _PreparedFile | BatchResult:
+    start = time.perf_counter()
+    try:
+        stat = _file_identity(pdf_path)
+        with PdfDocument(pdf_path) as document:
+            section, byte_range, pdf_hash, _ = prepare_document(document, signature_size)
+    except Exception as e:
+        logger.exception("Error while preparing PDF File: %s", pdf_path)
+        return BatchResult(pdf_path, ok=False, elapsed_ms=_elapsed_ms(start), error=str(e))
+    return _PreparedFile(pdf_path, output_path, stat, section, byte_range, pdf_hash.digest(), _elapsed_ms(start))
+
+def _write_prepared_file(prepared: _PreparedFile, signature: bytes) -> BatchResult:
+    start = time.perf_counter()
+    output_path = prepared.output_path
+    try:
+        if _file_identity(prepared.path) != prepared.stat:
+            msg = "PDF file changed while the batch was being signed."
+            raise ValueError(msg)  # noqa: TRY301
+        section = add_signature_to_pdf(prepared.section, prepared.byte_range, signature)
+        with PdfDocument(prepared.path, writable=output_path is None) as document:
+            if output_path is None:
+                document.append(section)
+            else:
+                document.copy_to(output_path, section)
+    except Exception as e:
+        logger.exception("Error while signing PDF File: %s", prepared.path)
+        return BatchResult(prepared.path, ok=False, elapsed_ms=prepared.elapsed_ms + _elapsed_ms(start), error=str(e))
+    logger.info("PDF File successfully signed: %s", output_path or prepared.path)
+    return BatchResult(prepared.path, ok=True, elapsed_ms=prepared.elapsed_ms + _elapsed_ms(start))
+
+def _plan_outputs(pdf_paths: Iterable[str | PdfInput], output_dir: str | None) -> Iterator[tuple]:
+    # Yields the path, output path and error of every file, so no file of the batch overwrites another.
+    claimed = set()
+    for pdf_path in pdf_paths:
+        path, name = pdf_path if isinstance(pdf_path, PdfInput) else (pdf_path, Path(pdf_path).name)
+        if output_dir is None:
+            yield path, None, None
+            continue
+        output_path = Path(output_dir) / name
+        target = output_path.resolve()
+        if target in claimed:
+            yield path, None, f"Output path already used by another file of the batch: {output_path}"
+            continue
+        claimed.add(target)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        in_place = output_path.exists() and output_path.samefile(path)
+        yield path, None if in_place else str(output_path), None
+
+def _reject_file(pdf_path: str, error: str) -> BatchResult:
+    logger.error("Not signing PDF File %s: %s", pdf_path, error)
+    return BatchResult(pdf_path, ok=False, elapsed_ms=0.0, error=error)
+
+def _file_identity(pdf_path: str) -> tuple:
+    stat = Path(pdf_path).stat()
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
@@ -0,0 +1,244 @@
+import logging
+from typing import NamedTuple
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Signature import pkcs1_15
+from Crypto.Util.asn1 import DerInteger, DerNull, DerObjectId, DerOctetString, DerSequence, DerSetOf
+
+logger = logging.getLogger("global_logger")
+
+SIGNED_DATA_OID = "1.2.840.113549.1.7.2"
+DATA_OID = "1.2.840.113549.1.7.1"
+SHA256_OID = "2.16.840.1.101.3.4.2.1"
+RSA_ENCRYPTION_OID = "1.2.840.113549.1.1.1"
+CONTENT_TYPE_OID = "1.2.840.113549.1.9.3"
+MESSAGE_DIGEST_OID = "1.2.840.113549.1.9.4"
+CMS_VERSION = 3
+CMS_RESERVED_SIZE = 1024
+SET_OF_TAG = 0x31
+CONTEXT_TAG_0 = 0xA0
+LONG_LENGTH_FLAG = 0x80
+SIGNED_SIGNER_INFO_FIELDS = 6
+
+class SignedData(NamedTuple):
+    """
+    SignedData holds the fields of a CMS SignedData signature needed to verify it.
+
+    Attributes:
+        key_id (bytes): The subject key identifier of the signer, the SHA-256 hash of its public key (see `key_id`).
+        digest (bytes): The message digest the signature covers.
+        signed_attributes (bytes): The DER encoding of the signed attributes, as signed.
+        signature (bytes): The RSA signature of the signed attributes.
+        unsigned_attributes (dict[str, list[bytes]]): The DER-encoded values of the unsigned attributes by OID.
+
+    """
+
+    key_id: bytes
+    digest: bytes
+    signed_attributes: bytes
+    signature: bytes
+    unsigned_attributes: dict
+
+def key_id(public_key: RSA.RsaKey) -> bytes:
+    """
+    Returns:
+        bytes: The SHA-256 hash of the DER-encoded SubjectPublicKeyInfo of the key, used as its subject key identifier.
+
+    """
+    return SHA256.new(public_key.public_key().export_key("DER")).digest()
+
+def placeholder_size(rsa_key: RSA.RsaKey, unsigned_attributes_size: int = 0) -> int:
+    """
+    Returns the size to reserve for a CMS signature made with a key.
+
+    Args:
+        rsa_key (RSA.RsaKey): The RSA key.
+        unsigned_attributes_size (int, optional): The size of the unsigned attributes that will be added. Defaults to 0.
+
+    Returns:
+        int: The number of bytes to reserve for the DER-encoded signature.
+
+    """
+    return rsa_key.size_in_bytes() + CMS_RESERVED_SIZE + unsigned_attributes_size
+
+def build_signed_attributes(digest: bytes) -> bytes:
+    """
+    Builds the signed attributes of a CMS signature over detached data.
+
+    Args:
+        digest (bytes): The SHA-256 digest of the signed data.
+
+    Returns:
+        bytes: The DER encoding of the attributes as a SET OF, which is what the RSA signature covers.
+
+    """
+    return DerSetOf([
+        _attribute(CONTENT_TYPE_OID, DerObjectId(DATA_OID).encode()),
+        _attribute(MESSAGE_DIGEST_OID, DerOctetString(digest).encode()),
+    ]).encode()
+
+def sign_attributes(rsa_key: RSA.RsaKey, signed_attributes: bytes) -> bytes:
+    """
+    Args:
+        rsa_key (RSA.RsaKey): The RSA key, or a key held by a key agent (see `AgentKey`).
+        signed_attributes (bytes): The signed attributes built by `build_signed_attributes`.
+
+    Returns:
+        bytes: The PKCS#1 v1.5 signature of the SHA-256 hash of the signed attributes.
+
+    """
+    return sign_digest(rsa_key, SHA256.new(signed_attributes).digest())
+
+def sign_digest(rsa_key: RSA.RsaKey, digest: bytes) -> bytes:
+    """
+    Signs a SHA-256 digest computed elsewhere, such as the digest returned by `prepare_pdf`.
+
+    Args:
+        rsa_key (RSA.RsaKey): The RSA key, or a key held by a key agent (see `AgentKey`).
+        digest (bytes): The SHA-256 digest.
+
+    Returns:
+        bytes: The PKCS#1 v1.5 signature of the digest.
+
+    Raises:
+        ValueError: If the digest is not a SHA-256 digest.
+
+    """
+    if len(digest) != SHA256.digest_size:
+        msg = "Expected a SHA-256 digest."
+        raise ValueError(msg)
+    if not isinstance(rsa_key, RSA.RsaKey):
+        return rsa_key.sign_digest(digest)
+    return pkcs1_15.new(rsa_key).sign(_Sha256Digest(digest))
+
+def build_signed_data(signer_key_id: bytes, signed_attributes: bytes, signature: bytes,
+                      unsigned_attributes: dict | None = None) -> bytes:
+    """
+    Builds a detached CMS SignedData structure (RFC 5652) without certificates.
+
+    The signer is identified by its subject key identifier, so the structure stays small and does not
+    depend on a certificate authority.
+
+    Args:
+        signer_key_id (bytes): The subject key identifier of the signer.
+        signed_attributes (bytes): The signed attributes built by `build_signed_attributes`.
+        signature (bytes): The RSA signature of the signed attributes.
+        unsigned_attributes (dict[str, bytes], optional): DER-encoded attribute values by OID. Defaults to None.
+
+    Returns:
+        bytes: The DER encoding of the ContentInfo holding the SignedData.
+
+    """
+    digest_algorithm = DerSequence([DerObjectId(SHA256_OID), DerNull()])
+    signer_info = [
+        DerInteger(CMS_VERSION),
+        DerOctetString(signer_key_id, implicit=0),
+        digest_algorithm,
+        bytes([CONTEXT_TAG_0]) + signed_attributes[1:],
+        DerSequence([DerObjectId(RSA_ENCRYPTION_OID), DerNull()]),
+        DerOctetString(signature),
+    ]
+    if unsigned_attributes:
+        signer_info.append(DerSetOf(
+            [_attribute(oid, value) for oid, value in unsigned_attributes.items()], implicit=1
+        ))
+
+    signed_data = DerSequence([
+        DerInteger(CMS_VERSION),
+        DerSetOf([digest_algorithm.encode()]),
+        DerSequence([DerObjectId(DATA_OID)]),
+        DerSetOf([DerSequence(signer_info).encode()]),
+    ])
+    return DerSequence([DerObjectId(SIGNED_DATA_OID), DerSequence(signed_data, explicit=0)]).encode()
+
+def parse_signed_data(contents: bytes) -> SignedData:
+    """
+    Parses a CMS SignedData structure built by `build_signed_data`.
+
+    Trailing zero padding left over from the signature placeholder is ignored.
+
+    Args:
+        contents (bytes): The DER-encoded ContentInfo, possibly followed by zero padding.
+
+    Returns:
+        SignedData: The fields of the signature.
+
+    Raises:
+        ValueError: If the structure is malformed or uses other algorithms.
+
+    """
+    try:
+        content_info = DerSequence().decode(contents[:_encoded_length(contents)])
+        if DerObjectId().decode(content_info[0]).value != SIGNED_DATA_OID:
+            msg = "CMS content is not SignedData."
+            raise ValueError(msg)  # noqa: TRY301
+
+        signed_data = DerSequence(explicit=0).decode(content_info[1])
+        signer_infos = DerSetOf().decode(signed_data[-1])
+        if len(signer_infos) != 1:
+            msg = "CMS SignedData must have exactly one signer."
+            raise ValueError(msg)  # noqa: TRY301
+
+        signer_info = DerSequence().decode(signer_infos[0])
+        signer_key_id = DerOctetString(implicit=0).decode(signer_info[1]).payload
+        digest_algorithm = DerSequence().decode(signer_info[2])
+        signature_algorithm = DerSequence().decode(signer_info[4])
+        if (
+            DerObjectId().decode(digest_algorithm[0]).value != SHA256_OID
+            or DerObjectId().decode(signature_algorithm[0]).value != RSA_ENCRYPTION_OID
+        ):
+            msg = "Unsupported CMS signature algorithm."
+            raise ValueError(msg)  # noqa: TRY301
+
+        signed_attributes = bytes([SET_OF_TAG]) + signer_info[3][1:]
+        attributes = _parse_attributes(signed_attributes)
+        digest = DerOctetString().decode(attributes[MESSAGE_DIGEST_OID][0]).payload
+        signature = DerOctetString().decode(signer_info[5]).payload
+        unsigned_attributes = (
+            _parse_attributes(bytes([SET_OF_TAG]) + signer_info[SIGNED_SIGNER_INFO_FIELDS][1:])
+            if len(signer_info) > SIGNED_SIGNER_INFO_FIELDS
+            else {}
+        )
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        msg = f"Malformed CMS signature: {e}"
+        raise ValueError(msg) from e
+
+    return SignedData(signer_key_id, digest, signed_attributes, signature, unsigned_attributes)
+
+def verify_signed_data(public_key: RSA.RsaKey, signed_data: SignedData) -> bool:
+    """
+    Returns:
+        bool: True if the public key made the signature of the signed attributes.
+
+    """
+    try:
+        pkcs1_15.new(public_key).verify(SHA256.new(signed_data.signed_attributes), signed_data.signature)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+class _Sha256Digest(NamedTuple):
+    # Stands in for a SHA-256 hash object whose digest was computed elsewhere.
+    value: bytes
+    oid: str = SHA256_OID
+
+    def digest(self) -> bytes:
+        return self.value
+
+def _attribute(oid: str, value: bytes) -> bytes:
+    return DerSequence([DerObjectId(oid), DerSetOf([value])]).encode()
+
+def _parse_attributes(encoded: bytes) -> dict:
+    attributes = {}
+    for attribute in DerSetOf().decode(encoded):
+        attribute_type, values = DerSequence().decode(attribute)
+        attributes[DerObjectId().decode(attribute_type).value] = list(DerSetOf().decode(values))
+    return attributes
+
+def _encoded_length(data: bytes) -> int:
+    length = data[1]
+    if not length & LONG_LENGTH_FLAG:
+        return 2 + length
+    size = length & ~LONG_LENGTH_FLAG
+    return 2 + size + int.from_bytes(data[2:2 + size], "big")
@@ -1,5 +1,4 @@
 import logging
-import time
 from pathlib import Path
 
 from Crypto.Cipher import AES
@@ -43,6 +42,9 @@ def decrypt_rsa_key(pin: str, drive_manager, progress_signal=None) -> RSA.RsaKey
     """
     Decrypts an RSA private key using a provided PIN and drive manager.
 
+    The encrypted key is taken from the key files the drive manager read ahead of time, if they have not
+    changed since, so only the decryption and the import of the key are left to do once the PIN is entered.
+
     Args:
         pin (str): The PIN used to decrypt the RSA key.
         drive_manager: An object that manages the drive where the encrypted key is stored.
@@ -61,16 +63,14 @@ def decrypt_rsa_key(pin: str, drive_manager, progress_signal=None) -> RSA.RsaKey
         if progress_signal:
             progress_signal.emit("Initializing RSA key decryption...", 10)
         logger.info("Decrypting RSA key")
-        time.sleep(1)
 
-        with Path.open(private_key_path, "rb") as f:
-            encrypted_key = f.read()
+        drive_keys = drive_manager.key_cache.load(drive_manager.selected_drive)
+        encrypted_key = drive_keys.encrypted_key
 
         logger.info("Encrypted RSA key loaded from: %s", private_key_path)
 
         if progress_signal:
             progress_signal.emit("Checking if PIN is correct...", 30)
-        time.sleep(0.5)
 
         pin_hash = SHA256.new(pin.encode()).digest()
 
@@ -80,7 +80,6 @@ def decrypt_rsa_key(pin: str, drive_manager, progress_signal=None) -> RSA.RsaKey
 
         if progress_signal:
             progress_signal.emit("Decrypting the key...", 55)
-        time.sleep(0.5)
 
         cipher = AES.new(pin_hash, AES.MODE_EAX, nonce=nonce)
         decrypted_key = cipher.decrypt(ciphertext)
@@ -90,6 +89,8 @@ def decrypt_rsa_key(pin: str, drive_manager, progress_signal=None) -> RSA.RsaKey
             progress_signal.emit("Finalizing process...", 75)
 
         rsa_key = RSA.import_key(decrypted_key)
+        if drive_keys.public_key is not None and drive_keys.public_key.n != rsa_key.n:
+            logger.warning("The private key on %s does not match its public key file", drive_manager.selected_drive)
 
         if progress_signal:
             progress_signal.emit("RSA key successfully decrypted!", 99)
@@ -0,0 +1,109 @@
+import errno
+import logging
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger("global_logger")
+
+# Linux ioctl request number of FICLONE, exposed as fcntl.FICLONE since Python 3.12.
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+UNSUPPORTED_COPY_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+def clone_file(source_file, destination_file, size: int) -> str:
+    """
+    Copies the first bytes of a file into another file with the cheapest method the system supports.
+
+    The methods are tried in order: a `FICLONE` reflink, which shares the data blocks on copy-on-write
+    filesystems such as btrfs or XFS; `os.copy_file_range`, which copies inside the kernel and lets
+    the filesystem share blocks as well; `os.sendfile`; and finally a buffered copy. A method that the
+    filesystem rejects hands over to the next one, continuing from the bytes already copied.
+
+    Args:
+        source_file (BinaryIO): The source file, opened for reading.
+        destination_file (BinaryIO): The destination file, opened for writing and empty.
+        size (int): The number of bytes to copy from the start of the source file.
+
+    Returns:
+        str: The name of the method that completed the copy.
+
+    """
+    source, destination = source_file.fileno(), destination_file.fileno()
+    destination_file.flush()
+
+    if _reflink(source, destination, size):
+        return "reflink"
+
+    copied = 0
+    for method, copy in (("copy_file_range", _copy_file_range), ("sendfile", _sendfile)):
+        copied = copy(source, destination, copied, size)
+        if copied == size:
+            return method
+
+    source_file.seek(copied)
+    destination_file.seek(copied)
+    remaining = size - copied
+    while remaining:
+        chunk = source_file.read(min(remaining, shutil.COPY_BUFSIZE))
+        if not chunk:
+            break
+        destination_file.write(chunk)
+        remaining -= len(chunk)
+    return "read/write"
+
+def _reflink(source: int, destination: int, size: int) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+
+    try:
+        fcntl.ioctl(destination, getattr(fcntl, "FICLONE", FICLONE), source)
+    except OSError as error:
+        logger.debug("Reflink not available: %s", error)
+        return False
+
+    # The clone covers the whole source file, which may have grown since it was mapped.
+    os.ftruncate(destination, size)
+    return True
+
+def _copy_file_range(source: int, destination: int, offset: int, size: int) -> int:
+    if not hasattr(os, "copy_file_range"):
+        return offset
+
+    while offset < size:
+        try:
+            copied = os.copy_file_range(
+                source, destination, min(COPY_CHUNK_SIZE, size - offset), offset, offset
+            )
+        except OSError as error:
+            if error.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+            logger.debug("copy_file_range not available: %s", error)
+            break
+        if not copied:
+            break
+        offset += copied
+    return offset
+
+def _sendfile(source: int, destination: int, offset: int, size: int) -> int:
+    if not hasattr(os, "sendfile"):
+        return offset
+
+    os.lseek(destination, offset, os.SEEK_SET)
+    while offset < size:
+        try:
+            copied = os.sendfile(destination, source, offset, min(COPY_CHUNK_SIZE, size - offset))
+        except OSError as error:
+            if error.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+            logger.debug("sendfile not available: %s", error)
+            break
+        if not copied:
+            break
+        offset += copied
+    return offset
@@ -0,0 +1,437 @@
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable
+from concurrent.futures import wait
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from Crypto.PublicKey import RSA
+from utils.batch_utils import JOBS_PER_WORKER, create_worker_pool, sign_in_worker, verify_in_worker
+from utils.keyring import Keyring
+from utils.manifest import MANIFEST_CHUNK_SIZE
+
+logger = logging.getLogger("global_logger")
+
+MAX_UPLOAD_SIZE = 1024 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+REQUEST_TIMEOUT = 60
+RETRY_AFTER = 1
+DISCARD_LIMIT = 64 * 1024
+SERVICE_TOKEN_ENV = "SIGNING_SERVICE_TOKEN"  # noqa: S105
+
+class ServiceMetrics:
+    """
+    ServiceMetrics counts the requests of a signing server and tracks the jobs it has admitted.
+
+    Methods:
+        __init__(capacity: int):
+        admit() -> bool:
+            Takes a job slot if one is free, or counts a rejection.
+        release():
+            Frees a job slot.
+        record(endpoint: str, status: int, elapsed: float, received: int = 0):
+            Counts a finished request.
+        snapshot() -> dict:
+            Returns the current values as a dictionary.
+        render() -> str:
+            Returns the current values in the Prometheus text format.
+
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity (int): The number of jobs that may be admitted at a time.
+
+        """
+        self.capacity = capacity
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._seconds = Counter()
+        self._rejected = 0
+        self._received = 0
+
+    def admit(self) -> bool:
+        """
+        Returns:
+            bool: True if a job slot was taken, False if all of them are in use.
+
+        """
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self._rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        """
+        Frees a job slot taken by `admit`.
+        """
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, endpoint: str, status: int, elapsed: float, received: int = 0):
+        """
+        Args:
+            endpoint (str): The path of the request.
+            status (int): The HTTP status of the response.
+            elapsed (float): The time spent on the request, in seconds.
+            received (int, optional): The number of bytes uploaded.
+
+        """
+        with self._lock:
+            self._requests[endpoint, status] += 1
+            self._seconds[endpoint] += elapsed
+            self._received += received
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: The number of jobs in flight, the capacity, and the request counters.
+
+        """
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "capacity": self.capacity,
+                "rejected": self._rejected,
+                "bytes_received": self._received,
+                "requests": {f"{endpoint} {status}": count for (endpoint, status), count in self._requests.items()},
+            }
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+
+        """
+        with self._lock:
+            lines = [
+                "# TYPE signing_jobs_in_flight gauge",
+                f"signing_jobs_in_flight {self.in_flight}",
+                "# TYPE signing_jobs_capacity gauge",
+                f"signing_jobs_capacity {self.capacity}",
+                "# TYPE signing_requests_rejected_total counter",
+                f"signing_requests_rejected_total {self._rejected}",
+                "# TYPE signing_bytes_received_total counter",
+                f"signing_bytes_received_total {self._received}",
+                "# TYPE signing_requests_total counter",
+            ]
+            lines += [
+                f'signing_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+                for (endpoint, status), count in sorted(self._requests.items())
+            ]
+            lines.append("# TYPE signing_request_seconds_total counter")
+            lines += [
+                f'signing_request_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}'
+                for endpoint, seconds in sorted(self._seconds.items())
+            ]
+        return "\n".join(lines) + "\n"
+
+class SigningServer(ThreadingHTTPServer):
+    """
+    SigningServer signs and verifies PDF files uploaded over HTTP.
+
+    Uploads are streamed to a temporary file in fixed-size chunks, so memory use does not depend on the
+    size of the files, and the file is then signed or verified by a pool of worker processes started
+    with the server. At most `workers * JOBS_PER_WORKER` uploads are accepted at a time; further
+    uploads are answered at once with 429 Too Many Requests, before their body is read.
+
+    Endpoints:
+        POST /sign[?manifest=1]: Returns the signed PDF file.
+        POST /verify: Returns the verification report of the PDF file as JSON.
+        GET /health: Returns the state of the server as JSON, with status 503 once the worker pool broke.
+        GET /metrics: Returns request counters in the Prometheus text format.
+
+    Responses to uploads carry the X-Queue-Depth and X-Queue-Capacity headers.
+
+    Anyone who can reach `/sign` gets documents signed with the key, so a server given a `token` answers
+    every endpoint but `/health` with 401 Unauthorized unless the request carries it as
+    `Authorization: Bearer <token>`, before reading any upload. A server listening on an address other
+    than loopback must be given a token.
+
+    Example:
+        with SigningServer(("127.0.0.1", 0), rsa_key) as server:
+            threading.Thread(target=server.serve_forever).start()
+            connection = http.client.HTTPConnection(*server.server_address)
+            connection.request("POST", "/sign", body=open("invoice.pdf", "rb"))
+            signed_pdf = connection.getresponse().read()
+            server.shutdown()
+
+    Attributes:
+        workers (int): The number of worker processes.
+        max_upload (int): The largest accepted upload, in bytes.
+        metrics (ServiceMetrics): The request counters.
+        healthy (bool): False once the worker pool has broken.
+
+    Methods:
+        __init__(address, rsa_key, public_keys=(), workers=None, max_upload=MAX_UPLOAD_SIZE, spool_dir=None, token=None):
+        run_job(function, *args):
+            Runs a job on the worker pool and waits for its result.
+        server_close():
+            Closes the socket and stops the worker processes.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], rsa_key: RSA.RsaKey,  # noqa: PLR0913, PLR0917
+                 public_keys: Iterable[RSA.RsaKey] | Keyring = (), workers: int | None = None,
+                 max_upload: int = MAX_UPLOAD_SIZE, spool_dir: str | None = None, token: str | None = None):
+        """
+        Starts the worker processes and binds the server socket.
+
+        Args:
+            address (tuple[str, int]): The host and port to listen on. Port 0 picks a free port.
+            rsa_key (RSA.RsaKey): The RSA key to sign with.
+            public_keys (Iterable[RSA.RsaKey] | Keyring, optional): The public keys of all accepted signers,
+                or a keyring. Defaults to the public key of `rsa_key`.
+            workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+            max_upload (int, optional): The largest accepted upload, in bytes.
+            spool_dir (str, optional): The directory uploads are written to. Defaults to the system
+                temporary directory.
+            token (str, optional): The bearer token requests must carry. Defaults to None, which is only
+                allowed on a loopback address.
+
+        Raises:
+            ValueError: If the server would listen on an address other than loopback without a token.
+
+        """
+        if not token and not _is_loopback(address[0]):
+            msg = f"Listening on {address[0] or 'all interfaces'} requires a token; set {SERVICE_TOKEN_ENV}."
+            raise ValueError(msg)
+        self.token = token
+        self.workers = workers or os.cpu_count() or 1
+        self.max_upload = max_upload
+        self.metrics = ServiceMetrics(self.workers * JOBS_PER_WORKER)
+        self.healthy = True
+        self.spool_dir = spool_dir
+        if not isinstance(public_keys, Keyring):
+            public_keys = list(public_keys) or [rsa_key.public_key()]
+        self._executor = create_worker_pool(self.workers, rsa_key, public_keys)
+        # Start every worker now, before the listening socket exists, instead of on the first requests.
+        wait([self._executor.submit(os.getpid) for _ in range(self.workers)])
+        try:
+            super().__init__(address, ServiceRequestHandler)
+        except OSError:
+            self._executor.shutdown()
+            raise
+        logger.info("Signing service listening on %s:%d with %d workers", *self.server_address[:2], self.workers)
+
+    def run_job(self, function, *args):
+        """
+        Runs a job on the worker pool and waits for its result.
+
+        Raises:
+            BrokenProcessPool: If a worker process died. The server is marked unhealthy.
+
+        """
+        try:
+            return self._executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            self.healthy = False
+            logger.exception("Signing service worker pool broke")
+            raise
+
+    def server_close(self):
+        """
+        Closes the socket and stops the worker processes.
+        """
+        super().server_close()
+        self._executor.shutdown()
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    ServiceRequestHandler serves the endpoints of a `SigningServer`, one connection per thread.
+    """
+
+    server: SigningServer
+    _admitted = False
+    protocol_version = "HTTP/1.1"
+    server_version = "ElectronicSignature/1.0"
+    timeout = REQUEST_TIMEOUT
+
+    def do_GET(self):
+        """
+        Serves the health and metrics endpoints.
+        """
+        start = time.perf_counter()
+        endpoint = urlsplit(self.path).path
+        if endpoint != "/health" and not self._authorized():
+            status = HTTPStatus.UNAUTHORIZED
+            self._send_json(status, {"error": "Unauthorized."}, {"WWW-Authenticate": "Bearer"})
+        elif endpoint == "/health":
+            snapshot = self.server.metrics.snapshot()
+            status = HTTPStatus.OK if self.server.healthy else HTTPStatus.SERVICE_UNAVAILABLE
+            health = {"status": "ok" if self.server.healthy else "broken", "workers": self.server.workers}
+            self._send_json(status, health | {key: snapshot[key] for key in ("in_flight", "capacity")})
+        elif endpoint == "/metrics":
+            self._send_body(HTTPStatus.OK, self.server.metrics.render().encode(), "text/plain; version=0.0.4")
+            status = HTTPStatus.OK
+        else:
+            status = HTTPStatus.NOT_FOUND
+            self._send_json(status, {"error": "Not found."})
+        self.server.metrics.record(endpoint, status, time.perf_counter() - start)
+
+    def do_POST(self):
+        """
+        Serves the sign and verify endpoints.
+        """
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        status, received = self._handle_upload(url.path, parse_qs(url.query))
+        if status is not None:
+            self.server.metrics.record(url.path, status, time.perf_counter() - start, received)
+
+    def log_message(self, format, *args):  # noqa: A002
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _handle_upload(self, endpoint: str, query: dict) -> tuple[int | None, int]:
+        status = self._admit(endpoint)
+        if status is not None:
+            return status, 0
+
+        length = int(self.headers["Content-Length"])
+        upload = None
+        try:
+            upload = self._receive(length)
+            if upload is None:
+                return None, 0
+            status = self._sign(upload, query) if endpoint == "/sign" else self._verify(upload)
+        except BrokenProcessPool:
+            status = self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Worker pool is broken."})
+        finally:
+            self.server.metrics.release()
+            if upload is not None:
+                Path(upload).unlink(missing_ok=True)
+        return status, length
+
+    def handle_expect_100(self) -> bool:
+        """
+        Applies admission control before the client sends the body of an `Expect: 100-continue` request.
+        """
+        start = time.perf_counter()
+        endpoint = urlsplit(self.path).path
+        status = self._admit(endpoint)
+        if status is not None:
+            self.server.metrics.record(endpoint, status, time.perf_counter() - start)
+            return False
+        self._admitted = True
+        return super().handle_expect_100()
+
+    def _admit(self, endpoint: str) -> int | None:
+        if self._admitted:
+            self._admitted = False
+            return None
+
+        length = self.headers.get("Content-Length", "")
+        if not self._authorized():
+            rejection = (HTTPStatus.UNAUTHORIZED, "Unauthorized.", {"WWW-Authenticate": "Bearer"})
+        elif endpoint not in {"/sign", "/verify"}:
+            rejection = (HTTPStatus.NOT_FOUND, "Not found.")
+        elif not length.isdigit():
+            rejection = (HTTPStatus.LENGTH_REQUIRED, "Content-Length is required.")
+        elif int(length) > self.server.max_upload:
+            rejection = (HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Uploads are limited to {self.server.max_upload} bytes.")
+        elif not self.server.metrics.admit():
+            rejection = (HTTPStatus.TOO_MANY_REQUESTS, "Too many requests.", {"Retry-After": str(RETRY_AFTER)})
+        else:
+            return None
+        return self._reject(*rejection)
+
+    def _authorized(self) -> bool:
+        if not self.server.token:
+            return True
+        scheme, _, credentials = self.headers.get("Authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(credentials.strip().encode(), self.server.token.encode())
+
+    def _reject(self, status: int, error: str, headers: dict | None = None) -> int:
+        # The body of a rejected request is not read. A small one is discarded so that the connection can be
+        # reused; otherwise the connection is closed, once the client got the response.
+        length = self.headers.get("Content-Length", "")
+        sent_body = self.headers.get("Expect", "").lower() != "100-continue"
+        discard = sent_body and length.isdigit() and int(length) <= DISCARD_LIMIT
+        self.close_connection = not discard
+        self._send_json(status, {"error": error}, headers)
+        if discard:
+            self.rfile.read(int(length))
+        return status
+
+    def _receive(self, length: int) -> str | None:
+        buffer = bytearray(min(length, UPLOAD_CHUNK_SIZE))
+        view = memoryview(buffer)
+        with tempfile.NamedTemporaryFile(dir=self.server.spool_dir, suffix=".pdf", delete=False) as upload:
+            remaining = length
+            while remaining:
+                received = self.rfile.readinto(view[:min(remaining, len(buffer))])
+                if not received:
+                    logger.warning("Upload from %s ended early", self.address_string())
+                    self.close_connection = True
+                    upload.close()
+                    Path(upload.name).unlink()
+                    return None
+                upload.write(view[:received])
+                remaining -= received
+        return upload.name
+
+    def _sign(self, upload: str, query: dict) -> int:
+        chunk_size = MANIFEST_CHUNK_SIZE if query.get("manifest", ["0"])[0] not in {"0", ""} else None
+        result = self.server.run_job(sign_in_worker, upload, None, chunk_size)
+        if not result.ok:
+            return self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": result.error})
+
+        with Path(upload).open("rb") as signed_file:
+            size = os.fstat(signed_file.fileno()).st_size
+            self.send_response(HTTPStatus.OK)
+            self._send_headers({"Content-Type": "application/pdf", "Content-Length": str(size)})
+            self.connection.sendfile(signed_file)
+        return HTTPStatus.OK
+
+    def _verify(self, upload: str) -> int:
+        report = self.server.run_job(verify_in_worker, upload)
+        if report.status == "error":
+            return self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": report.error})
+        row = report._replace(elapsed_ms=round(report.elapsed_ms, 1))._asdict()
+        del row["path"]
+        return self._send_json(HTTPStatus.OK, row)
+
+    def _send_json(self, status: int, body: dict, headers: dict | None = None) -> int:
+        return self._send_body(status, json.dumps(body).encode(), "application/json", headers)
+
+    def _send_body(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> int:
+        self.send_response(status)
+        self._send_headers({"Content-Type": content_type, "Content-Length": str(len(body))} | (headers or {}))
+        self.wfile.write(body)
+        return status
+
+    def _send_headers(self, headers: dict):
+        metrics = self.server.metrics
+        headers |= {"X-Queue-Depth": str(metrics.in_flight), "X-Queue-Capacity": str(metrics.capacity)}
+        if self.close_connection:
+            headers["Connection"] = "close"
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+def _is_loopback(host: str) -> bool:
+    # A host name counts as loopback only if every address it resolves to is one; "" listens everywhere.
+    if not host:
+        return False
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return all(ipaddress.ip_address(address.split("%")[0]).is_loopback for address in addresses)
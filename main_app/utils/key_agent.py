@@ -0,0 +1,492 @@
+import contextlib
+import logging
+import os
+import selectors
+import socket
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from Crypto.PublicKey import RSA
+from utils.cms import sign_digest
+from utils.crypto_utils import decrypt_rsa_key
+
+logger = logging.getLogger("global_logger")
+
+AGENT_SOCKET_ENV = "SIGNING_AGENT_SOCK"
+IDLE_TIMEOUT = 15 * 60
+MAX_REQUESTS_PER_CONNECTION = 10000
+MAX_FRAME_SIZE = 64 * 1024
+PIPELINE_DEPTH = 64
+RECEIVE_SIZE = 64 * 1024
+DIGEST_SIZE = 32
+
+# Every frame is a 4-byte big-endian length, then a message type byte and its payload.
+FRAME_HEADER = struct.Struct(">IB")
+AGENT_REQUEST_PUBLIC_KEY = 1
+AGENT_REQUEST_SIGN = 2
+AGENT_REQUEST_LOCK = 3
+AGENT_REQUEST_UNLOCK = 4
+AGENT_SUCCESS = 5
+AGENT_FAILURE = 6
+AGENT_PUBLIC_KEY = 7
+AGENT_SIGNATURE = 8
+PEER_CREDENTIALS = struct.Struct("3i")
+
+class _Connection:
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.received = bytearray()
+        self.pending = bytearray()
+        self.requests = 0
+        self.closing = False
+
+def default_socket_path() -> str:
+    """
+    Returns:
+        str: The socket path from the SIGNING_AGENT_SOCK environment variable, or a per-user path in the
+        runtime directory.
+
+    """
+    if os.environ.get(AGENT_SOCKET_ENV):
+        return os.environ[AGENT_SOCKET_ENV]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return str(Path(runtime_dir) / f"signing-agent-{os.getuid()}.sock")
+
+class KeyAgent:
+    """
+    KeyAgent holds an unlocked private key and signs digests for local processes over a Unix domain socket.
+
+    The socket is created with mode 0600, and on Linux connections from other users are refused. A single
+    thread serves every connection. Clients may send many requests before reading the responses, which
+    come back in order. A connection is closed after `max_requests` requests, so a client cannot hold
+    the agent forever.
+
+    The key is dropped after `idle_timeout` seconds without a signature request, or on a lock request.
+    While locked, the agent still answers public key requests, and it unlocks again with the PIN if it
+    was given the drive manager holding the encrypted key.
+
+    Attributes:
+        socket_path (str): The path of the listening socket.
+        idle_timeout (float | None): The seconds without signature requests after which the key is dropped.
+        max_requests (int): The number of requests served on a connection before it is closed.
+
+    Methods:
+        __init__(socket_path, rsa_key, drive_manager=None, idle_timeout=IDLE_TIMEOUT, max_requests=MAX_REQUESTS_PER_CONNECTION):
+        run():
+            Serves requests until `stop` is called.
+        lock():
+            Drops the private key.
+        locked() -> bool:
+            Returns whether the private key has been dropped.
+        stop():
+            Asks `run` to return. Safe to call from any thread or signal handler.
+
+    """
+
+    def __init__(self, socket_path: str, rsa_key: RSA.RsaKey, drive_manager=None,
+                 idle_timeout: float | None = IDLE_TIMEOUT, max_requests: int = MAX_REQUESTS_PER_CONNECTION):
+        """
+        Initializes the agent. The socket is not created until `run` is called.
+
+        Args:
+            socket_path (str): The path of the listening socket.
+            rsa_key (RSA.RsaKey): The unlocked RSA private key.
+            drive_manager (DriveManager, optional): The drive manager holding the encrypted key, to unlock
+                the agent again with the PIN. Defaults to None, which makes a lock final.
+            idle_timeout (float | None, optional): The seconds without signature requests after which the key
+                is dropped. None keeps the key until the agent is locked or stopped.
+            max_requests (int, optional): The number of requests served on a connection before it is closed.
+
+        """
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self._drive_manager = drive_manager
+        self._public_key = rsa_key.public_key()
+        self._rsa_key = None
+        self._last_use = 0.0
+        self._unlock(rsa_key)
+        self._stopping = threading.Event()
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._wake_read.settimeout(0)
+        self._wake_write.settimeout(0)
+
+    def run(self):
+        """
+        Serves requests until `stop` is called, then removes the socket.
+        """
+        listener = self._listen()
+        selector = selectors.DefaultSelector()
+        selector.register(listener, selectors.EVENT_READ)
+        selector.register(self._wake_read, selectors.EVENT_READ)
+        logger.info("Key agent listening on %s", self.socket_path)
+        try:
+            while not self._stopping.is_set():
+                for key, events in selector.select(self._idle_remaining()):
+                    if key.fileobj is listener:
+                        self._accept(listener, selector)
+                    elif key.fileobj is self._wake_read:
+                        with contextlib.suppress(BlockingIOError):
+                            self._wake_read.recv(RECEIVE_SIZE)
+                    else:
+                        self._service(key.data, events, selector)
+                if self._idle_remaining() == 0:
+                    logger.info("Key agent locked after %s s without use", self.idle_timeout)
+                    self.lock()
+        finally:
+            for key in list(selector.get_map().values()):
+                if isinstance(key.data, _Connection):
+                    key.data.sock.close()
+            selector.close()
+            listener.close()
+            Path(self.socket_path).unlink(missing_ok=True)
+            self.lock()
+        logger.info("Key agent stopped")
+
+    def lock(self):
+        """
+        Drops the private key. Signature requests fail until the agent is unlocked again.
+        """
+        self._rsa_key = None
+
+    def locked(self) -> bool:
+        """
+        Returns:
+            bool: True if the agent holds no private key.
+
+        """
+        return self._rsa_key is None
+
+    def stop(self):
+        """
+        Asks `run` to return. Safe to call from any thread or signal handler.
+        """
+        self._stopping.set()
+        with contextlib.suppress(BlockingIOError):
+            self._wake_write.send(b"\0")
+
+    def _listen(self) -> socket.socket:
+        path = Path(self.socket_path)
+        if path.is_socket():
+            # A socket nobody listens on is left over from an agent that did not exit cleanly.
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                if probe.connect_ex(self.socket_path) == 0:
+                    msg = f"Another key agent is listening on {self.socket_path}."
+                    raise OSError(msg)
+            path.unlink()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_umask = os.umask(0o177)
+        try:
+            listener.bind(self.socket_path)
+        finally:
+            os.umask(previous_umask)
+        listener.listen()
+        listener.settimeout(0)
+        return listener
+
+    def _accept(self, listener: socket.socket, selector: selectors.BaseSelector):
+        with contextlib.suppress(BlockingIOError):
+            sock, _ = listener.accept()
+            if hasattr(socket, "SO_PEERCRED"):
+                _, uid, _ = PEER_CREDENTIALS.unpack(
+                    sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, PEER_CREDENTIALS.size)
+                )
+                if uid not in {os.getuid(), 0}:
+                    logger.warning("Key agent refused a connection from user %d", uid)
+                    sock.close()
+                    return
+            sock.settimeout(0)
+            selector.register(sock, selectors.EVENT_READ, _Connection(sock))
+
+    def _service(self, connection: _Connection, events: int, selector: selectors.BaseSelector):
+        if events & selectors.EVENT_READ and not connection.closing:
+            try:
+                data = connection.sock.recv(RECEIVE_SIZE)
+            except (BlockingIOError, InterruptedError):
+                data = None
+            except OSError:
+                data = b""
+            if data == b"":
+                self._close(connection, selector)
+                return
+            if data:
+                connection.received += data
+                self._answer(connection)
+
+        if connection.pending:
+            try:
+                sent = connection.sock.send(connection.pending)
+            except BlockingIOError:
+                sent = 0
+            except OSError:
+                self._close(connection, selector)
+                return
+            del connection.pending[:sent]
+
+        if connection.closing and not connection.pending:
+            self._close(connection, selector)
+        else:
+            wanted = selectors.EVENT_READ | (selectors.EVENT_WRITE if connection.pending else 0)
+            selector.modify(connection.sock, wanted, connection)
+
+    def _answer(self, connection: _Connection):
+        received = connection.received
+        offset = 0
+        while not connection.closing and len(received) - offset >= FRAME_HEADER.size:
+            length, message_type = FRAME_HEADER.unpack_from(received, offset)
+            if not 1 <= length <= MAX_FRAME_SIZE:
+                logger.warning("Key agent closed a connection that sent a malformed frame")
+                connection.closing = True
+                break
+            if len(received) - offset < FRAME_HEADER.size - 1 + length:
+                break
+            payload = bytes(received[offset + FRAME_HEADER.size:offset + FRAME_HEADER.size - 1 + length])
+            offset += FRAME_HEADER.size - 1 + length
+            connection.pending += encode_frame(*self._handle(message_type, payload))
+            connection.requests += 1
+            if connection.requests >= self.max_requests:
+                # Requests already pipelined after the last one are dropped; the client sends them again.
+                connection.closing = True
+        del received[:offset]
+
+    def _handle(self, message_type: int, payload: bytes) -> tuple[int, bytes]:
+        handler = {
+            AGENT_REQUEST_PUBLIC_KEY: self._send_public_key,
+            AGENT_REQUEST_SIGN: self._sign_digest,
+            AGENT_REQUEST_LOCK: self._lock_on_request,
+            AGENT_REQUEST_UNLOCK: self._unlock_with_pin,
+        }.get(message_type)
+        if handler is None:
+            return AGENT_FAILURE, b"Unknown request."
+        return handler(payload)
+
+    def _send_public_key(self, _: bytes) -> tuple[int, bytes]:
+        return AGENT_PUBLIC_KEY, self._public_key.export_key("DER")
+
+    def _sign_digest(self, digest: bytes) -> tuple[int, bytes]:
+        if self._rsa_key is None:
+            return AGENT_FAILURE, b"Key agent is locked."
+        if len(digest) != DIGEST_SIZE:
+            return AGENT_FAILURE, b"Expected a SHA-256 digest."
+        self._last_use = time.monotonic()
+        return AGENT_SIGNATURE, sign_digest(self._rsa_key, digest)
+
+    def _lock_on_request(self, _: bytes) -> tuple[int, bytes]:
+        self.lock()
+        logger.info("Key agent locked on request")
+        return AGENT_SUCCESS, b""
+
+    def _unlock_with_pin(self, pin: bytes) -> tuple[int, bytes]:
+        if self._drive_manager is None:
+            return AGENT_FAILURE, b"Key agent cannot be unlocked without its drive."
+        try:
+            rsa_key = decrypt_rsa_key(pin.decode("utf-8", "replace"), self._drive_manager)
+        except Exception as e:  # noqa: BLE001 - decrypt_rsa_key logs the error, the agent keeps serving
+            return AGENT_FAILURE, str(e).encode()
+        if rsa_key.public_key() != self._public_key:
+            return AGENT_FAILURE, b"The drive holds a different key."
+        self._unlock(rsa_key)
+        logger.info("Key agent unlocked")
+        return AGENT_SUCCESS, b""
+
+    def _unlock(self, rsa_key: RSA.RsaKey):
+        self._rsa_key = rsa_key
+        self._last_use = time.monotonic()
+
+    def _idle_remaining(self) -> float | None:
+        if self.idle_timeout is None or self._rsa_key is None:
+            return None
+        return max(self._last_use + self.idle_timeout - time.monotonic(), 0)
+
+    @staticmethod
+    def _close(connection: _Connection, selector: selectors.BaseSelector):
+        selector.unregister(connection.sock)
+        connection.sock.close()
+
+class AgentKey:
+    """
+    AgentKey is a private key held by a `KeyAgent`, usable wherever the signing functions take an RSA key.
+
+    Signature requests are sent over one connection, opened on first use and opened again when the agent
+    closes it. An AgentKey can be passed to worker processes, forked or not; each of them connects on its own.
+
+    Attributes:
+        socket_path (str): The path of the agent socket.
+
+    Methods:
+        __init__(socket_path: str | None = None):
+        public_key() -> RSA.RsaKey:
+            Returns the public key of the agent, fetched once.
+        size_in_bytes() -> int:
+            Returns the size of the key modulus, in bytes.
+        sign_digest(digest: bytes) -> bytes:
+            Returns the PKCS#1 v1.5 signature of a SHA-256 digest.
+        sign_digests(digests: list[bytes]) -> list[bytes]:
+            Signs many digests, pipelining the requests.
+        lock():
+            Asks the agent to drop the private key.
+        unlock(pin: str):
+            Asks the agent to decrypt the private key again.
+        close():
+            Closes the connection.
+
+    """
+
+    def __init__(self, socket_path: str | None = None):
+        """
+        Args:
+            socket_path (str, optional): The path of the agent socket. Defaults to `default_socket_path()`.
+
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self._public_key = None
+        self._socket = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def public_key(self) -> RSA.RsaKey:
+        """
+        Returns:
+            RSA.RsaKey: The public key of the agent.
+
+        """
+        if self._public_key is None:
+            self._public_key = RSA.import_key(self._request(AGENT_REQUEST_PUBLIC_KEY, b"", AGENT_PUBLIC_KEY))
+        return self._public_key
+
+    def size_in_bytes(self) -> int:
+        return self.public_key().size_in_bytes()
+
+    def sign_digest(self, digest: bytes) -> bytes:
+        """
+        Returns:
+            bytes: The PKCS#1 v1.5 signature of a SHA-256 digest, made by the agent.
+
+        Raises:
+            ValueError: If the agent refused to sign, for instance because it is locked.
+
+        """
+        return self.sign_digests([digest])[0]
+
+    def sign_digests(self, digests: list[bytes]) -> list[bytes]:
+        """
+        Signs many digests, sending up to PIPELINE_DEPTH requests before reading the responses.
+
+        Returns:
+            list[bytes]: The signature of every digest, in order.
+
+        Raises:
+            ValueError: If the agent refused to sign any digest.
+
+        """
+        responses = self._exchange([(AGENT_REQUEST_SIGN, digest) for digest in digests])
+        return [self._expect(response, AGENT_SIGNATURE) for response in responses]
+
+    def lock(self):
+        """
+        Asks the agent to drop the private key.
+        """
+        self._request(AGENT_REQUEST_LOCK, b"", AGENT_SUCCESS)
+
+    def unlock(self, pin: str):
+        """
+        Asks the agent to decrypt the private key from its drive again.
+
+        Raises:
+            ValueError: If the PIN is wrong or the agent cannot reach its drive.
+
+        """
+        self._request(AGENT_REQUEST_UNLOCK, pin.encode(), AGENT_SUCCESS)
+
+    def close(self):
+        """
+        Closes the connection to the agent.
+        """
+        with self._lock:
+            self._disconnect()
+
+    def __getstate__(self) -> dict:
+        return {"socket_path": self.socket_path}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["socket_path"])
+
+    def _request(self, message_type: int, payload: bytes, expected_type: int) -> bytes:
+        return self._expect(self._exchange([(message_type, payload)])[0], expected_type)
+
+    def _exchange(self, requests: list[tuple[int, bytes]]) -> list[tuple[int, bytes]]:
+        if self._pid != os.getpid():
+            # A forked worker process must not share the connection, or the lock, of its parent.
+            self._socket, self._reader = None, None
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+        responses = []
+        with self._lock:
+            while len(responses) < len(requests):
+                window = requests[len(responses):len(responses) + PIPELINE_DEPTH]
+                received = self._send_window(window)
+                if not received:
+                    self._disconnect()
+                    # The agent closed a connection that was just opened, or cannot be reached at all.
+                    received = self._send_window(window)
+                    if not received:
+                        msg = f"Key agent at {self.socket_path} closed the connection."
+                        raise ConnectionError(msg)
+                responses += received
+        return responses
+
+    def _send_window(self, window: list[tuple[int, bytes]]) -> list[tuple[int, bytes]]:
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(self.socket_path)
+            self._reader = self._socket.makefile("rb")
+
+        received = []
+        try:
+            self._socket.sendall(b"".join(encode_frame(*request) for request in window))
+            for _ in window:
+                header = self._reader.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                length, message_type = FRAME_HEADER.unpack(header)
+                payload = self._reader.read(length - 1)
+                if len(payload) < length - 1:
+                    break
+                received.append((message_type, payload))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        if len(received) < len(window):
+            # The agent reached its request limit for this connection; the rest is sent on a new one.
+            self._disconnect()
+        return received
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+
+    @staticmethod
+    def _expect(response: tuple[int, bytes], expected_type: int) -> bytes:
+        message_type, payload = response
+        if message_type == AGENT_FAILURE:
+            msg = f"Key agent refused the request: {payload.decode('utf-8', 'replace')}"
+            raise ValueError(msg)
+        if message_type != expected_type:
+            msg = f"Unexpected key agent response type: {message_type}"
+            raise ValueError(msg)
+        return payload
+
+def encode_frame(message_type: int, payload: bytes) -> bytes:
+    """
+    Returns:
+        bytes: A key agent message, framed with its length.
+
+    """
+    return FRAME_HEADER.pack(len(payload) + 1, message_type) + payload
@@ -0,0 +1,226 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from Crypto.PublicKey import RSA
+
+logger = logging.getLogger("global_logger")
+
+SESSION_IDLE_ENV = "SIGNING_SESSION_IDLE"
+SESSION_MAX_USES_ENV = "SIGNING_SESSION_MAX_USES"
+SESSION_MAX_USES = 200
+PRIVATE_KEY_FILE = "private_key.enc"
+# The private components of a pycryptodome RSA key, overwritten when the key is dropped.
+PRIVATE_COMPONENTS = ("_d", "_p", "_q", "_u", "_dp", "_dq", "_invq")
+
+class KeySession:
+    """
+    KeySession keeps the private key unlocked between signatures made from the GUI, so the PIN is entered once.
+
+    A session is opt-in (see `session_from_environment`). The key it holds is bound to the drive it was
+    decrypted from: the path of the drive and the device, inode, size and modification time of its
+    encrypted key file. It is dropped as soon as that identity changes, the drive is no longer listed by
+    the drive manager (see `retain_drives`), no signature was made for `idle_timeout` seconds, or
+    `max_uses` signatures were made with it.
+
+    When the key is dropped, its private components are overwritten in place before the object is
+    released, as soon as no signature still uses it. This clears the GMP buffers holding them; copies made
+    elsewhere by Python, such as the decrypted key file, cannot be cleared and are only released.
+
+    Attributes:
+        idle_timeout (float): The seconds without signatures after which the key is dropped.
+        max_uses (int): The number of signatures after which the key is dropped.
+
+    Methods:
+        __init__(idle_timeout: float, max_uses: int = SESSION_MAX_USES):
+        signing_key(drive: str, unlock: Callable[[], RSA.RsaKey]) -> ContextManager[RSA.RsaKey]:
+            Lends the key of a drive for one signature, unlocking it first if the session holds none.
+        holds_key(drive: str) -> bool:
+            Returns whether the session holds a usable key for a drive.
+        retain_drives(drives: Iterable[str]):
+            Drops the key if its drive is no longer connected or it has been idle for too long.
+        clear():
+            Drops the key.
+
+    """
+
+    def __init__(self, idle_timeout: float, max_uses: int = SESSION_MAX_USES):
+        """
+        Initializes an empty session.
+
+        Args:
+            idle_timeout (float): The seconds without signatures after which the key is dropped.
+            max_uses (int, optional): The number of signatures after which the key is dropped.
+                Defaults to SESSION_MAX_USES.
+
+        """
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self._lock = threading.Lock()
+        self._rsa_key = None
+        self._identity = None
+        self._uses = 0
+        self._last_use = 0.0
+        self._borrowers = 0
+        # Keys dropped while a signature was still using them, wiped when it ends.
+        self._retired = []
+
+    @contextlib.contextmanager
+    def signing_key(self, drive: str, unlock: Callable[[], RSA.RsaKey]) -> Iterator[RSA.RsaKey]:
+        """
+        Lends the key of a drive for one signature, unlocking it first if the session holds none.
+
+        Args:
+            drive (str): The drive holding the encrypted key.
+            unlock (Callable[[], RSA.RsaKey]): Decrypts the key of the drive, such as with the PIN.
+
+        Yields:
+            RSA.RsaKey: The private key, valid until the block ends.
+
+        Raises:
+            Exception: If the key has to be unlocked and `unlock` fails.
+
+        """
+        identity = _drive_identity(drive)
+        with self._lock:
+            self._expire(identity)
+            rsa_key = self._rsa_key
+            if rsa_key is not None:
+                self._borrowers += 1
+                self._uses += 1
+                logger.info("Using the unlocked key of %s (signature %d of %d)", drive, self._uses, self.max_uses)
+
+        if rsa_key is None:
+            rsa_key = unlock()
+            if identity is None:
+                # A key whose drive cannot be identified is used once and not kept.
+                yield rsa_key
+                return
+            with self._lock:
+                self._drop()
+                self._rsa_key, self._identity = rsa_key, identity
+                self._borrowers, self._uses = 1, 1
+                logger.info("Key of %s kept unlocked for up to %s s idle", drive, self.idle_timeout)
+
+        try:
+            yield rsa_key
+        finally:
+            with self._lock:
+                self._last_use = time.monotonic()
+                if rsa_key is self._rsa_key:
+                    self._borrowers -= 1
+                    if self._uses >= self.max_uses:
+                        logger.info("Key session reached %d signatures", self.max_uses)
+                        self._drop()
+                else:
+                    self._return_retired(rsa_key)
+
+    def holds_key(self, drive: str) -> bool:
+        """
+        Args:
+            drive (str): The drive holding the encrypted key.
+
+        Returns:
+            bool: True if the next signature with the key of the drive needs no PIN.
+
+        """
+        identity = _drive_identity(drive)
+        with self._lock:
+            self._expire(identity)
+            return self._rsa_key is not None
+
+    def retain_drives(self, drives: Iterable[str]):
+        """
+        Drops the key if its drive is not among the connected drives, or it has been idle for too long.
+
+        Args:
+            drives (Iterable[str]): The drives the drive manager currently sees.
+
+        """
+        with self._lock:
+            if self._rsa_key is None:
+                return
+            if self._identity[0] not in set(drives):
+                logger.info("Key drive %s removed, dropping the unlocked key", self._identity[0])
+                self._drop()
+            else:
+                self._expire(self._identity)
+
+    def clear(self):
+        """
+        Drops the key. Signatures in progress finish with it, and it is wiped once they end.
+        """
+        with self._lock:
+            self._drop()
+
+    def _expire(self, identity: tuple | None):
+        if self._rsa_key is None:
+            return
+        if identity != self._identity:
+            logger.info("Key drive changed, dropping the unlocked key")
+            self._drop()
+        elif not self._borrowers and time.monotonic() - self._last_use > self.idle_timeout:
+            logger.info("Key session idle for %s s, dropping the unlocked key", self.idle_timeout)
+            self._drop()
+
+    def _drop(self):
+        if self._rsa_key is None:
+            return
+        if self._borrowers:
+            self._retired.append([self._rsa_key, self._borrowers])
+        else:
+            _wipe_key(self._rsa_key)
+        self._rsa_key = self._identity = None
+        self._uses = self._borrowers = 0
+
+    def _return_retired(self, rsa_key: RSA.RsaKey):
+        for retired in self._retired:
+            if retired[0] is rsa_key:
+                retired[1] -= 1
+                if not retired[1]:
+                    self._retired.remove(retired)
+                    _wipe_key(rsa_key)
+                return
+
+def session_from_environment() -> KeySession | None:
+    """
+    Returns a key session configured by SIGNING_SESSION_IDLE and SIGNING_SESSION_MAX_USES, if enabled.
+
+    Returns:
+        KeySession | None: A session keeping the key for SIGNING_SESSION_IDLE seconds without use and at most
+        SIGNING_SESSION_MAX_USES signatures (SESSION_MAX_USES if unset), or None if SIGNING_SESSION_IDLE is
+        unset or zero, which asks for the PIN on every signature.
+
+    Raises:
+        ValueError: If a variable is not a positive number.
+
+    """
+    idle_timeout = os.environ.get(SESSION_IDLE_ENV)
+    if not idle_timeout or float(idle_timeout) == 0:
+        return None
+    max_uses = int(os.environ.get(SESSION_MAX_USES_ENV, SESSION_MAX_USES))
+    if float(idle_timeout) < 0 or max_uses <= 0:
+        msg = f"{SESSION_IDLE_ENV} and {SESSION_MAX_USES_ENV} must be positive."
+        raise ValueError(msg)
+    return KeySession(float(idle_timeout), max_uses)
+
+def _drive_identity(drive: str) -> tuple | None:
+    try:
+        stat = (Path(drive) / PRIVATE_KEY_FILE).stat()
+    except (OSError, TypeError):
+        return None
+    return str(drive), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _wipe_key(rsa_key: RSA.RsaKey):
+    # Setting an Integer copies the new value into its existing buffer, so ones overwrite every limb of the
+    # secret before it is set to zero. The key object is unusable afterwards.
+    for name in PRIVATE_COMPONENTS:
+        component = getattr(rsa_key, name, None)
+        if component is not None and hasattr(component, "set"):
+            component.set((1 << max(component.size_in_bits(), 1)) - 1)
+            component.set(0)
+    logger.info("Unlocked key wiped")
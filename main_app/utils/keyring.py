@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+
+from Crypto.PublicKey import RSA
+from utils.cms import key_id
+
+logger = logging.getLogger("global_logger")
+
+KEYRING_ENV = "SIGNING_KEYRING"
+KEYRING_INDEX = ".keyring-index.json"
+KEYRING_CACHE_SIZE = 256
+KEY_FILE_SUFFIXES = (".key", ".pem", ".pub")
+
+_open_keyrings = {}
+_open_keyrings_lock = threading.Lock()
+
+class Keyring(Mapping):
+    """
+    Keyring holds the public keys of many signers in a directory and finds them by key identifier.
+
+    Every signature names the key that made it by the SHA-256 hash of its SubjectPublicKeyInfo (see
+    `key_id`), so a keyring maps that identifier to the key file in a single lookup. The identifiers of the
+    key files are kept in an index file in the directory, next to the size and modification time of each
+    file, so opening a keyring only lists the directory: a key file is parsed once when it is added or
+    changed, then whenever it is needed and no longer among the `cache_size` most recently used keys.
+
+    A keyring is a read-only mapping from key identifier to `RSA.RsaKey`, and can be passed wherever the
+    public keys of the accepted signers are expected. Only files ending with one of KEY_FILE_SUFFIXES are
+    read; files that hold no RSA key are skipped with a warning. A keyring can be used from several threads.
+
+    Attributes:
+        directory (str): The directory holding the key files.
+
+    Methods:
+        __init__(directory: str, cache_size: int = KEYRING_CACHE_SIZE):
+        refresh():
+            Indexes the key files added or changed since the index was written.
+        path_of(identifier: bytes) -> str:
+            Returns the path to the file holding a key.
+
+    """
+
+    def __init__(self, directory: str, cache_size: int = KEYRING_CACHE_SIZE):
+        """
+        Opens a keyring and brings its index up to date.
+
+        Args:
+            directory (str): The directory holding the key files.
+            cache_size (int, optional): The number of parsed keys kept in memory. Defaults to KEYRING_CACHE_SIZE.
+
+        Raises:
+            ValueError: If the directory does not exist.
+
+        """
+        self.directory = str(directory)
+        if not Path(self.directory).is_dir():
+            msg = f"Keyring directory not found: {self.directory}"
+            raise ValueError(msg)
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()
+        self._files = {}
+        self._paths = {}
+        self.refresh()
+
+    def __getitem__(self, identifier: bytes) -> RSA.RsaKey:
+        with self._lock:
+            public_key = self._keys.get(identifier)
+            if public_key is not None:
+                self._keys.move_to_end(identifier)
+                return public_key
+            path = self._paths[identifier]
+
+        public_key = _read_key(path)
+        if public_key is None or key_id(public_key) != identifier:
+            logger.warning("Key file changed since it was indexed: %s", path)
+            raise KeyError(identifier)
+        with self._lock:
+            self._keys[identifier] = public_key
+            if len(self._keys) > self._cache_size:
+                self._keys.popitem(last=False)
+        return public_key
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def refresh(self):
+        """
+        Indexes the key files added or changed since the index was written, and forgets removed ones.
+
+        The index file is rewritten if anything changed. A keyring in a read-only directory still works,
+        but parses its new key files every time it is opened.
+        """
+        with self._lock:
+            # The index is only read when the keyring is opened, then kept in memory.
+            indexed = self._files or _read_index(self.directory)
+            files = {}
+            for entry in sorted(os.scandir(self.directory), key=lambda entry: entry.name):
+                if not entry.name.endswith(KEY_FILE_SUFFIXES) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                known = indexed.get(entry.name)
+                if isinstance(known, dict) and (known.get("size"), known.get("mtime_ns")) == (stat.st_size, stat.st_mtime_ns):
+                    files[entry.name] = known
+                    continue
+                # A file without a key is indexed too, so it is not parsed again until it changes.
+                public_key = _read_key(entry.path)
+                if public_key is None:
+                    logger.warning("Skipping key file without an RSA key: %s", entry.path)
+                identifier = key_id(public_key).hex() if public_key is not None else None
+                files[entry.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "key_id": identifier}
+
+            paths = {}
+            for name, file in files.items():
+                if file["key_id"] is not None:
+                    paths.setdefault(bytes.fromhex(file["key_id"]), str(Path(self.directory) / name))
+            if files != indexed:
+                _write_index(self.directory, files)
+            self._files = files
+            self._paths = paths
+            for identifier in [identifier for identifier in self._keys if identifier not in paths]:
+                del self._keys[identifier]
+        logger.info("Keyring %s holds %d keys", self.directory, len(self._paths))
+
+    def path_of(self, identifier: bytes) -> str:
+        """
+        Args:
+            identifier (bytes): The key identifier.
+
+        Returns:
+            str: The path to the file holding the key.
+
+        Raises:
+            KeyError: If no key file holds the key.
+
+        """
+        return self._paths[identifier]
+
+def index_public_keys(public_key) -> Mapping:
+    """
+    Args:
+        public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Mapping[bytes, RSA.RsaKey]): A public key, the keys of
+            all accepted signers, or a mapping such as a `Keyring` from key identifier to key.
+
+    Returns:
+        Mapping[bytes, RSA.RsaKey]: The public keys by key identifier. A mapping is returned as is.
+
+    """
+    if isinstance(public_key, Mapping):
+        return public_key
+    public_keys = [public_key] if isinstance(public_key, RSA.RsaKey) else public_key
+    return {key_id(key): key for key in public_keys}
+
+def open_keyring(directory: str) -> Keyring:
+    """
+    Returns the keyring of a directory, shared by the whole process so parsed keys stay cached between uses.
+
+    Args:
+        directory (str): The directory holding the key files.
+
+    Returns:
+        Keyring: The keyring, refreshed if it was already open.
+
+    Raises:
+        ValueError: If the directory does not exist.
+
+    """
+    directory = str(Path(directory).resolve())
+    with _open_keyrings_lock:
+        keyring = _open_keyrings.get(directory)
+        if keyring is None:
+            keyring = _open_keyrings[directory] = Keyring(directory)
+            return keyring
+    keyring.refresh()
+    return keyring
+
+def _read_key(path: str) -> RSA.RsaKey | None:
+    try:
+        return RSA.import_key(Path(path).read_bytes()).public_key()
+    except (OSError, ValueError, IndexError, TypeError):
+        return None
+
+def _read_index(directory: str) -> dict:
+    try:
+        index = json.loads((Path(directory) / KEYRING_INDEX).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+def _write_index(directory: str, files: dict):
+    index_path = Path(directory) / KEYRING_INDEX
+    temporary_path = index_path.with_name(f"{KEYRING_INDEX}.{os.getpid()}.tmp")
+    try:
+        temporary_path.write_text(json.dumps(files, indent=1), encoding="utf-8")
+        temporary_path.replace(index_path)
+    except OSError as e:
+        temporary_path.unlink(missing_ok=True)
+        logger.warning("Could not write the keyring index %s: %s", index_path, e)
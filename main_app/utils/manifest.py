@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from Crypto.Hash import SHA256
+from Crypto.Util.asn1 import DerOctetString, DerSequence
+from utils.cms import SignedData
+from utils.pdf_document import PdfDocument
+
+logger = logging.getLogger("global_logger")
+
+# Unsigned CMS attribute holding the chunk manifest, under the UUID arc that needs no registration.
+MANIFEST_OID = "2.25.283247749275271238781710023416064571063"
+MANIFEST_CHUNK_SIZE = 4 * 1024 * 1024
+MIN_CHUNK_SIZE = 64 * 1024
+# Marks a manifest digest, so that it can never equal the digest of the signed bytes themselves.
+MANIFEST_PREFIX = b"\x00PDF chunk manifest\x00"
+CHUNK_SIZE_LENGTH = 8
+DIGEST_SIZE = 32
+# Upper bound of the signed bytes of a signature section, outside its placeholder.
+SECTION_ALLOWANCE = 64 * 1024
+MANIFEST_ATTRIBUTE_OVERHEAD = 64
+HASH_THREADS = os.cpu_count() or 1
+
+class Manifest(NamedTuple):
+    """
+    Manifest lists the digests of fixed-size chunks of the bytes covered by a signature.
+
+    The chunks are taken over the signed byte ranges as one stream, so a chunk may span the end of
+    one range and the start of the next.
+
+    Attributes:
+        chunk_size (int): The size of every chunk but the last one, in bytes.
+        digests (list[bytes]): The SHA-256 digest of every chunk, in order.
+
+    """
+
+    chunk_size: int
+    digests: list
+
+def hash_chunks(document: PdfDocument, byte_ranges, chunk_size: int, appended_parts=(),
+                threads: int = HASH_THREADS) -> list[bytes]:
+    """
+    Hashes the signed parts of a PDF file as fixed-size chunks, several chunks at a time.
+
+    The chunks are spread over a pool of threads. They are hashed with `hashlib`, which releases the GIL
+    while it hashes large buffers, so the threads run in parallel. The pages of each chunk are released
+    from the process memory once it is hashed.
+
+    Args:
+        document (PdfDocument): The mapped PDF file.
+        byte_ranges (list[tuple[int, int]]): The (offset, length) ranges of the file to hash, in file order.
+        chunk_size (int): The size of the chunks.
+        appended_parts (Iterable[bytes], optional): In-memory parts hashed after the byte ranges of the file.
+        threads (int, optional): The number of hashing threads. Defaults to the number of CPUs.
+
+    Returns:
+        list[bytes]: The digest of every chunk, in order.
+
+    Raises:
+        ValueError: If a byte range ends beyond the end of the file or the chunk size is below MIN_CHUNK_SIZE.
+
+    """
+    if chunk_size < MIN_CHUNK_SIZE:
+        msg = f"Manifest chunk size must be at least {MIN_CHUNK_SIZE} bytes."
+        raise ValueError(msg)
+    for offset, length in byte_ranges:
+        if offset + length > document.size:
+            msg = "Unexpected end of PDF file."
+            raise ValueError(msg)
+
+    sources = [(document.view, offset, length) for offset, length in byte_ranges]
+    sources += [(memoryview(part), 0, len(part)) for part in appended_parts]
+    chunks = _split_chunks(sources, chunk_size)
+
+    def hash_chunk(pieces):
+        chunk_hash = hashlib.sha256()
+        for view, offset, length in pieces:
+            chunk_hash.update(view[offset:offset + length])
+            if view is document.view:
+                document.release(offset, length)
+        return chunk_hash.digest()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(hash_chunk, chunks))
+
+def manifest_hash(previous_digest: bytes, manifest: Manifest):
+    """
+    Returns the hash a signature with a manifest signs, in place of the hash of the signed bytes.
+
+    Args:
+        previous_digest (bytes): The digest of the previous signature, or b"" for the first one.
+        manifest (Manifest): The chunk manifest of the signed bytes.
+
+    Returns:
+        SHA256.SHA256Hash: The hash of the previous digest, the chunk size and the chunk digests.
+
+    """
+    manifest_digest = SHA256.new(MANIFEST_PREFIX + previous_digest)
+    manifest_digest.update(manifest.chunk_size.to_bytes(CHUNK_SIZE_LENGTH, "big"))
+    for digest in manifest.digests:
+        manifest_digest.update(digest)
+    return manifest_digest
+
+def manifest_size(document_size: int, chunk_size: int) -> int:
+    """
+    Returns:
+        int: The maximum size of the manifest attribute of a signature added to a document of this size.
+
+    """
+    count = (document_size + SECTION_ALLOWANCE) // chunk_size + 1
+    return len(encode_manifest(Manifest(chunk_size, [bytes(DIGEST_SIZE)] * count))) + MANIFEST_ATTRIBUTE_OVERHEAD
+
+def encode_manifest(manifest: Manifest) -> bytes:
+    """
+    Returns:
+        bytes: The DER encoding of the manifest, stored as the value of a `MANIFEST_OID` attribute.
+
+    """
+    digests = DerSequence([DerOctetString(digest) for digest in manifest.digests])
+    return DerSequence([manifest.chunk_size, digests]).encode()
+
+def get_manifest(signed_data: SignedData) -> Manifest | None:
+    """
+    Returns:
+        Manifest | None: The chunk manifest of a signature, or None if it has none.
+
+    Raises:
+        ValueError: If the manifest is malformed.
+
+    """
+    values = signed_data.unsigned_attributes.get(MANIFEST_OID)
+    if not values:
+        return None
+
+    try:
+        # DerSequence decodes INTEGER members to int itself.
+        chunk_size, digests = DerSequence().decode(values[0], nr_elements=2)
+        if not isinstance(chunk_size, int):
+            msg = "Manifest chunk size is not an integer."
+            raise TypeError(msg)  # noqa: TRY301
+        if chunk_size < MIN_CHUNK_SIZE:
+            msg = f"Manifest chunk size is below {MIN_CHUNK_SIZE} bytes."
+            raise ValueError(msg)  # noqa: TRY301
+        return Manifest(
+            chunk_size, [DerOctetString().decode(digest).payload for digest in DerSequence().decode(digests)]
+        )
+    except (ValueError, TypeError) as e:
+        msg = f"Malformed chunk manifest: {e}"
+        raise ValueError(msg) from e
+
+def locate_changes(byte_ranges, manifest: Manifest, digests: list[bytes]) -> list[tuple[int, int]]:
+    """
+    Finds the parts of a file whose chunks do not match a manifest.
+
+    Args:
+        byte_ranges (list[tuple[int, int]]): The (offset, length) ranges of the file that were hashed.
+        manifest (Manifest): The signed chunk manifest.
+        digests (list[bytes]): The chunk digests computed from the file.
+
+    Returns:
+        list[tuple[int, int]]: The (offset, length) ranges of the file that changed, merged where adjacent.
+        If the number of chunks does not match the manifest, all the ranges are reported.
+
+    """
+    chunks = _split_chunks([(None, offset, length) for offset, length in byte_ranges], manifest.chunk_size)
+    same_layout = len(digests) == len(manifest.digests)
+    changed = []
+    for index, pieces in enumerate(chunks):
+        if same_layout and digests[index] == manifest.digests[index]:
+            continue
+        for _, offset, length in pieces:
+            if changed and changed[-1][0] + changed[-1][1] == offset:
+                changed[-1] = (changed[-1][0], changed[-1][1] + length)
+            else:
+                changed.append((offset, length))
+    return changed
+
+def _split_chunks(sources, chunk_size: int) -> list[list[tuple]]:
+    chunks, pieces, filled = [], [], 0
+    for view, start, length in sources:
+        offset, remaining = start, length
+        while remaining:
+            size = min(remaining, chunk_size - filled)
+            pieces.append((view, offset, size))
+            offset, remaining, filled = offset + size, remaining - size, filled + size
+            if filled == chunk_size:
+                chunks.append(pieces)
+                pieces, filled = [], 0
+    if pieces or not chunks:
+        chunks.append(pieces)
+    return chunks
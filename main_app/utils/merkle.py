@@ -0,0 +1,262 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Util.asn1 import DerInteger, DerOctetString, DerSequence
+from utils.cms import (
+    SignedData,
+    build_signed_attributes,
+    build_signed_data,
+    key_id,
+    sign_attributes,
+    verify_signed_data,
+)
+
+logger = logging.getLogger("global_logger")
+
+# Unsigned CMS attribute holding a Merkle inclusion proof, under the UUID arc that needs no registration.
+MERKLE_PROOF_OID = "2.25.34634447352671343506764985135904209142"
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+DIGEST_SIZE = 32
+PROOF_ATTRIBUTE_OVERHEAD = 64
+VERIFIED_ROOTS_CACHE_SIZE = 256
+
+_verified_roots = OrderedDict()
+_verified_roots_lock = threading.Lock()
+
+class MerkleProof(NamedTuple):
+    """
+    MerkleProof proves that the digest of one document is a leaf of a signed Merkle tree.
+
+    Attributes:
+        digest (bytes): The digest of the document, as it would be signed on its own.
+        index (int): The position of the document in the batch.
+        count (int): The number of documents in the batch.
+        path (list[bytes]): The sibling nodes from the leaf up to the root.
+
+    """
+
+    digest: bytes
+    index: int
+    count: int
+    path: list
+
+def merkle_tree(digests: list[bytes]) -> tuple[bytes, list[MerkleProof]]:
+    """
+    Builds a Merkle tree over document digests.
+
+    Leaves and inner nodes are hashed with different prefixes, so a root can never be mistaken for the
+    digest of a document. A node without a sibling is promoted to the next level unchanged.
+
+    Args:
+        digests (list[bytes]): The SHA-256 digests of the documents.
+
+    Returns:
+        tuple[bytes, list[MerkleProof]]: The root of the tree and the inclusion proof of every document.
+
+    Raises:
+        ValueError: If there are no digests.
+
+    """
+    if not digests:
+        msg = "Cannot build a Merkle tree without documents."
+        raise ValueError(msg)
+
+    paths = [[] for _ in digests]
+    positions = list(range(len(digests)))
+    level = [SHA256.new(LEAF_PREFIX + digest).digest() for digest in digests]
+    while len(level) > 1:
+        for leaf, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                paths[leaf].append(level[sibling])
+            positions[leaf] = position // 2
+        level = [
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)
+        ]
+
+    proofs = [
+        MerkleProof(digest, index, len(digests), path)
+        for index, (digest, path) in enumerate(zip(digests, paths, strict=True))
+    ]
+    return level[0], proofs
+
+def merkle_root(proof: MerkleProof) -> bytes:
+    """
+    Returns:
+        bytes: The root of the Merkle tree that the proof leads to.
+
+    Raises:
+        ValueError: If the proof does not match the size of its tree.
+
+    """
+    node = SHA256.new(LEAF_PREFIX + proof.digest).digest()
+    position, size = proof.index, proof.count
+    siblings = iter(proof.path)
+    if not 0 <= position < size:
+        msg = "Merkle proof index is out of range."
+        raise ValueError(msg)
+
+    while size > 1:
+        if position ^ 1 < size:
+            sibling = next(siblings, None)
+            if sibling is None:
+                msg = "Merkle proof is too short."
+                raise ValueError(msg)
+            node = _node(node, sibling) if position % 2 == 0 else _node(sibling, node)
+        position, size = position // 2, (size + 1) // 2
+
+    if next(siblings, None) is not None:
+        msg = "Merkle proof is too long."
+        raise ValueError(msg)
+    return node
+
+def proof_size(count: int) -> int:
+    """
+    Returns:
+        int: The maximum size of the unsigned attribute holding a proof for a batch of `count` documents.
+
+    """
+    depth = max(count - 1, 0).bit_length()
+    largest_proof = MerkleProof(bytes(DIGEST_SIZE), count, count, [bytes(DIGEST_SIZE)] * depth)
+    return len(encode_proof(largest_proof)) + PROOF_ATTRIBUTE_OVERHEAD
+
+def encode_proof(proof: MerkleProof) -> bytes:
+    """
+    Returns:
+        bytes: The DER encoding of the proof, stored as the value of a `MERKLE_PROOF_OID` attribute.
+
+    """
+    return DerSequence([
+        DerOctetString(proof.digest),
+        DerInteger(proof.index),
+        DerInteger(proof.count),
+        DerSequence([DerOctetString(node) for node in proof.path]),
+    ]).encode()
+
+def decode_proof(encoded: bytes) -> MerkleProof:
+    """
+    Parses a proof encoded by `encode_proof`.
+
+    Raises:
+        ValueError: If the proof is malformed.
+
+    """
+    try:
+        # DerSequence decodes INTEGER members to int itself.
+        digest, index, count, path = DerSequence().decode(encoded, nr_elements=4)
+        if not isinstance(index, int) or not isinstance(count, int):
+            msg = "Merkle proof position is not an integer."
+            raise TypeError(msg)  # noqa: TRY301
+        return MerkleProof(
+            DerOctetString().decode(digest).payload,
+            index,
+            count,
+            [DerOctetString().decode(node).payload for node in DerSequence().decode(path)],
+        )
+    except (ValueError, TypeError) as e:
+        msg = f"Malformed Merkle proof: {e}"
+        raise ValueError(msg) from e
+
+def get_proof(signed_data: SignedData) -> MerkleProof | None:
+    """
+    Returns:
+        MerkleProof | None: The Merkle proof of a batch signature, or None for a signature of a single document.
+
+    Raises:
+        ValueError: If the proof is malformed.
+
+    """
+    values = signed_data.unsigned_attributes.get(MERKLE_PROOF_OID)
+    return decode_proof(values[0]) if values else None
+
+def document_digest(signed_data: SignedData) -> bytes:
+    """
+    Returns:
+        bytes: The digest of the signed document, which the next signature of the document continues from.
+
+    """
+    proof = get_proof(signed_data)
+    return proof.digest if proof is not None else signed_data.digest
+
+def digest_matches(signed_data: SignedData, digest: bytes) -> bool:
+    """
+    Checks that a signature covers a document digest, directly or through its Merkle proof.
+
+    Args:
+        signed_data (SignedData): The parsed CMS signature.
+        digest (bytes): The digest computed from the document.
+
+    Returns:
+        bool: True if the signed digest, or the root the proof leads to, covers the document digest.
+
+    Raises:
+        ValueError: If the Merkle proof is malformed.
+
+    """
+    proof = get_proof(signed_data)
+    if proof is None:
+        return digest == signed_data.digest
+    return digest == proof.digest and merkle_root(proof) == signed_data.digest
+
+def create_batch_signatures(rsa_key: RSA.RsaKey, digests: list[bytes]) -> list[bytes]:
+    """
+    Signs many document digests with a single RSA operation.
+
+    The root of a Merkle tree over the digests is signed once. Every document gets a CMS signature holding
+    that same root signature, with its own inclusion proof as an unsigned attribute.
+
+    Args:
+        rsa_key (RSA.RsaKey): The RSA key to use for signing.
+        digests (list[bytes]): The SHA-256 digests of the documents.
+
+    Returns:
+        list[bytes]: The DER-encoded CMS SignedData structure of each document, in the order of the digests.
+
+    """
+    root, proofs = merkle_tree(digests)
+    signed_attributes = build_signed_attributes(root)
+    signature = sign_attributes(rsa_key, signed_attributes)
+    signer_key_id = key_id(rsa_key)
+    logger.info("Signed Merkle root %s of %d documents", root.hex(), len(digests))
+    return [
+        build_signed_data(signer_key_id, signed_attributes, signature, {MERKLE_PROOF_OID: encode_proof(proof)})
+        for proof in proofs
+    ]
+
+def verify_root(public_key: RSA.RsaKey, signed_data: SignedData) -> bool:
+    """
+    Verifies the root signature of a batch signature, remembering roots that were already verified.
+
+    Every document of a batch carries the same root signature, so verifying a whole batch costs a
+    single RSA operation. Only successful verifications are remembered.
+
+    Args:
+        public_key (RSA.RsaKey): The public key of the signer.
+        signed_data (SignedData): The parsed CMS signature.
+
+    Returns:
+        bool: True if the public key made the signature of the signed attributes.
+
+    """
+    cache_key = (public_key.n, public_key.e, signed_data.signed_attributes, signed_data.signature)
+    with _verified_roots_lock:
+        if cache_key in _verified_roots:
+            _verified_roots.move_to_end(cache_key)
+            return True
+
+    if not verify_signed_data(public_key, signed_data):
+        return False
+
+    with _verified_roots_lock:
+        _verified_roots[cache_key] = True
+        if len(_verified_roots) > VERIFIED_ROOTS_CACHE_SIZE:
+            _verified_roots.popitem(last=False)
+    return True
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return SHA256.new(NODE_PREFIX + left + right).digest()
@@ -0,0 +1,226 @@
+import logging
+import mmap
+import os
+from io import BytesIO
+from pathlib import Path
+
+from utils.file_utils import clone_file
+
+logger = logging.getLogger("global_logger")
+
+class PdfDocument:
+    """
+    PdfDocument gives a single sign or verify operation shared access to the bytes of a PDF file.
+
+    The file is opened once and mapped into memory read-only. Hashing works on memoryview slices of the
+    mapping and the trailer parser reads from the same mapping, so no step reopens the file or copies
+    its content. Signing appends to the file through the same descriptor.
+
+    A document can also wrap PDF content that is already in memory (see `from_bytes`). Such a document
+    has no file behind it, so its signed content is written out by the caller instead of appended.
+
+    Attributes:
+        path (str): The path to the PDF file, or `<memory>` for in-memory content.
+        size (int): The size of the mapped PDF content in bytes.
+        view (memoryview): A read-only view of the mapped PDF content.
+
+    Methods:
+        __init__(pdf_path: str | None = None, writable: bool = False, data=None):
+        from_bytes(source) -> PdfDocument:
+            Wraps in-memory PDF content or the content of a binary stream.
+        tail(length: int) -> bytes:
+            Returns the last bytes of the mapped content.
+        release(offset: int, length: int):
+            Drops the pages of an already processed range from the process memory.
+        append(data: bytes):
+            Appends data to the end of the PDF file.
+        copy_to(output_path: str, data: bytes):
+            Writes a copy of the PDF content followed by data to another file.
+        patch(offset: int, data: bytes):
+            Overwrites bytes of the PDF file in place.
+        close():
+            Unmaps and closes the PDF file.
+
+    """
+
+    def __init__(self, pdf_path: str | None = None, *, writable: bool = False, data=None):
+        """
+        Opens and maps the PDF file, or wraps PDF content that is already in memory.
+
+        Args:
+            pdf_path (str, optional): The path to the PDF file.
+            writable (bool, optional): Whether data will be appended to the file. Defaults to False.
+            data (bytes-like, optional): In-memory PDF content, used in place of a file. Defaults to None.
+
+        Raises:
+            ValueError: If the PDF file is empty.
+
+        """
+        self._file = None
+        self._mapping = None
+        if data is not None:
+            self.path = "<memory>"
+            self.view = memoryview(data).cast("B").toreadonly()
+            self.size = len(self.view)
+            if not self.size:
+                self.view.release()
+                msg = "PDF content is empty."
+                raise ValueError(msg)
+            return
+
+        self.path = str(pdf_path)
+        self._file = Path.open(pdf_path, "r+b" if writable else "rb")
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            if not self.size:
+                msg = f"PDF file is empty: {pdf_path}"
+                raise ValueError(msg)  # noqa: TRY301
+            self._mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        if hasattr(self._mapping, "madvise"):
+            self._mapping.madvise(mmap.MADV_SEQUENTIAL)
+        self.view = memoryview(self._mapping)
+
+    @classmethod
+    def from_bytes(cls, source):
+        """
+        Wraps in-memory PDF content or the content of a binary stream.
+
+        Bytes-like objects and `BytesIO` streams are used in place without copying. Other streams are read
+        from their current position to the end.
+
+        Args:
+            source (bytes | bytearray | memoryview | BinaryIO): The PDF content.
+
+        Returns:
+            PdfDocument: The document backed by the content.
+
+        Raises:
+            ValueError: If the PDF content is empty.
+
+        """
+        if isinstance(source, BytesIO):
+            return cls(data=source.getbuffer())
+        if hasattr(source, "read"):
+            return cls(data=source.read())
+        return cls(data=source)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def tail(self, length: int) -> bytes:
+        """
+        Args:
+            length (int): The maximum number of bytes to return.
+
+        Returns:
+            bytes: The last bytes of the mapped content.
+
+        """
+        return bytes(self.view[max(self.size - length, 0):self.size])
+
+    def release(self, offset: int, length: int):
+        """
+        Drops the pages of an already processed range from the process memory.
+
+        The pages stay in the page cache, so the resident size of the process does not grow with
+        the size of the file while it is hashed.
+
+        Args:
+            offset (int): The offset of the processed range.
+            length (int): The length of the processed range.
+
+        """
+        if self._mapping is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        start = offset - offset % mmap.PAGESIZE
+        self._mapping.madvise(mmap.MADV_DONTNEED, start, offset + length - start)
+
+    def append(self, data: bytes):
+        """
+        Appends data to the end of the PDF file.
+
+        The mapping keeps covering the original content only.
+
+        Args:
+            data (bytes): The data to be appended.
+
+        Raises:
+            ValueError: If the document was not opened from a file for writing.
+
+        """
+        if self._file is None or not self._file.writable():
+            msg = "PDF document is not writable."
+            raise ValueError(msg)
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._file.flush()
+
+    def copy_to(self, output_path: str, data: bytes):
+        """
+        Writes a copy of the PDF content followed by data to another file.
+
+        The copy of a PDF file is cloned (see `clone_file`), so on copy-on-write filesystems it shares
+        its blocks with the original and only the appended data is actually written. The output file
+        is removed if writing fails.
+
+        Args:
+            output_path (str): The path to the output file. It is replaced if it exists.
+            data (bytes): The data to be written after the PDF content.
+
+        """
+        try:
+            with Path.open(output_path, "wb") as output_file:
+                if self._file is None:
+                    output_file.write(self.view)
+                else:
+                    method = clone_file(self._file, output_file, self.size)
+                    logger.info("Copied %s to %s using %s", self.path, output_path, method)
+                output_file.seek(self.size)
+                output_file.write(data)
+        except Exception:
+            Path(output_path).unlink(missing_ok=True)
+            raise
+
+    def patch(self, offset: int, data: bytes):
+        """
+        Overwrites bytes of the PDF file in place, with a single positioned write.
+
+        The size of the file does not change, and neither does the file position used by `append`.
+
+        Args:
+            offset (int): The offset of the first byte to overwrite.
+            data (bytes): The new bytes.
+
+        Raises:
+            ValueError: If the document was not opened from a file for writing, or the bytes do not lie
+                within the file.
+
+        """
+        if self._file is None or not self._file.writable():
+            msg = "PDF document is not writable."
+            raise ValueError(msg)
+        if offset < 0 or offset + len(data) > self.size:
+            msg = "Patched bytes must lie within the PDF file."
+            raise ValueError(msg)
+        self._file.flush()
+        written = os.pwrite(self._file.fileno(), data, offset)
+        if written != len(data):
+            msg = f"Short write while patching {self.path}."
+            raise OSError(msg)
+
+    def close(self):
+        """
+        Unmaps and closes the PDF file.
+        """
+        self.view.release()
+        if self._mapping is not None:
+            self._mapping.close()
+        if self._file is not None:
+            self._file.close()
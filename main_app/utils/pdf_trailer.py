@@ -0,0 +1,555 @@
+import logging
+import os
+import re
+import zlib
+from typing import NamedTuple
+
+logger = logging.getLogger("global_logger")
+
+STARTXREF_SEARCH_WINDOW = 1024
+OBJECT_READ_WINDOW = 4096
+XREF_ENTRY_SIZE = 20
+PNG_PREDICTOR_MIN = 10
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+NUMBER_PATTERN = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+INTEGER_PATTERN = re.compile(rb"\d+")
+LITERAL_ESCAPES = {
+    ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f",
+    ord("("): b"(", ord(")"): b")", ord("\\"): b"\\",
+}
+
+class Reference(NamedTuple):
+    """
+    A reference to an indirect PDF object.
+
+    Attributes:
+        number (int): The object number.
+        generation (int): The generation number.
+
+    """
+
+    number: int
+    generation: int
+
+class PdfDictionary(dict):
+    """
+    A dictionary parsed from a PDF file. Keys are names including the leading slash.
+
+    Attributes:
+        raw (dict[str, bytes]): The raw bytes of every entry (key and value) as found in the file.
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.raw = {}
+
+class FileBuffer:
+    """
+    A bytes-like view of a PDF file opened in binary mode that reads only the slices it is asked for.
+
+    Methods:
+        __init__(pdf_file):
+        __len__() -> int:
+            Returns the size of the file.
+        __getitem__(item: slice) -> bytes:
+            Reads a slice of the file.
+
+    """
+
+    def __init__(self, pdf_file):
+        """
+        Args:
+            pdf_file (BinaryIO): The PDF file, opened in binary mode.
+
+        """
+        self._file = pdf_file
+        self._size = os.fstat(pdf_file.fileno()).st_size
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, item: slice) -> bytes:
+        start, stop, _ = item.indices(self._size)
+        self._file.seek(start)
+        return self._file.read(max(stop - start, 0))
+
+class _TruncatedError(Exception):
+    """Raised when an object continues past the end of the window it is parsed from."""
+
+class PdfTrailer:
+    """
+    PdfTrailer resolves the trailer of a PDF file and the objects it references, reading as little of the file as possible.
+
+    Only the end of the file, the cross-reference entries of the requested objects and the objects themselves are
+    read. Cross-reference tables are indexed through their subsection headers, so their entries are never scanned.
+    Cross-reference streams, hybrid files and compressed object streams are supported.
+
+    Attributes:
+        startxref (int): The offset of the last cross-reference section.
+        dictionary (PdfDictionary): The trailer dictionary of the last cross-reference section.
+
+    Methods:
+        __init__(buffer):
+        lookup(number: int) -> tuple | None:
+            Returns the cross-reference entry of an object.
+        resolve(value):
+            Returns the object a reference points to, or the value itself.
+        info() -> PdfDictionary | None:
+            Returns the document information dictionary.
+
+    """
+
+    def __init__(self, buffer):
+        """
+        Reads the last cross-reference section of a PDF file.
+
+        Args:
+            buffer (bytes-like): The content of the PDF file, e.g. a memoryview of a memory-mapped file.
+
+        Raises:
+            ValueError: If the trailer is missing or malformed.
+
+        """
+        self._buffer = buffer
+        self._size = len(buffer)
+        self._sections = []
+        self._pending_sections = []
+        self._visited_sections = set()
+        self._objects = {}
+        self._object_streams = {}
+
+        self.startxref = find_startxref(bytes(buffer[max(self._size - STARTXREF_SEARCH_WINDOW, 0):]))
+        self._pending_sections.append(self.startxref)
+        self._load_next_section()
+        self.dictionary = self._sections[0][1]
+
+    def lookup(self, number: int):
+        """
+        Returns the cross-reference entry of an object, loading older sections only when needed.
+
+        Args:
+            number (int): The object number.
+
+        Returns:
+            tuple | None: ("offset", offset) for objects stored in the file, ("compressed", stream_number, index) for
+            objects stored in an object stream, or None if the object is free or unknown.
+
+        """
+        index = 0
+        while True:
+            if index == len(self._sections) and not self._load_next_section():
+                return None
+            entry = self._sections[index][0](number)
+            if entry is not None:
+                return entry if entry[0] != "free" else None
+            index += 1
+
+    def resolve(self, value):
+        """
+        Returns the object a reference points to, or the value itself if it is not a reference.
+
+        Args:
+            value: A parsed PDF value.
+
+        Returns:
+            The resolved PDF value, or None if the reference points to a free or unknown object.
+
+        Raises:
+            ValueError: If the object cannot be parsed.
+
+        """
+        if not isinstance(value, Reference):
+            return value
+        if value.number in self._objects:
+            return self._objects[value.number]
+
+        entry = self.lookup(value.number)
+        if entry is None:
+            result = None
+        elif entry[0] == "offset":
+            result, _ = self._read_object(entry[1], value.number)
+        else:
+            result = self._read_compressed_object(entry[1], entry[2])
+
+        self._objects[value.number] = result
+        return result
+
+    def info(self):
+        """
+        Returns:
+            PdfDictionary | None: The document information dictionary, if the trailer references one.
+
+        """
+        info = self.resolve(self.dictionary.get("/Info"))
+        return info if isinstance(info, PdfDictionary) else None
+
+    def _parse_at(self, offset: int, parser):
+        window = OBJECT_READ_WINDOW
+        while True:
+            data = bytes(self._buffer[offset:offset + window])
+            try:
+                return parser(data)
+            except _TruncatedError:
+                if offset + window >= self._size:
+                    msg = "Unexpected end of PDF file."
+                    raise ValueError(msg) from None
+                window *= 4
+            except (IndexError, ValueError) as e:
+                msg = f"Malformed PDF object at offset {offset}."
+                raise ValueError(msg) from e
+
+    def _read_object(self, offset: int, number=None):
+        value, stream_start = self._parse_at(offset, lambda data: _parse_indirect_object(data, number))
+        if stream_start is None:
+            return value, None
+        return value, self._read_stream(value, offset + stream_start)
+
+    def _read_stream(self, dictionary, start: int) -> bytes:
+        length = self.resolve(dictionary.get("/Length"))
+        if not isinstance(length, int) or start + length > self._size:
+            msg = "Malformed PDF stream length."
+            raise ValueError(msg)
+        return decode_stream(dictionary, bytes(self._buffer[start:start + length]))
+
+    def _read_compressed_object(self, stream_number: int, index: int):
+        if stream_number not in self._object_streams:
+            entry = self.lookup(stream_number)
+            if entry is None or entry[0] != "offset":
+                msg = "PDF object stream not found."
+                raise ValueError(msg)
+            self._object_streams[stream_number] = self._read_object(entry[1], stream_number)
+
+        dictionary, data = self._object_streams[stream_number]
+        if data is None or dictionary.get("/Type") != "/ObjStm":
+            msg = "Malformed PDF object stream."
+            raise ValueError(msg)
+
+        header = data[:dictionary["/First"]].split()
+        object_offset = dictionary["/First"] + int(header[2 * index + 1])
+        value, _ = _parse_value(data + b"\nendobj", object_offset)
+        return value
+
+    def _load_next_section(self) -> bool:
+        while self._pending_sections:
+            offset = self._pending_sections.pop(0)
+            if offset in self._visited_sections:
+                continue
+            self._visited_sections.add(offset)
+
+            if bytes(self._buffer[offset:offset + 4]) == b"xref":
+                lookup, trailer = self._read_xref_table(offset)
+            else:
+                lookup, trailer = self._read_xref_stream(offset)
+            self._sections.append((lookup, trailer))
+
+            for key in ("/XRefStm", "/Prev"):
+                if isinstance(trailer.get(key), int):
+                    self._pending_sections.append(trailer[key])
+            return True
+        return False
+
+    def _read_xref_table(self, offset: int):
+        subsections = []
+        position = offset + len(b"xref")
+        while True:
+            header, end = self._parse_at(position, _parse_xref_header)
+            if header is None:
+                trailer, _ = self._parse_at(position + end, lambda data: _parse_value(data, 0))
+                break
+
+            first, count, entries_start, entry_size = header
+            subsections.append((first, count, position + entries_start, entry_size))
+            position += entries_start + count * entry_size
+
+        if not isinstance(trailer, PdfDictionary):
+            msg = "Malformed PDF trailer."
+            raise ValueError(msg)  # noqa: TRY004
+
+        def lookup(number):
+            for first, count, entries_start, entry_size in subsections:
+                if first <= number < first + count:
+                    entry_offset = entries_start + (number - first) * entry_size
+                    entry = bytes(self._buffer[entry_offset:entry_offset + 18]).split()
+                    if entry[2] == b"f":
+                        return ("free",)
+                    return ("offset", int(entry[0]))
+            return None
+
+        return lookup, trailer
+
+    def _read_xref_stream(self, offset: int):
+        dictionary, data = self._read_object(offset)
+        if not isinstance(dictionary, PdfDictionary) or dictionary.get("/Type") != "/XRef" or data is None:
+            msg = "Cross-reference section not found at startxref offset."
+            raise ValueError(msg)
+
+        widths = dictionary["/W"]
+        row_size = sum(widths)
+        index = dictionary.get("/Index", [0, dictionary["/Size"]])
+        entries = {}
+        row = 0
+        for first, count in zip(index[::2], index[1::2], strict=True):
+            for number in range(first, first + count):
+                fields = []
+                position = row * row_size
+                for width in widths:
+                    fields.append(int.from_bytes(data[position:position + width], "big") if width else None)
+                    position += width
+                entry_type = 1 if fields[0] is None else fields[0]
+                if entry_type == 0:
+                    entries[number] = ("free",)
+                elif entry_type == 1:
+                    entries[number] = ("offset", fields[1])
+                else:
+                    entries[number] = ("compressed", fields[1], fields[2])
+                row += 1
+
+        return entries.get, dictionary
+
+def find_startxref(pdf_tail: bytes) -> int:
+    """
+    Finds the offset of the last cross-reference section of a PDF file.
+
+    Args:
+        pdf_tail (bytes): The last bytes of the PDF file.
+
+    Returns:
+        int: The offset stored after the last `startxref` keyword.
+
+    Raises:
+        ValueError: If the `startxref` keyword is missing or malformed.
+
+    """
+    position = pdf_tail.rfind(b"startxref")
+    if position == -1:
+        msg = "startxref not found in PDF file."
+        raise ValueError(msg)
+
+    tokens = pdf_tail[position + len(b"startxref"):].split()
+    if not tokens or not tokens[0].isdigit():
+        msg = "Malformed startxref entry in PDF file."
+        raise ValueError(msg)
+    return int(tokens[0])
+
+def decode_stream(dictionary, data: bytes) -> bytes:
+    """
+    Decodes the data of a PDF stream.
+
+    Args:
+        dictionary (PdfDictionary): The stream dictionary.
+        data (bytes): The encoded stream data.
+
+    Returns:
+        bytes: The decoded stream data.
+
+    Raises:
+        ValueError: If the stream uses an unsupported filter.
+
+    """
+    filters = dictionary.get("/Filter", [])
+    filters = filters if isinstance(filters, list) else [filters]
+    parameters = dictionary.get("/DecodeParms") or {}
+    parameters = parameters[0] if isinstance(parameters, list) else parameters
+
+    for stream_filter in filters:
+        if stream_filter != "/FlateDecode":
+            msg = f"Unsupported PDF stream filter: {stream_filter}"
+            raise ValueError(msg)
+        data = zlib.decompress(data)
+
+    if parameters.get("/Predictor", 1) >= PNG_PREDICTOR_MIN:
+        data = _decode_png_predictor(data, parameters.get("/Columns", 1))
+    return data
+
+def _decode_png_predictor(data: bytes, columns: int) -> bytes:
+    row_size = columns + 1
+    previous = bytearray(columns)
+    output = bytearray()
+    for row_start in range(0, len(data), row_size):
+        row_filter = data[row_start]
+        row = bytearray(data[row_start + 1:row_start + row_size])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            if row_filter == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif row_filter == 2:  # noqa: PLR2004
+                row[i] = (row[i] + previous[i]) & 0xFF
+            elif row_filter == 3:  # noqa: PLR2004
+                row[i] = (row[i] + (left + previous[i]) // 2) & 0xFF
+            elif row_filter == 4:  # noqa: PLR2004
+                up_left = previous[i - 1] if i else 0
+                estimate = left + previous[i] - up_left
+                distances = (abs(estimate - left), abs(estimate - previous[i]), abs(estimate - up_left))
+                row[i] = (row[i] + (left, previous[i], up_left)[distances.index(min(distances))]) & 0xFF
+        output += row
+        previous = row
+    return bytes(output)
+
+def _skip_whitespace(data: bytes, position: int) -> int:
+    length = len(data)
+    while position < length:
+        byte = data[position]
+        if byte in WHITESPACE:
+            position += 1
+        elif byte == ord("%"):
+            while position < length and data[position] not in b"\r\n":
+                position += 1
+        else:
+            return position
+    raise _TruncatedError
+
+def _read_token(data: bytes, position: int):
+    end = position
+    while end < len(data) and data[end] not in WHITESPACE and data[end] not in DELIMITERS:
+        end += 1
+    if end == len(data):
+        raise _TruncatedError
+    return data[position:end], end
+
+def _parse_value(data: bytes, position: int):  # noqa: PLR0911
+    position = _skip_whitespace(data, position)
+    if data.startswith(b"<<", position):
+        return _parse_dictionary(data, position + 2)
+    byte = data[position]
+    if byte == ord("<"):
+        return _parse_hex_string(data, position + 1)
+    if byte == ord("("):
+        return _parse_literal_string(data, position + 1)
+    if byte == ord("["):
+        return _parse_array(data, position + 1)
+    if byte == ord("/"):
+        return _parse_name(data, position + 1)
+
+    token, end = _read_token(data, position)
+    if token == b"true":
+        return True, end
+    if token == b"false":
+        return False, end
+    if token == b"null":
+        return None, end
+    if not NUMBER_PATTERN.fullmatch(token):
+        msg = f"Unexpected PDF token: {token!r}"
+        raise ValueError(msg)
+    if not INTEGER_PATTERN.fullmatch(token):
+        return float(token), end
+
+    generation, generation_end = _read_token(data, _skip_whitespace(data, end))
+    if INTEGER_PATTERN.fullmatch(generation):
+        keyword, keyword_end = _read_token(data, _skip_whitespace(data, generation_end))
+        if keyword == b"R":
+            return Reference(int(token), int(generation)), keyword_end
+    return int(token), end
+
+def _parse_dictionary(data: bytes, position: int):
+    dictionary = PdfDictionary()
+    while True:
+        position = _skip_whitespace(data, position)
+        if data.startswith(b">>", position):
+            return dictionary, position + 2
+        if data[position] != ord("/"):
+            msg = "Malformed PDF dictionary key."
+            raise ValueError(msg)
+        key, value_start = _parse_name(data, position + 1)
+        value, end = _parse_value(data, value_start)
+        dictionary[key] = value
+        dictionary.raw[key] = data[position:end]
+        position = end
+
+def _parse_array(data: bytes, position: int):
+    array = []
+    while True:
+        position = _skip_whitespace(data, position)
+        if data[position] == ord("]"):
+            return array, position + 1
+        value, position = _parse_value(data, position)
+        array.append(value)
+
+def _parse_name(data: bytes, position: int):
+    token, end = _read_token(data, position)
+    name = re.sub(rb"#([0-9A-Fa-f]{2})", lambda match: bytes.fromhex(match.group(1).decode()), token)
+    return "/" + name.decode("latin-1"), end
+
+def _parse_hex_string(data: bytes, position: int):
+    end = data.find(b">", position)
+    if end == -1:
+        raise _TruncatedError
+    digits = bytes(byte for byte in data[position:end] if byte not in WHITESPACE)
+    if len(digits) % 2:
+        digits += b"0"
+    return bytes.fromhex(digits.decode("ascii")), end + 1
+
+def _parse_literal_string(data: bytes, position: int):
+    output = bytearray()
+    depth = 1
+    while True:
+        if position >= len(data):
+            raise _TruncatedError
+        byte = data[position]
+        position += 1
+        if byte == ord("\\"):
+            if position >= len(data):
+                raise _TruncatedError
+            escaped = data[position]
+            position += 1
+            if escaped in LITERAL_ESCAPES:
+                output += LITERAL_ESCAPES[escaped]
+            elif ord("0") <= escaped <= ord("7"):
+                digits = bytes([escaped])
+                while len(digits) < 3 and position < len(data) and ord("0") <= data[position] <= ord("7"):  # noqa: PLR2004
+                    digits += data[position:position + 1]
+                    position += 1
+                output.append(int(digits, 8) & 0xFF)
+            elif escaped == ord("\r") and data.startswith(b"\n", position):
+                position += 1
+            elif escaped not in b"\r\n":
+                output.append(escaped)
+            continue
+        if byte == ord("("):
+            depth += 1
+        elif byte == ord(")"):
+            depth -= 1
+            if not depth:
+                return bytes(output), position
+        output.append(byte)
+
+def _parse_indirect_object(data: bytes, number=None):
+    object_number, position = _read_token(data, _skip_whitespace(data, 0))
+    _, position = _read_token(data, _skip_whitespace(data, position))
+    keyword, position = _read_token(data, _skip_whitespace(data, position))
+    if keyword != b"obj" or (number is not None and int(object_number) != number):
+        msg = "PDF object not found at its cross-reference offset."
+        raise ValueError(msg)
+
+    value, position = _parse_value(data, position)
+    if not isinstance(value, PdfDictionary):
+        return value, None
+
+    keyword_start = _skip_whitespace(data, position)
+    keyword, position = _read_token(data, keyword_start)
+    if keyword != b"stream":
+        return value, None
+    if data.startswith(b"\r\n", position):
+        return value, position + 2
+    if position < len(data) and data[position] in b"\r\n":
+        return value, position + 1
+    raise _TruncatedError
+
+def _parse_xref_header(data: bytes):
+    position = _skip_whitespace(data, 0)
+    if data.startswith(b"trailer", position):
+        return None, position + len(b"trailer")
+
+    first, position = _read_token(data, position)
+    count, position = _read_token(data, _skip_whitespace(data, position))
+    entries_start = _skip_whitespace(data, position)
+    if not INTEGER_PATTERN.fullmatch(first) or not INTEGER_PATTERN.fullmatch(count):
+        msg = "Malformed cross-reference subsection header."
+        raise ValueError(msg)
+
+    entry_size = XREF_ENTRY_SIZE
+    if int(count) and data[entries_start + XREF_ENTRY_SIZE - 1] not in WHITESPACE:
+        entry_size = XREF_ENTRY_SIZE - 1
+    return (int(first), int(count), entries_start, entry_size), entries_start
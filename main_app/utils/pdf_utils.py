@@ -1,66 +1,249 @@
 import logging
-import time
 from pathlib import Path
+from typing import NamedTuple
 
 from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
-from Crypto.Signature import pkcs1_15
-from PyPDF2 import PdfReader, PdfWriter
+from utils.cms import (
+    SignedData,
+    build_signed_attributes,
+    build_signed_data,
+    key_id,
+    parse_signed_data,
+    placeholder_size,
+    sign_attributes,
+    verify_signed_data,
+)
+from utils.keyring import index_public_keys
+from utils.manifest import (
+    MANIFEST_OID,
+    Manifest,
+    encode_manifest,
+    get_manifest,
+    hash_chunks,
+    locate_changes,
+    manifest_hash,
+    manifest_size,
+)
+from utils.merkle import digest_matches, document_digest, get_proof, verify_root
+from utils.pdf_document import PdfDocument
+from utils.pdf_trailer import FileBuffer, PdfDictionary, PdfTrailer, Reference
 
 logger = logging.getLogger("global_logger")
 
-def sign_pdf(pdf_path: str, rsa_key: RSA.RsaKey, progress_signal=None):
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_PROGRESS_START = 30
+HASH_PROGRESS_END = 70
+BYTE_RANGE_WIDTH = 64
+BYTE_RANGE_LENGTH = 4
+
+class SignatureResult(NamedTuple):
+    """
+    SignatureResult is the verification result of one signature of a PDF document.
+
+    Attributes:
+        index (int): The position of the signature in the signing order, starting at 0.
+        byte_range (list[int]): The byte range of the signature.
+        intact (bool): Whether the signed content is unchanged, whoever signed it.
+        public_key (RSA.RsaKey | None): The public key the signature was verified with, if any matched.
+        error (str | None): The reason the signature is invalid, if it is.
+        key_id (bytes | None): The key identifier of the signer named by the signature, if it could be parsed.
+        changed_ranges (list[tuple[int, int]] | None): The (offset, length) ranges that changed after signing,
+                                                      known only for a valid signature with a chunk manifest.
+        valid (bool): Whether the signed content is unchanged and one of the public keys verifies the signature.
+
+    """
+
+    index: int
+    byte_range: list
+    intact: bool
+    public_key: RSA.RsaKey | None = None
+    error: str | None = None
+    key_id: bytes | None = None
+    changed_ranges: list | None = None
+
+    @property
+    def valid(self) -> bool:
+        return self.intact and self.public_key is not None
+
+def sign_pdf(pdf_path: str, rsa_key: RSA.RsaKey, progress_signal=None, output_path: str | None = None,
+             chunk_size: int | None = None):
     """
     Signs a PDF file using the provided RSA key.
 
+    The original bytes of the document are left untouched, including any earlier signatures: each
+    signer adds its own revision (see `sign_document`). The signature is stored in a single
+    incremental-update section (signature dictionary, new Info object, cross-reference section and
+    trailer) appended to the end of the file, so the document is read, hashed and written exactly once.
+    The signature covers every byte of the signed file except its own `/Contents` value, as listed in
+    the `/ByteRange` of the signature dictionary. The file is opened and memory-mapped once, and that
+    mapping serves parsing, hashing and appending.
+
+    If an output path is given, the input file is not modified at all. It is cloned to the output path
+    (see `PdfDocument.copy_to`), and the signature section is written to the clone only.
+
     Args:
         pdf_path (str): The path to the PDF file to be signed.
         rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
         progress_signal (optional): A signal to report progress, if applicable.
+        output_path (str, optional): The path the signed PDF is written to. Defaults to None, which
+                                     signs the PDF file in place.
+        chunk_size (int, optional): Signs a manifest of the digests of chunks of this size instead of
+                                    the bytes themselves (see `sign_document`). Defaults to None.
 
     Raises:
         Exception: If an error occurs during the signing process.
 
     This function performs the following steps:
         1. Checks if the PDF file exists.
-        2. Initializes the signing process.
-        3. Reads the content of the PDF file.
-        4. Initializes the PDF writer and reader.
-        5. Hashes the PDF content.
-        6. Creates a signature using the RSA key and the PDF hash.
-        7. Adds the signature to the PDF.
-        8. Saves the signed PDF file.
+        2. Maps the PDF file and reads its trailer.
+        3. Builds the incremental update with an empty signature placeholder.
+        4. Hashes the byte ranges covered by the signature.
+        5. Creates a signature using the RSA key and the PDF hash.
+        6. Appends the incremental update holding the signature to the PDF file or to its copy.
 
     """
     check_pdf_exists(pdf_path, progress_signal)
+    if output_path is not None and Path(output_path).exists() and Path(output_path).samefile(pdf_path):
+        output_path = None
+
     try:
-        pdf_path = initialize_signing_process(pdf_path, progress_signal)
-        pdf_content = read_pdf_file(pdf_path)
-        pdf_hash = hash_pdf(pdf_content, progress_signal)
-
-        temp_pdf_path = clear_signature_metadata(pdf_path)
-        pdf_content = read_pdf_file(temp_pdf_path)
-        pdf_hash = hash_pdf(pdf_content, progress_signal)
-
-        signature = create_signature(rsa_key, pdf_hash, progress_signal)
-        result_path = add_signature_to_pdf(temp_pdf_path, signature, progress_signal)
-        pdf_content = read_pdf_file(result_path)
-        pdf_hash = hash_pdf(pdf_content, progress_signal)
+        with PdfDocument(pdf_path, writable=output_path is None) as document:
+            section = sign_document(document, rsa_key, progress_signal, chunk_size)
+            if output_path is None:
+                document.append(section)
+            else:
+                document.copy_to(output_path, section)
     except Exception:
-        logger.exception("Error while signing PDF File: %s")
+        logger.exception("Error while signing PDF File: %s", pdf_path)
         raise
+    logger.info("PDF File successfully signed: %s", output_path or pdf_path)
 
-def verify_pdf(pdf_path: str, public_key: RSA.RsaKey, progress_signal=None) -> bool:
+def sign_bytes(pdf_data, rsa_key: RSA.RsaKey, output=None, progress_signal=None, chunk_size: int | None = None):
     """
-    Verifies the digital signature of a PDF file.
+    Signs in-memory PDF content using the provided RSA key.
+
+    Works like `sign_pdf` without touching the filesystem. The input is hashed in place, and the
+    signed document is the unchanged input followed by the signature section.
+
+    Args:
+        pdf_data (bytes | bytearray | memoryview | BinaryIO): The PDF content to be signed.
+        rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
+        output (BinaryIO, optional): A binary stream the signed PDF is written to. Defaults to None.
+        progress_signal (optional): A signal to report progress, if applicable.
+        chunk_size (int, optional): Signs a manifest of chunk digests of this size (see `sign_document`).
+                                    Defaults to None.
+
+    Returns:
+        bytes | None: The signed PDF content, or None if it was written to `output`.
+
+    Raises:
+        Exception: If an error occurs during the signing process.
+
+    """
+    try:
+        with PdfDocument.from_bytes(pdf_data) as document:
+            section = sign_document(document, rsa_key, progress_signal, chunk_size)
+            if output is None:
+                signed_data = b"".join((document.view, section))
+            else:
+                output.write(document.view)
+                output.write(section)
+                signed_data = None
+    except Exception:
+        logger.exception("Error while signing in-memory PDF")
+        raise
+    logger.info("In-memory PDF successfully signed")
+    return signed_data
+
+def sign_document(document: PdfDocument, rsa_key: RSA.RsaKey, progress_signal=None,
+                  chunk_size: int | None = None) -> bytearray:
+    """
+    Creates the signature section of a PDF document.
+
+    The first signature covers the whole document. Every later signature continues a hash chain
+    instead of covering the document again: its digest is the SHA-256 of the previous digest followed
+    by the bytes from the start of the previous signature value to the end of the new revision. The
+    previous digest is read from the message digest of the previous CMS signature, so earlier
+    revisions are not hashed again.
+
+    The signature is a detached CMS SignedData structure whose message digest attribute holds the
+    digest. It is written as a hex string into a `/Contents` placeholder of fixed size, reserved before
+    hashing, so storing it patches the placeholder in the section at a known offset and changes no
+    other byte.
+
+    With a chunk size, the signed bytes are hashed as chunks of that size by several threads at once,
+    and the signature covers a manifest of the chunk digests instead (see `manifest_hash`). The manifest
+    is stored in the signature, so verification can tell which chunks changed.
+
+    Args:
+        document (PdfDocument): The PDF document to be signed.
+        rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
+        progress_signal (optional): A signal to report progress, if applicable.
+        chunk_size (int, optional): The chunk size of the manifest, such as MANIFEST_CHUNK_SIZE.
+                                    Defaults to None, which signs without a manifest.
+
+    Returns:
+        bytearray: The incremental-update section holding the signature, to be written after the document.
+
+    """
+    signature_size = placeholder_size(rsa_key, manifest_size(document.size, chunk_size) if chunk_size else 0)
+    section, byte_range, pdf_hash, unsigned_attributes = prepare_document(
+        document, signature_size, progress_signal, chunk_size
+    )
+    signature = create_signature(rsa_key, pdf_hash, progress_signal, unsigned_attributes)
+    return add_signature_to_pdf(section, byte_range, signature, progress_signal)
+
+def prepare_document(document: PdfDocument, signature_size: int, progress_signal=None, chunk_size: int | None = None):
+    """
+    Builds the signature section of a PDF document with an empty placeholder and hashes what it will cover.
+
+    This is everything `sign_document` does before the private key is needed.
+
+    Args:
+        document (PdfDocument): The PDF document to be signed.
+        signature_size (int): The size of the placeholder to reserve (see `placeholder_size`).
+        progress_signal (optional): A signal to report progress, if applicable.
+        chunk_size (int, optional): The chunk size of a manifest to sign. Defaults to None.
+
+    Returns:
+        tuple: The incremental-update section, its byte range, the SHA-256 hash object to be signed and
+        the unsigned attributes to store with the signature.
+
+    """
+    trailer = initialize_signing_process(document, progress_signal)
+    signatures = find_signatures(trailer)
+    previous_digest = document_digest(parse_signed_data(signatures[-1][1]["/Contents"])) if signatures else b""
+    section, byte_range = build_incremental_update(trailer, document, signature_size, signatures)
+    byte_ranges = [(byte_range[0], document.size - byte_range[0])]
+    if chunk_size:
+        if progress_signal:
+            progress_signal.emit("Hashing PDF File in chunks...", HASH_PROGRESS_START)
+        digests = hash_chunks(document, byte_ranges, chunk_size, get_signed_parts(section, byte_range))
+        manifest = Manifest(chunk_size, digests)
+        logger.info("Hashed %d chunks of %d bytes", len(digests), chunk_size)
+        return section, byte_range, manifest_hash(previous_digest, manifest), {MANIFEST_OID: encode_manifest(manifest)}
+
+    pdf_hash = hash_pdf(
+        document, byte_ranges, progress_signal, get_signed_parts(section, byte_range), previous_digest
+    )
+    return section, byte_range, pdf_hash, {}
+
+def verify_pdf(pdf_path: str, public_key, progress_signal=None) -> list[SignatureResult]:
+    """
+    Verifies all digital signatures of a PDF file.
+
+    The file is read once, in file order: every signature continues the hash chain of the previous
+    one (see `sign_document`), so all signatures are checked in a single sequential pass.
 
     Args:
         pdf_path (str): The file path to the PDF document to be verified.
-        public_key (RSA.RsaKey): The public RSA key used to verify the signature.
+        public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Keyring): The public RSA key, the keys of all signers,
+                                                                  or a keyring, used to verify the signatures.
         progress_signal (optional): A signal to report progress, if applicable.
 
     Returns:
-        bool: True if the PDF signature is valid, False otherwise.
+        list[SignatureResult]: The result of every signature, in signing order.
 
     Raises:
         Exception: If an error occurs during the verification process.
@@ -68,13 +251,116 @@ def verify_pdf(pdf_path: str, public_key: RSA.RsaKey, progress_signal=None) -> b
     """
     check_pdf_exists(pdf_path, progress_signal)
     try:
-        reader, signature = read_pdf_metadata(pdf_path, progress_signal)
-        pdf_hash = prepare_unsigned_pdf(reader, pdf_path, progress_signal)
-        verify_signature(public_key, pdf_hash, signature, pdf_path, progress_signal)
+        with PdfDocument(pdf_path) as document:
+            return verify_document(document, public_key, progress_signal)
     except Exception:
         logger.exception("Error verifying signature: %s", pdf_path)
         raise
 
+def verify_bytes(pdf_data, public_key, progress_signal=None) -> list[SignatureResult]:
+    """
+    Verifies all digital signatures of in-memory PDF content.
+
+    Works like `verify_pdf` without touching the filesystem. The content is hashed in place.
+
+    Args:
+        pdf_data (bytes | bytearray | memoryview | BinaryIO): The signed PDF content.
+        public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Keyring): The public RSA key, the keys of all signers,
+                                                                  or a keyring, used to verify the signatures.
+        progress_signal (optional): A signal to report progress, if applicable.
+
+    Returns:
+        list[SignatureResult]: The result of every signature, in signing order.
+
+    Raises:
+        Exception: If an error occurs during the verification process.
+
+    """
+    try:
+        with PdfDocument.from_bytes(pdf_data) as document:
+            return verify_document(document, public_key, progress_signal)
+    except Exception:
+        logger.exception("Error verifying signature of in-memory PDF")
+        raise
+
+def verify_document(document: PdfDocument, public_key, progress_signal=None,
+                    hash_signed_ranges=None) -> list[SignatureResult]:
+    """
+    Verifies all digital signatures of a PDF document in a single pass.
+
+    Args:
+        document (PdfDocument): The signed PDF document.
+        public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Keyring): The public RSA key, the keys of all signers,
+                                                                  or a keyring, used to verify the signatures.
+        progress_signal (optional): A signal to report progress, if applicable.
+        hash_signed_ranges (Callable, optional): Hashes the byte ranges of a signature in place of
+            `prepare_unsigned_pdf`, with the same arguments and results. Defaults to None.
+
+    Returns:
+        list[SignatureResult]: The result of every signature, in signing order.
+
+    Raises:
+        ValueError: If the document has no signature.
+
+    """
+    keys_by_id = index_public_keys(public_key)
+    hash_signed_ranges = hash_signed_ranges or prepare_unsigned_pdf
+    _, signatures = read_pdf_metadata(document, progress_signal)
+
+    results = []
+    previous_range = None
+    previous_digest = b""
+    for index, (_, signature_dictionary) in enumerate(signatures):
+        byte_range = signature_dictionary.get("/ByteRange")
+        try:
+            if previous_digest is None:
+                msg = "A previous signature is malformed."
+                raise ValueError(msg)  # noqa: TRY301
+            check_byte_range(document, signature_dictionary, previous_range, is_last=index == len(signatures) - 1)
+            signed_data = parse_signed_data(signature_dictionary["/Contents"])
+            # A malformed Merkle proof or manifest is rejected before anything is hashed.
+            get_proof(signed_data)
+            manifest = get_manifest(signed_data)
+        except ValueError as e:
+            logger.exception("Invalid signature %d of %s", index + 1, document.path)
+            results.append(SignatureResult(index, byte_range, intact=False, error=str(e)))
+            previous_digest = None
+            continue
+
+        pdf_hash, digests = hash_signed_ranges(document, byte_range, previous_digest, progress_signal, manifest)
+        if not digest_matches(signed_data, pdf_hash.digest()):
+            logger.error("Signature %d of %s does not match the PDF content", index + 1, document.path)
+            changed_ranges = None
+            # The manifest only tells what changed if the signature vouches for it.
+            if (
+                manifest is not None
+                and digest_matches(signed_data, manifest_hash(previous_digest, manifest).digest())
+                and verify_signature(keys_by_id, signed_data, document.path) is not None
+            ):
+                changed_ranges = locate_changes(get_signed_ranges(byte_range), manifest, digests)
+            results.append(SignatureResult(
+                index, byte_range, intact=False, error=_modified_error(changed_ranges),
+                key_id=signed_data.key_id, changed_ranges=changed_ranges,
+            ))
+        else:
+            if progress_signal:
+                progress_signal.emit(f"Verifying signature {index + 1} of {len(signatures)}...", 80)
+            matching_key = verify_signature(keys_by_id, signed_data, document.path)
+            results.append(SignatureResult(
+                index, byte_range, intact=True, public_key=matching_key,
+                error=None if matching_key is not None else "Signature verification failed.",
+                key_id=signed_data.key_id,
+            ))
+        previous_range = byte_range
+        previous_digest = pdf_hash.digest()
+
+    if progress_signal:
+        if all(result.valid for result in results):
+            progress_signal.emit("Signature verification successful.", 100)
+        else:
+            progress_signal.emit("Error: Signature verification failed.", 100)
+    return results
+
 def check_pdf_exists(pdf_path: str, progress_signal=None):
     """
     Checks if a PDF file exists at the given path.
@@ -95,175 +381,294 @@ def check_pdf_exists(pdf_path: str, progress_signal=None):
         msg = f"PDF file not found: {pdf_path}"
         raise FileNotFoundError(msg)
 
-def initialize_signing_process(pdf_path: str, progress_signal=None):
+def initialize_signing_process(document: PdfDocument, progress_signal=None):
     """
     Initializes the process of signing a PDF file.
 
+    Parses the last trailer of the document. Objects are parsed from the mapping on demand.
+
     Args:
-        pdf_path (str): The path to the PDF file that needs to be signed.
+        document (PdfDocument): The mapped PDF file that needs to be signed.
         progress_signal (optional): A signal object to emit progress updates.
                                     If provided, it should have an `emit` method
                                     that accepts a message and a progress percentage.
 
     Returns:
-        None
+        PdfTrailer: The trailer of the PDF file.
+
+    Raises:
+        ValueError: If the PDF file is encrypted.
 
     """
     if progress_signal:
         progress_signal.emit("Initializing PDF File signing...", 20)
-    logger.info("Signing PDF File: %s", pdf_path)
-    reader = PdfReader(pdf_path)
-    writer = PdfWriter()
-
-    for page in reader.pages:
-        writer.add_page(page)
+    logger.info("Signing PDF File: %s", document.path)
+    trailer = PdfTrailer(document.view)
 
-    metadata = reader.metadata
-    writer.add_metadata(metadata)
+    if "/Encrypt" in trailer.dictionary:
+        msg = "Encrypted PDF files are not supported."
+        raise ValueError(msg)
 
-    with Path.open(pdf_path, "wb") as f:
-        writer.write(f)
-    return pdf_path
+    return trailer
 
-def read_pdf_file(pdf_path: str):
+def hash_pdf(document: PdfDocument, byte_ranges, progress_signal=None, appended_parts=(), previous_digest=b""):
     """
-    Reads the content of a PDF file.
+    Hashes the signed parts of a PDF file using SHA-256.
+
+    The byte ranges are hashed as fixed-size memoryview slices of the mapped file, so nothing is
+    copied and the pages of each processed slice are released right away. Progress is reported from
+    the number of bytes actually hashed.
 
     Args:
-        pdf_path (str): The path to the PDF file.
+        document (PdfDocument): The mapped PDF file.
+        byte_ranges (list[tuple[int, int]]): The (offset, length) ranges of the file to hash, in file order.
+        progress_signal (optional): A signal to emit progress updates.
+                                    If provided, it will emit a message indicating the progress of the hashing process.
+        appended_parts (Iterable[bytes], optional): In-memory parts hashed after the byte ranges of the file.
+        previous_digest (bytes, optional): The digest of the previous signature, hashed first to continue the
+                                           hash chain of a document with several signatures. Defaults to b"".
 
     Returns:
-        bytes: The content of the PDF file as bytes.
+        SHA256: The SHA-256 hash object of the PDF content.
+
+    Raises:
+        ValueError: If a byte range ends beyond the end of the file.
 
     """
-    with Path.open(pdf_path, "rb") as f:
-        return f.read()
+    pdf_hash = SHA256.new(previous_digest)
+    total_size = sum(length for _, length in byte_ranges)
+    hashed_size = 0
+    reported_progress = None
+
+    for offset, length in byte_ranges:
+        if offset + length > document.size:
+            msg = "Unexpected end of PDF file."
+            raise ValueError(msg)
+
+        for chunk_offset in range(offset, offset + length, HASH_CHUNK_SIZE):
+            chunk_size = min(HASH_CHUNK_SIZE, offset + length - chunk_offset)
+            pdf_hash.update(document.view[chunk_offset:chunk_offset + chunk_size])
+            document.release(chunk_offset, chunk_size)
+            hashed_size += chunk_size
+
+            progress = HASH_PROGRESS_START + (HASH_PROGRESS_END - HASH_PROGRESS_START) * hashed_size // total_size
+            if progress_signal and progress != reported_progress:
+                reported_progress = progress
+                progress_signal.emit(
+                    f"Hashing PDF File... {hashed_size / 2**20:.1f} / {total_size / 2**20:.1f} MB", progress
+                )
+
+    for part in appended_parts:
+        pdf_hash.update(part)
+    logger.info("Generated PDF hash: %s", pdf_hash.hexdigest())
+    return pdf_hash
 
-def clear_signature_metadata(pdf_path: str):
+def create_signature(rsa_key: RSA.RsaKey, pdf_hash, progress_signal=None, unsigned_attributes=None):
     """
-    Removes signature metadata from the PDF file.
+    Creates a CMS signature for a given PDF hash using the provided RSA key.
 
     Args:
-        pdf_path (str): The path to the PDF file.
+        rsa_key (RSA.RsaKey): The RSA key to sign the PDF hash.
+        pdf_hash: The hash of the PDF to be signed.
+        progress_signal (optional): A signal to emit progress updates. Defaults to None.
+        unsigned_attributes (dict[str, bytes], optional): DER-encoded unsigned attributes by OID. Defaults to None.
 
     Returns:
-        str: The path to the cleaned PDF file.
+        bytes: The DER-encoded CMS SignedData structure of the PDF hash.
 
     """
-    reader = PdfReader(pdf_path)
-    writer = PdfWriter()
-
-    for page in reader.pages:
-        writer.add_page(page)
+    if progress_signal:
+        progress_signal.emit("Creating signature...", 75)
+    signed_attributes = build_signed_attributes(pdf_hash.digest())
+    signature = build_signed_data(
+        key_id(rsa_key), signed_attributes, sign_attributes(rsa_key, signed_attributes), unsigned_attributes
+    )
+    logger.info("Generated signature: %s", signature.hex())
+    return signature
 
-    with Path.open(pdf_path, "wb") as f:
-        writer.write(f)
+def build_incremental_update(trailer: PdfTrailer, document: PdfDocument, signature_size: int, signatures=()):
+    """
+    Builds the incremental-update section that stores the signature of a PDF file.
 
-    logger.info("Signature metadata cleared. New file saved: %s", pdf_path)
-    return pdf_path
+    The cross-reference section has the same form as the last one of the file: a cross-reference
+    stream if the file uses them, a classic table otherwise. Object streams, cross-reference streams
+    and the linearized first-page data of the original file stay exactly where they are.
 
-def hash_pdf(pdf_content: bytes, progress_signal=None):
-    """
-    Hashes the content of a PDF file using SHA-256.
+    The section holds a signature dictionary with a zero-filled `/Contents` placeholder sized for the
+    signature, a new document information dictionary (a copy of the current one whose `/Signature`
+    entry references the new signature dictionary and whose `/Signatures` array lists all signature
+    dictionaries in signing order, with all other entries copied byte for byte), a
+    cross-reference section for both objects and a
+    trailer chained to the previous cross-reference section through `/Prev`. The section starts
+    with an end-of-line marker if the file does not already end with one.
 
     Args:
-        pdf_content (bytes): The content of the PDF file to be hashed.
-        progress_signal (optional): A signal to emit progress updates.
-                                    If provided, it will emit a message indicating the progress of the hashing process.
+        trailer (PdfTrailer): The trailer of the unsigned PDF file.
+        document (PdfDocument): The mapped PDF file the section will be appended to.
+        signature_size (int): The size reserved for the DER-encoded signature in bytes.
+        signatures (list[tuple[Reference, PdfDictionary]], optional): The existing signatures of the PDF file.
 
     Returns:
-        SHA256: The SHA-256 hash object of the PDF content.
+        tuple: A tuple containing the section as a bytearray and its byte range as a list of four integers.
+        The byte range starts at the beginning of the file for the first signature, and at the start of the
+        previous signature value otherwise.
 
     """
-    if progress_signal:
-        progress_signal.emit("Hashing PDF File...", 40)
-    time.sleep(0.5)
-    pdf_hash = SHA256.new(pdf_content)
-    logger.info("Generated PDF hash: %s", pdf_hash.hexdigest())
-    return pdf_hash
-
-def create_signature(rsa_key: RSA.RsaKey, pdf_hash, progress_signal=None):
+    signature_number = trailer.dictionary["/Size"]
+    info_number = signature_number + 1
+    section_offset = document.size
+
+    section = bytearray() if document.tail(1) in {b"\n", b"\r"} else bytearray(b"\n")
+    signature_offset = section_offset + len(section)
+    section += b"%d 0 obj\n<<\n/Type /Sig\n/Filter /PaDeS\n/SubFilter /PaDeS.cms_sha256\n/ByteRange " % signature_number
+    byte_range_offset = len(section)
+    section += b" " * BYTE_RANGE_WIDTH + b"\n/Contents "
+    hole_start = section_offset + len(section)
+    section += b"<" + b"0" * (2 * signature_size) + b">"
+    hole_end = section_offset + len(section)
+    section += b"\n>>\nendobj\n"
+
+    info = trailer.info() or PdfDictionary()
+    info_offset = section_offset + len(section)
+    section += b"%d 0 obj\n<<\n" % info_number
+    for key, entry in info.raw.items():
+        if key not in {"/Signature", "/Signatures"}:
+            section += entry + b"\n"
+    references = [b"%d %d R" % reference for reference, _ in signatures] + [b"%d 0 R" % signature_number]
+    section += b"/Signatures [%s]\n/Signature %d 0 R\n>>\nendobj\n" % (b" ".join(references), signature_number)
+
+    xref_offset = section_offset + len(section)
+    trailer_entries = b"%s\n/Info %d 0 R\n/Prev %d\n" % (
+        trailer.dictionary.raw["/Root"], info_number, trailer.startxref
+    )
+    if "/ID" in trailer.dictionary:
+        trailer_entries += trailer.dictionary.raw["/ID"] + b"\n"
+
+    if trailer.dictionary.get("/Type") == "/XRef":
+        section += build_xref_stream(signature_number, [signature_offset, info_offset, xref_offset], trailer_entries)
+    else:
+        section += build_xref_table(signature_number, [signature_offset, info_offset], trailer_entries)
+    section += b"startxref\n%d\n%%%%EOF\n" % xref_offset
+
+    section_end = section_offset + len(section)
+    range_start = get_hole(signatures[-1][1])[0] if signatures else 0
+    byte_range = [range_start, hole_start - range_start, hole_end, section_end - hole_end]
+    section[byte_range_offset:byte_range_offset + BYTE_RANGE_WIDTH] = (
+        b"[%d %d %d %d]" % tuple(byte_range)
+    ).ljust(BYTE_RANGE_WIDTH)
+    return section, byte_range
+
+def build_xref_table(first_number: int, offsets: list[int], trailer_entries: bytes) -> bytes:
     """
-    Creates a digital signature for a given PDF hash using the provided RSA key.
+    Builds a classic cross-reference section with its trailer for consecutive new objects.
 
     Args:
-        rsa_key (RSA.RsaKey): The RSA key to sign the PDF hash.
-        pdf_hash: The hash of the PDF to be signed.
-        progress_signal (optional): A signal to emit progress updates. Defaults to None.
+        first_number (int): The number of the first object.
+        offsets (list[int]): The offsets of the objects.
+        trailer_entries (bytes): The trailer entries other than `/Size`.
 
     Returns:
-        bytes: The digital signature of the PDF hash.
+        bytes: The cross-reference table followed by the trailer.
 
     """
-    if progress_signal:
-        progress_signal.emit("Creating signature...", 60)
-    time.sleep(0.5)
-    signature = pkcs1_15.new(rsa_key).sign(pdf_hash)
-    logger.info("Generated signature: %s", signature.hex())
-    return signature
+    table = b"xref\n%d %d\n" % (first_number, len(offsets))
+    table += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    return table + b"trailer\n<<\n/Size %d\n%s>>\n" % (first_number + len(offsets), trailer_entries)
 
-def add_signature_to_pdf(pdf_path, signature: bytes, progress_signal=None):
+def build_xref_stream(first_number: int, offsets: list[int], trailer_entries: bytes) -> bytes:
     """
-    Adds a digital signature to the metadata of the PDF file.
+    Builds an uncompressed cross-reference stream object for consecutive new objects.
+
+    The last object is the cross-reference stream itself.
 
     Args:
-        pdf_path (str): The path to the PDF file.
-        signature (bytes): The digital signature to be added.
-        progress_signal (optional): A signal to emit progress updates.
+        first_number (int): The number of the first object.
+        offsets (list[int]): The offsets of the objects, ending with the offset of the stream object.
+        trailer_entries (bytes): The trailer entries other than `/Size`, `/Type`, `/W`, `/Index` and `/Length`.
 
     Returns:
-        str: The path to the signed PDF file.
+        bytes: The cross-reference stream object.
 
     """
-    reader = PdfReader(pdf_path)
-    writer = PdfWriter()
-
-    for page in reader.pages:
-        writer.add_page(page)
-
-    if progress_signal:
-        progress_signal.emit("Adding signature to PDF File...", 80)
-    time.sleep(0.5)
-    writer.add_metadata({"/Signature": signature.hex()})
-
-    with Path.open(pdf_path, "wb") as f:
-        writer.write(f)
+    offset_width = max((offsets[-1].bit_length() + 7) // 8, 1)
+    data = b"".join(b"\x01" + offset.to_bytes(offset_width, "big") + b"\x00\x00" for offset in offsets)
+    return (
+        b"%d 0 obj\n<<\n/Type /XRef\n/Size %d\n/W [1 %d 2]\n/Index [%d %d]\n%s/Length %d\n>>\nstream\n"
+        % (first_number + len(offsets) - 1, first_number + len(offsets), offset_width, first_number, len(offsets),
+           trailer_entries, len(data))
+        + data
+        + b"\nendstream\nendobj\n"
+    )
+
+def get_signed_parts(section: bytearray, byte_range: list[int]):
+    """
+    Splits the signature section into the parts covered by the signature.
 
-    if progress_signal:
-        progress_signal.emit("Finalizing process...", 95)
-    time.sleep(0.5)
-    logger.info("PDF File successfully signed: %s", pdf_path)
+    Args:
+        section (bytearray): The incremental-update section.
+        byte_range (list[int]): The byte range of the signature.
 
-    return pdf_path
+    Returns:
+        tuple: The signed parts of the section, in file order.
 
-def save_signed_pdf(pdf_path: str, writer, progress_signal=None):
     """
-    Saves the signed PDF file.
+    section_offset = byte_range[2] + byte_range[3] - len(section)
+    section_view = memoryview(section)
+    return (
+        section_view[:byte_range[0] + byte_range[1] - section_offset],
+        section_view[byte_range[2] - section_offset:],
+    )
+
+def add_signature_to_pdf(section: bytearray, byte_range: list[int], signature: bytes, progress_signal=None):
+    """
+    Stores the digital signature in its placeholder in the signature section.
+
+    The signature is written over the start of the zero-filled placeholder, so the size of the section
+    and every offset in it stay the same.
 
     Args:
-        pdf_path (str): The path to save the signed PDF file.
-        writer (PdfWriter): The PdfWriter object containing the signed content.
+        section (bytearray): The incremental-update section.
+        byte_range (list[int]): The byte range of the signature.
+        signature (bytes): The DER-encoded CMS signature to be added.
         progress_signal (optional): A signal to emit progress updates.
 
+    Returns:
+        bytearray: The signature section, ready to be written after the document.
+
+    Raises:
+        ValueError: If the signature does not fit in its placeholder.
+
     """
-    with Path.open(pdf_path, "wb") as f:
-        writer.write(f)
+    if progress_signal:
+        progress_signal.emit("Adding signature to PDF File...", 85)
+    section_offset = byte_range[2] + byte_range[3] - len(section)
+    hole_start = byte_range[0] + byte_range[1] - section_offset + 1
+    hole_end = byte_range[2] - section_offset - 1
+    signature_hex = signature.hex().encode()
+    if len(signature_hex) > hole_end - hole_start:
+        msg = "Signature does not fit in its placeholder."
+        raise ValueError(msg)
+    section[hole_start:hole_start + len(signature_hex)] = signature_hex
 
     if progress_signal:
         progress_signal.emit("Finalizing process...", 95)
-    time.sleep(0.5)
-    logger.info("PDF File successfully signed: %s", pdf_path)
 
-def read_pdf_metadata(pdf_path: str, progress_signal=None):
+    return section
+
+def read_pdf_metadata(document: PdfDocument, progress_signal=None):
     """
-    Reads the metadata of a PDF file to extract the signature.
+    Reads the metadata of a PDF file to extract the signatures.
+
+    Only the last trailer, the Info object and the signature dictionaries are parsed, so the cost does
+    not depend on the size of the document.
 
     Args:
-        pdf_path (str): The path to the PDF file.
+        document (PdfDocument): The mapped PDF file.
         progress_signal (optional): A signal to emit progress updates. Defaults to None.
 
     Returns:
-        tuple: A tuple containing the PdfReader object and the signature in bytes.
+        tuple: A tuple containing the PdfTrailer object and the signatures, as (Reference, PdfDictionary)
+        pairs in signing order.
 
     Raises:
         ValueError: If no signature is found in the PDF metadata.
@@ -271,89 +676,229 @@ def read_pdf_metadata(pdf_path: str, progress_signal=None):
 
     """
     try:
-        reader = PdfReader(pdf_path)
-        signature_hex = reader.metadata.get("/Signature")
-        if not signature_hex:
+        trailer = PdfTrailer(document.view)
+        signatures = find_signatures(trailer)
+        if not signatures:
             msg = "No signature found in PDF metadata."
             raise ValueError(msg)  # noqa: TRY301
-        logger.info("Retrieved signature from metadata: %s", signature_hex)
-        return reader, bytes.fromhex(signature_hex)
     except Exception:
-        logger.exception("Error reading PDF metadata: %s", pdf_path)
+        logger.exception("Error reading PDF metadata: %s", document.path)
         if progress_signal:
             progress_signal.emit("Error: Failed to read PDF metadata.", 100)
         raise
 
-def prepare_unsigned_pdf(reader, pdf_path: str, progress_signal=None):
+    logger.info("Retrieved %d signatures from metadata", len(signatures))
+    return trailer, signatures
+
+def find_signatures(trailer: PdfTrailer):
     """
-    Creates a temporary unsigned version of the PDF for signature verification.
+    Resolves the signature dictionaries referenced by the document information dictionary.
+
+    The `/Signatures` array lists them in signing order. A document signed once before the array was
+    introduced only has the `/Signature` entry.
 
     Args:
-        reader (PdfReader): The PdfReader object of the original PDF.
-        pdf_path (str): The path to the original PDF file.
-        progress_signal (optional): A signal to emit progress updates.
+        trailer (PdfTrailer): The trailer of the PDF file.
 
     Returns:
-        SHA256.SHA256Hash: The hash of the unsigned PDF content.
+        list[tuple[Reference, PdfDictionary]]: The signatures in signing order, empty if the PDF file is not signed.
+
+    Raises:
+        ValueError: If a signature dictionary is malformed.
 
     """
-    writer = PdfWriter()
+    info = trailer.info()
+    if info is None:
+        return []
+    references = info.get("/Signatures")
+    if not isinstance(references, list):
+        references = [info["/Signature"]] if "/Signature" in info else []
+
+    signatures = []
+    for reference in references:
+        signature_dictionary = trailer.resolve(reference)
+        if (
+            not isinstance(reference, Reference)
+            or not isinstance(signature_dictionary, PdfDictionary)
+            or signature_dictionary.get("/Type") != "/Sig"
+            or not isinstance(signature_dictionary.get("/Contents"), bytes)
+        ):
+            msg = "Malformed signature dictionary."
+            raise ValueError(msg)
+        get_hole(signature_dictionary)
+        signatures.append((reference, signature_dictionary))
+    return signatures
+
+def get_hole(signature_dictionary: PdfDictionary):
+    """
+    Returns the part of the file a signature byte range leaves out, which holds the signature value.
 
-    if progress_signal:
-        progress_signal.emit("Extracting signature...", 50)
-    time.sleep(1)
+    Args:
+        signature_dictionary (PdfDictionary): The signature dictionary.
 
-    try:
-        for page in reader.pages:
-            writer.add_page(page)
+    Returns:
+        tuple: The start and end offsets of the hole and the end offset of the byte range.
 
-        temp_pdf_path = pdf_path.replace(".pdf", "_temp.pdf")
-        with Path.open(temp_pdf_path, "wb") as f:
-            writer.write(f)
+    Raises:
+        ValueError: If the byte range is malformed.
 
-        with Path.open(temp_pdf_path, "rb") as f:
-            pdf_content = f.read()
-        
-        Path(temp_pdf_path).unlink()
+    """
+    byte_range = signature_dictionary.get("/ByteRange")
+    if (
+        not isinstance(byte_range, list)
+        or len(byte_range) != BYTE_RANGE_LENGTH
+        or not all(isinstance(value, int) and value >= 0 for value in byte_range)
+    ):
+        msg = "Malformed signature byte range."
+        raise ValueError(msg)
 
-        return SHA256.new(pdf_content)
-    except Exception:
-        logger.exception("Error processing PDF file: %s", pdf_path)
-        if progress_signal:
-            progress_signal.emit("Error: Failed to process PDF file.", 100)
-        raise
+    start, length, hole_end, tail_length = byte_range
+    if not start < start + length < hole_end:
+        msg = "Malformed signature byte range."
+        raise ValueError(msg)
+    return start + length, hole_end, hole_end + tail_length
 
-def verify_signature(public_key: RSA.RsaKey, pdf_hash, signature: bytes, pdf_path: str, progress_signal=None):
+def read_signature_info(pdf_path: str):
     """
-    Verifies the digital signature of a PDF document.
+    Reads the signature dictionaries of a PDF file without parsing the rest of the document.
+
+    Meant for screening many files. Only the end of the file, the cross-reference entries of the
+    Info and signature objects and the objects themselves are read, which amounts to a few kilobytes
+    of I/O regardless of the size of the document.
 
     Args:
-        public_key (RSA.RsaKey): The RSA public key used to verify the signature.
-        pdf_hash: The hash of the PDF document.
-        signature (bytes): The digital signature to be verified.
-        pdf_path (str): The file path of the PDF document.
-        progress_signal (optional): A signal to emit progress updates.
+        pdf_path (str): The path to the PDF file.
+
+    Returns:
+        list[PdfDictionary]: The signature dictionaries (`/Filter`, `/SubFilter`, `/ByteRange`, `/Contents`)
+        in signing order, empty if the PDF file is not signed.
 
     Raises:
-        ValueError: If the signature verification fails.
-    Emits:
-        progress_signal: Emits progress updates if provided.
+        FileNotFoundError: If the PDF file does not exist.
+        ValueError: If the trailer of the PDF file is malformed.
+
+    """
+    check_pdf_exists(pdf_path)
+    with Path.open(pdf_path, "rb") as pdf_file:
+        return [signature for _, signature in find_signatures(PdfTrailer(FileBuffer(pdf_file)))]
+
+def prepare_unsigned_pdf(document: PdfDocument, byte_range: list[int], previous_digest: bytes, progress_signal=None,
+                         manifest: Manifest | None = None):
+    """
+    Hashes the byte ranges of the PDF covered by a signature.
+
+    The ranges are hashed from the mapped file in a single sequential pass and nothing is written. For a
+    signature with a chunk manifest, the chunks are hashed by several threads at once instead.
+
+    Args:
+        document (PdfDocument): The mapped signed PDF file.
+        byte_range (list[int]): The byte range of the signature, already checked by `check_byte_range`.
+        previous_digest (bytes): The digest of the previous signature, or b"" for the first one.
+        progress_signal (optional): A signal to emit progress updates.
+        manifest (Manifest, optional): The chunk manifest of the signature, if it has one.
+
+    Returns:
+        tuple: The hash of the signed byte ranges of the PDF content, and the chunk digests computed for
+        the manifest, or None without a manifest.
 
     """
     if progress_signal:
-        progress_signal.emit("Verifying signature...", 80)
-    time.sleep(1)
+        progress_signal.emit("Extracting signature...", 25)
 
     try:
-        logger.info("Verifying signature with hash: %s", pdf_hash.hexdigest())
-        logger.info("Signature to verify: %s", signature.hex())
-        pkcs1_15.new(public_key).verify(pdf_hash, signature)
-        logger.info("Signature verification successful for PDF: %s", pdf_path)
+        if manifest is None:
+            return hash_pdf(
+                document, get_signed_ranges(byte_range), progress_signal, previous_digest=previous_digest
+            ), None
+
         if progress_signal:
-            progress_signal.emit("Signature verification successful.", 100)
-    except (ValueError, TypeError):
-        logger.exception("Signature verification failed for PDF: %s", pdf_path)
+            progress_signal.emit("Hashing PDF File in chunks...", HASH_PROGRESS_START)
+        digests = hash_chunks(document, get_signed_ranges(byte_range), manifest.chunk_size)
+        return manifest_hash(previous_digest, Manifest(manifest.chunk_size, digests)), digests
+    except Exception:
+        logger.exception("Error processing PDF file: %s", document.path)
         if progress_signal:
-            progress_signal.emit("Error: Signature verification failed.", 100)
-        msg = "Signature verification failed."
+            progress_signal.emit("Error: Failed to process PDF file.", 100)
+        raise
+
+def get_signed_ranges(byte_range: list[int]) -> list[tuple[int, int]]:
+    """
+    Returns:
+        list[tuple[int, int]]: The (offset, length) ranges of the file covered by a signature byte range.
+
+    """
+    start, length, hole_end, tail_length = byte_range
+    return [(start, length), (hole_end, tail_length)]
+
+def check_byte_range(document: PdfDocument, signature_dictionary: PdfDictionary, previous_range, *, is_last: bool):
+    """
+    Checks that a signature byte range covers its part of the PDF file.
+
+    The first signature must cover the file from its start, and every later one must continue from
+    the start of the previous signature value, after the end of the previous revision. The last
+    signature must cover the file up to its end. Only the signature value itself is left out.
+
+    Args:
+        document (PdfDocument): The mapped signed PDF file.
+        signature_dictionary (PdfDictionary): The signature dictionary.
+        previous_range (list[int] | None): The byte range of the previous signature, if any.
+        is_last (bool): Whether this is the last signature of the file.
+
+    Raises:
+        ValueError: If the byte range is malformed or does not cover its part of the PDF file.
+
+    """
+    hole_start, hole_end, end = get_hole(signature_dictionary)
+    start = signature_dictionary["/ByteRange"][0]
+
+    if previous_range is None:
+        expected_start, previous_end = 0, 0
+    else:
+        expected_start = previous_range[0] + previous_range[1]
+        previous_end = previous_range[2] + previous_range[3]
+    if start != expected_start or hole_start < previous_end or end > document.size:
+        msg = "Malformed signature byte range."
+        raise ValueError(msg)
+
+    if is_last and end != document.size:
+        msg = "PDF file was modified after signing."
+        raise ValueError(msg)
+
+    signature = signature_dictionary["/Contents"]
+    if document.view[hole_start:hole_end] != b"<" + signature.hex().encode() + b">":
+        msg = "Signature byte range does not match the signature."
         raise ValueError(msg)
+
+def verify_signature(keys_by_id: dict, signed_data: SignedData, pdf_path: str):
+    """
+    Verifies a CMS signature of a PDF document with the public key of its signer.
+
+    The signer is looked up by the subject key identifier of the signature, so only one RSA
+    verification is needed whatever the number of keys. The root signature of a batch signature is
+    verified once for the whole batch (see `verify_root`).
+
+    Args:
+        keys_by_id (Mapping[bytes, RSA.RsaKey]): The RSA public keys of the possible signers by key identifier.
+        signed_data (SignedData): The parsed CMS signature.
+        pdf_path (str): The file path of the PDF document.
+
+    Returns:
+        RSA.RsaKey | None: The public key that verifies the signature, or None if no key does.
+
+    """
+    logger.info("Verifying signature of digest: %s", signed_data.digest.hex())
+    logger.info("Signature to verify: %s", signed_data.signature.hex())
+    public_key = keys_by_id.get(signed_data.key_id)
+    verify = verify_root if get_proof(signed_data) is not None else verify_signed_data
+    if public_key is None or not verify(public_key, signed_data):
+        logger.error("Signature verification failed for PDF: %s", pdf_path)
+        return None
+
+    logger.info("Signature verification successful for PDF: %s", pdf_path)
+    return public_key
+
+def _modified_error(changed_ranges) -> str:
+    if not changed_ranges:
+        return "PDF file was modified after signing."
+    ranges = ", ".join(f"{offset}-{offset + length - 1}" for offset, length in changed_ranges)
+    return f"PDF file was modified after signing in bytes {ranges}."
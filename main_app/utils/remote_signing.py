@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from utils.cms import (
+    build_signed_attributes,
+    build_signed_data,
+    key_id,
+    parse_signed_data,
+    placeholder_size,
+    verify_signed_data,
+)
+from utils.manifest import manifest_size
+from utils.pdf_document import PdfDocument
+from utils.pdf_utils import prepare_document
+
+logger = logging.getLogger("global_logger")
+
+PLACEHOLDER_BYTE = ord("0")
+PREPARED_SUFFIX = ".prepared"
+
+class SigningContext(NamedTuple):
+    """
+    SigningContext is what `finalize_pdf` needs to store a signature in a prepared PDF file.
+
+    Callers treat it as opaque: it can be kept in memory or stored with `encode` and read back with `decode`.
+    It holds no private data and no content of the document besides its path.
+
+    Attributes:
+        path (str): The path to the PDF file holding the empty signature placeholder.
+        identity (tuple): The device, inode, size and modification time of the file once prepared.
+        contents_offset (int): The file offset of the hex placeholder of the signature.
+        contents_size (int): The size of the hex placeholder, in bytes.
+        signed_attributes (bytes): The DER-encoded signed attributes to be signed.
+        public_key (bytes): The DER-encoded public key the signature must verify with.
+        unsigned_attributes (dict[str, bytes]): The DER-encoded unsigned attributes by OID.
+        original_size (int | None): The size of the file before it was prepared in place, or None if the
+            prepared file is a copy.
+
+    Methods:
+        encode() -> bytes:
+            Serializes the context.
+        decode(data: bytes) -> SigningContext:
+            Reads a context serialized by `encode`.
+
+    """
+
+    path: str
+    identity: tuple
+    contents_offset: int
+    contents_size: int
+    signed_attributes: bytes
+    public_key: bytes
+    unsigned_attributes: dict
+    original_size: int | None = None
+
+    def encode(self) -> bytes:
+        """
+        Returns:
+            bytes: The context as JSON.
+
+        """
+        return json.dumps({
+            "path": self.path,
+            "identity": list(self.identity),
+            "contents_offset": self.contents_offset,
+            "contents_size": self.contents_size,
+            "signed_attributes": self.signed_attributes.hex(),
+            "public_key": self.public_key.hex(),
+            "unsigned_attributes": {oid: value.hex() for oid, value in self.unsigned_attributes.items()},
+            "original_size": self.original_size,
+        }).encode()
+
+    @classmethod
+    def decode(cls, data: bytes):
+        """
+        Reads a context serialized by `encode`.
+
+        Raises:
+            ValueError: If the data is not a serialized context.
+
+        """
+        try:
+            fields = json.loads(data)
+            return cls(
+                fields["path"],
+                tuple(fields["identity"]),
+                fields["contents_offset"],
+                fields["contents_size"],
+                bytes.fromhex(fields["signed_attributes"]),
+                bytes.fromhex(fields["public_key"]),
+                {oid: bytes.fromhex(value) for oid, value in fields["unsigned_attributes"].items()},
+                fields.get("original_size"),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            msg = f"Malformed signing context: {e}"
+            raise ValueError(msg) from e
+
+def prepare_pdf(pdf_path: str, public_key: RSA.RsaKey, output_path: str | None = None,
+                chunk_size: int | None = None) -> tuple[bytes, SigningContext]:
+    """
+    Prepares a PDF file for a signature made elsewhere, and returns the digest to sign.
+
+    This is the first phase of two-phase signing; it runs where the document lives and needs no
+    private key. The signature section is built and hashed as by `sign_document`, then written
+    after the document with an empty placeholder. Only the returned 32-byte digest has to reach
+    the private key, which signs it with `sign_digest`; `finalize_pdf` then writes the signature
+    into the placeholder. Until then, the prepared file holds an unsigned revision that does not verify,
+    so it is written next to the input by default, as a copy that shares its blocks where the file system
+    allows it. A file prepared in place, by passing the input as `output_path`, can be given back its
+    original content with `abort_pdf` if the signature never comes.
+
+    Args:
+        pdf_path (str): The path to the PDF file to be signed.
+        public_key (RSA.RsaKey): The public key of the signer, which sets the size of the placeholder.
+        output_path (str, optional): The path the prepared PDF is written to, or `pdf_path` to prepare it in
+            place. Defaults to the input path with PREPARED_SUFFIX before its extension, such as
+            `archive.prepared.pdf`, leaving the input untouched.
+        chunk_size (int, optional): Signs a manifest of chunk digests of this size (see `sign_document`).
+            Defaults to None.
+
+    Returns:
+        tuple[bytes, SigningContext]: The SHA-256 digest of the signed attributes, to be signed with
+        PKCS#1 v1.5, and the context to pass to `finalize_pdf`.
+
+    Raises:
+        Exception: If an error occurs while preparing the PDF file.
+
+    """
+    if output_path is None:
+        output_path = _prepared_path(pdf_path)
+    elif Path(output_path).exists() and Path(output_path).samefile(pdf_path):
+        output_path = None
+
+    try:
+        with PdfDocument(pdf_path, writable=output_path is None) as document:
+            original_size = document.size if output_path is None else None
+            signature_size = placeholder_size(
+                public_key, manifest_size(document.size, chunk_size) if chunk_size else 0
+            )
+            section, byte_range, pdf_hash, unsigned_attributes = prepare_document(
+                document, signature_size, chunk_size=chunk_size
+            )
+            if output_path is None:
+                document.append(section)
+            else:
+                document.copy_to(output_path, section)
+    except Exception:
+        logger.exception("Error while preparing PDF File: %s", pdf_path)
+        raise
+
+    prepared_path = output_path or pdf_path
+    signed_attributes = build_signed_attributes(pdf_hash.digest())
+    # The hole of the signature starts with "<" and ends with ">", around the hex placeholder.
+    contents_offset = byte_range[0] + byte_range[1] + 1
+    context = SigningContext(
+        prepared_path,
+        _file_identity(prepared_path),
+        contents_offset,
+        byte_range[2] - 1 - contents_offset,
+        signed_attributes,
+        public_key.public_key().export_key("DER"),
+        unsigned_attributes,
+        original_size,
+    )
+    logger.info("PDF File prepared for signing: %s", prepared_path)
+    return SHA256.new(signed_attributes).digest(), context
+
+def finalize_pdf(context: SigningContext, signature: bytes):
+    """
+    Stores a signature made elsewhere in a PDF file prepared by `prepare_pdf`.
+
+    The CMS signature is built around the RSA signature and checked against the public key before the
+    file is touched. It is then written over the placeholder with a single positioned write, so no other
+    byte of the file changes.
+
+    Args:
+        context (SigningContext): The context returned by `prepare_pdf`.
+        signature (bytes): The PKCS#1 v1.5 signature of the digest returned by `prepare_pdf`.
+
+    Raises:
+        ValueError: If the signature does not verify, the file changed since it was prepared, or the
+            placeholder was already filled.
+
+    """
+    public_key = RSA.import_key(context.public_key)
+    contents = build_signed_data(
+        key_id(public_key), context.signed_attributes, signature, context.unsigned_attributes
+    )
+    if not verify_signed_data(public_key, parse_signed_data(contents)):
+        msg = "Signature does not match the prepared digest and public key."
+        raise ValueError(msg)
+
+    contents_hex = contents.hex().encode()
+    if len(contents_hex) > context.contents_size:
+        msg = "Signature does not fit in its placeholder."
+        raise ValueError(msg)
+
+    try:
+        if _file_identity(context.path) != context.identity:
+            msg = "PDF file changed since it was prepared."
+            raise ValueError(msg)  # noqa: TRY301
+        with PdfDocument(context.path, writable=True) as document:
+            placeholder = document.view[context.contents_offset:context.contents_offset + context.contents_size]
+            if placeholder.tobytes().count(PLACEHOLDER_BYTE) != context.contents_size:
+                msg = "Signature placeholder is not empty; the PDF file was already finalized."
+                raise ValueError(msg)  # noqa: TRY301
+            placeholder.release()
+            document.patch(context.contents_offset, contents_hex)
+    except Exception:
+        logger.exception("Error while finalizing PDF File: %s", context.path)
+        raise
+    logger.info("PDF File successfully signed: %s", context.path)
+
+def abort_pdf(context: SigningContext):
+    """
+    Undoes `prepare_pdf` for a signature that will not come.
+
+    A prepared copy is removed; a file prepared in place is truncated back to its original size, which
+    removes the signature section and its placeholder and leaves the file as it was before.
+
+    Args:
+        context (SigningContext): The context returned by `prepare_pdf`.
+
+    Raises:
+        ValueError: If the file changed since it was prepared, for example because it was finalized.
+
+    """
+    try:
+        if _file_identity(context.path) != context.identity:
+            msg = "PDF file changed since it was prepared; it may already be finalized."
+            raise ValueError(msg)  # noqa: TRY301
+        if context.original_size is None:
+            Path(context.path).unlink()
+        else:
+            os.truncate(context.path, context.original_size)
+    except Exception:
+        logger.exception("Error while aborting the preparation of PDF File: %s", context.path)
+        raise
+    logger.info("Preparation of PDF File aborted: %s", context.path)
+
+def _prepared_path(pdf_path: str) -> str:
+    path = Path(pdf_path)
+    return str(path.with_name(f"{path.stem}{PREPARED_SUFFIX}{path.suffix}"))
+
+def _file_identity(pdf_path: str) -> tuple:
+    stat = Path(pdf_path).stat()
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,323 @@
+import logging
+import re
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from utils.cms import parse_signed_data, placeholder_size
+from utils.merkle import document_digest
+from utils.pdf_utils import (
+    SignatureResult,
+    add_signature_to_pdf,
+    build_incremental_update,
+    create_signature,
+    find_signatures,
+    get_signed_parts,
+    initialize_signing_process,
+    verify_document,
+)
+
+logger = logging.getLogger("global_logger")
+
+STREAM_CHUNK_SIZE = 256 * 1024
+STREAM_WINDOW_SIZE = 1024 * 1024
+STREAM_CAPTURE_LIMIT = 16 * 1024 * 1024
+CAPTURE_MARGIN = 1024
+PATTERN_OVERLAP = 128
+BYTE_RANGE_PATTERN = re.compile(rb"/ByteRange\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s*\]")
+
+def sign_stream(source, output, rsa_key: RSA.RsaKey, name: str = "<stdin>"):
+    """
+    Signs PDF content read from a binary stream and writes the signed PDF to another stream.
+
+    The content is copied to the output and hashed chunk by chunk as it is read, so it never has to be
+    seekable or held in memory. Only the first and last STREAM_WINDOW_SIZE bytes and the signature
+    sections spotted on the way, up to STREAM_CAPTURE_LIMIT bytes, are kept, which is where the trailer, the document information
+    dictionary and the previous signature of a PDF file are. Once the input ends, the signature section
+    is built from them as by `sign_document` and written after the copied content.
+
+    The copy is written before the signature exists: if signing fails, the output holds the unsigned
+    content only and must be discarded.
+
+    Args:
+        source (BinaryIO): The stream the PDF content is read from, such as `sys.stdin.buffer`.
+        output (BinaryIO): The stream the signed PDF is written to, such as `sys.stdout.buffer`.
+        rsa_key (RSA.RsaKey): The RSA key to use for signing the PDF.
+        name (str, optional): The name of the content in log messages. Defaults to "<stdin>".
+
+    Raises:
+        ValueError: If the content is not a PDF file that can be signed, or if the objects needed to sign it
+            lie outside the kept windows.
+
+    """
+    scanner = _StreamScanner(verifying=False)
+    try:
+        for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b""):
+            output.write(chunk)
+            scanner.feed(chunk)
+        document = scanner.document(name)
+
+        try:
+            trailer = initialize_signing_process(document)
+            signatures = find_signatures(trailer)
+            previous_digest = (
+                document_digest(parse_signed_data(signatures[-1][1]["/Contents"])) if signatures else b""
+            )
+            section, byte_range = build_incremental_update(trailer, document, placeholder_size(rsa_key), signatures)
+        except ValueError as e:
+            document.view.raise_if_missed(e)
+            raise
+
+        pdf_hash = scanner.chain_hash(byte_range[0], previous_digest)
+        for part in get_signed_parts(section, byte_range):
+            pdf_hash.update(part)
+        logger.info("Generated PDF hash: %s", pdf_hash.hexdigest())
+        signature = create_signature(rsa_key, pdf_hash)
+        output.write(add_signature_to_pdf(section, byte_range, signature))
+        output.flush()
+    except Exception:
+        logger.exception("Error while signing streamed PDF: %s", name)
+        raise
+    logger.info("Streamed PDF successfully signed: %s (%d bytes)", name, scanner.size)
+
+def verify_stream(source, public_key, name: str = "<stdin>") -> list[SignatureResult]:
+    """
+    Verifies all digital signatures of PDF content read from a binary stream.
+
+    The content is hashed chunk by chunk as it is read. The byte range of every signature is read from its
+    signature dictionary as it streams by, so the hash chain of `sign_document` is followed without going
+    back: each signature is hashed up to the end of its revision, and the next one continues from its
+    digest. Only the windows kept by `sign_stream` are held in memory. Once the input ends, the signatures
+    found through the trailer are checked as by `verify_document` against the digests computed on the way.
+
+    Args:
+        source (BinaryIO): The stream the signed PDF content is read from, such as `sys.stdin.buffer`.
+        public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Keyring): The public RSA key, the keys of all signers,
+                                                                  or a keyring, used to verify the signatures.
+        name (str, optional): The name of the content in log messages. Defaults to "<stdin>".
+
+    Returns:
+        list[SignatureResult]: The result of every signature, in signing order.
+
+    Raises:
+        ValueError: If the content has no signature, has a signature with a chunk manifest, or has a
+            structure that cannot be followed in a single pass.
+
+    """
+    scanner = _StreamScanner(verifying=True)
+    try:
+        for chunk in iter(lambda: source.read(STREAM_CHUNK_SIZE), b""):
+            scanner.feed(chunk)
+        document = scanner.document(name)
+        try:
+            return verify_document(document, public_key, hash_signed_ranges=scanner.hash_signed_ranges)
+        except ValueError as e:
+            document.view.raise_if_missed(e)
+            raise
+    except Exception:
+        logger.exception("Error verifying signature of streamed PDF: %s", name)
+        raise
+
+class _RangeHasher:
+    """Hashes the bytes from an offset on, as they stream by, optionally leaving out a hole and stopping at an end."""
+
+    def __init__(self, prefix: bytes, start: int):
+        self.prefix = prefix
+        self.start = start
+        self.hole = None
+        self.end = None
+        self.hash = SHA256.new(prefix)
+
+    def feed(self, offset: int, data):
+        start = max(self.start, offset)
+        end = offset + len(data) if self.end is None else min(self.end, offset + len(data))
+        parts = [(start, end)] if self.hole is None else [(start, min(end, self.hole[0])), (max(start, self.hole[1]), end)]
+        for part_start, part_end in parts:
+            if part_start < part_end:
+                self.hash.update(data[part_start - offset:part_end - offset])
+
+class _StreamWindows:
+    """The parts of streamed PDF content that were kept, addressed by their offset in the whole content."""
+
+    def __init__(self, segments: list, size: int):
+        self._segments = segments
+        self._size = size
+        self.missed = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, item: slice) -> bytes:
+        start, stop, _ = item.indices(self._size)
+        best = None
+        for offset, data in self._segments:
+            if offset <= start < offset + len(data) and (best is None or offset + len(data) > best[0] + len(best[1])):
+                best = (offset, data)
+        if best is None:
+            self.missed = start
+            msg = f"Offset {start} of the streamed PDF content was not kept."
+            raise ValueError(msg)
+        return bytes(best[1][start - best[0]:stop - best[0]])
+
+    def raise_if_missed(self, error: Exception):
+        if self.missed is not None:
+            msg = (
+                f"The PDF structure at offset {self.missed} lies outside the parts of the stream that are kept; "
+                "sign or verify the file by path instead."
+            )
+            raise ValueError(msg) from error
+
+class _StreamedDocument:
+    """The kept windows of streamed PDF content, in the shape of a PdfDocument for the trailer and signature code."""
+
+    def __init__(self, path: str, view: _StreamWindows):
+        self.path = path
+        self.view = view
+        self.size = len(view)
+
+    def tail(self, length: int) -> bytes:
+        return self.view[max(self.size - length, 0):self.size]
+
+    def release(self, offset: int, length: int):
+        pass
+
+class _StreamScanner:
+    """
+    Follows the signature hash chain of PDF content as it streams by, keeping only what is needed afterwards.
+
+    Every `/ByteRange` that continues the chain announces a signature before its value is reached. While
+    verifying, its hasher then leaves out the hole and stops at the end of the revision, and the next
+    hasher starts from the hole with the digest just computed. While signing, the chain restarts from the
+    hole with the digest stored in the signature, which is known once the hole has streamed by. The bytes
+    between the hole and that point are replayed into the new hasher.
+    """
+
+    def __init__(self, *, verifying: bool):
+        self.size = 0
+        self.digests = {}
+        self._verifying = verifying
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._captures = []
+        self._captured_size = 0
+        self._holes = []
+        self._hasher = _RangeHasher(b"", 0)
+        self._pending = None
+        self._carry = b""
+
+    def feed(self, chunk: bytes):
+        data = self._carry + chunk
+        base = self.size - len(self._carry)
+        chunk_start = self.size
+        self._carry = data[-PATTERN_OVERLAP:]
+        view = memoryview(chunk)
+        position = 0
+        for match in BYTE_RANGE_PATTERN.finditer(data):
+            if base + match.end() <= chunk_start:
+                # Found with the previous chunk already.
+                continue
+            split = max(base + match.start() - chunk_start, position)
+            self._consume(view[position:split])
+            position = split
+            self._announce(base + match.start(), [int(value) for value in match.groups()])
+        self._consume(view[position:])
+
+    def document(self, name: str) -> _StreamedDocument:
+        if not self.size:
+            msg = "PDF content is empty."
+            raise ValueError(msg)
+        segments = [(0, self._head), *((offset, data) for offset, data, _ in self._captures)]
+        segments.append((self.size - len(self._tail), self._tail))
+        return _StreamedDocument(name, _StreamWindows(segments, self.size))
+
+    def chain_hash(self, start: int, previous_digest: bytes):
+        hasher = self._hasher
+        if self._pending is None and hasher is not None and (hasher.start, hasher.prefix) == (start, previous_digest):
+            return hasher.hash
+
+        pdf_hash = SHA256.new(previous_digest)
+        try:
+            pdf_hash.update(self.document("").view[start:self.size])
+        except ValueError:
+            msg = "The signed part of the PDF content could not be hashed while streaming; sign the file by path instead."
+            raise ValueError(msg) from None
+        return pdf_hash
+
+    def hash_signed_ranges(self, _document, byte_range: list[int], previous_digest: bytes, _progress_signal=None,
+                           manifest=None):
+        if manifest is not None:
+            msg = "Signatures with a chunk manifest cannot be verified from a stream; verify the file by path instead."
+            raise ValueError(msg)
+        prefix, pdf_hash = self.digests.get(tuple(byte_range), (None, None))
+        if pdf_hash is None or prefix != previous_digest:
+            msg = f"Signature byte range {byte_range} was not hashed while streaming; verify the file by path instead."
+            raise ValueError(msg)
+        return pdf_hash, None
+
+    def _announce(self, offset: int, byte_range: list[int]):
+        start, length, hole_end, tail_length = byte_range
+        hole_start = start + length
+        end = hole_end + tail_length
+        capture_start = max(offset - CAPTURE_MARGIN, self.size - len(self._tail), 0)
+        hasher = self._hasher
+        if (
+            self._pending is not None
+            or hasher is None
+            or hasher.start != start
+            or hasher.hole is not None
+            or not self.size <= hole_start < hole_end
+            or (self._holes and hole_start < self._holes[-1][2])
+            or self._captured_size + end - capture_start > STREAM_CAPTURE_LIMIT
+        ):
+            logger.info("Ignoring byte range %s at offset %d of the stream", byte_range, offset)
+            return
+
+        if self._verifying:
+            hasher.hole = (hole_start, hole_end)
+            hasher.end = end
+        self._captured_size += end - capture_start
+        self._captures.append((capture_start, self._tail[capture_start - self.size:] if capture_start < self.size
+                               else bytearray(), end))
+        self._holes.append((hole_start, hole_end, end))
+        self._pending = (byte_range, end if self._verifying else hole_end, bytearray())
+
+    def _consume(self, data: memoryview):
+        if not data:
+            return
+        offset = self.size
+        if len(self._head) < STREAM_WINDOW_SIZE:
+            self._head += data[:STREAM_WINDOW_SIZE - len(self._head)]
+        for capture_offset, capture, end in self._captures:
+            if capture_offset + len(capture) < end:
+                capture.extend(data[:end - capture_offset - len(capture)])
+        if self._hasher is not None:
+            self._hasher.feed(offset, data)
+        if self._pending is not None:
+            hole_start = self._holes[-1][0]
+            self._pending[2].extend(data[max(hole_start - offset, 0):])
+
+        self.size += len(data)
+        self._tail += data
+        del self._tail[:max(len(self._tail) - STREAM_WINDOW_SIZE, 0)]
+
+        if self._pending is not None and self.size >= self._pending[1]:
+            self._release()
+
+    def _release(self):
+        byte_range, _, replay = self._pending
+        self._pending = None
+        hole_start, hole_end, _ = self._holes[-1]
+        if self._verifying:
+            digest = self._hasher.hash.digest()
+            self.digests[tuple(byte_range)] = (self._hasher.prefix, self._hasher.hash)
+        else:
+            capture_offset, capture, _ = self._captures[-1]
+            contents = bytes(capture[hole_start + 1 - capture_offset:hole_end - 1 - capture_offset])
+            try:
+                digest = document_digest(parse_signed_data(bytes.fromhex(contents.decode())))
+            except ValueError:
+                logger.info("Ignoring malformed signature value at offset %d of the stream", hole_start)
+                self._hasher = None
+                return
+
+        self._hasher = _RangeHasher(digest, hole_start)
+        self._hasher.feed(hole_start, replay)
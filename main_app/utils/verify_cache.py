@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from Crypto.Hash import SHA256
+from utils.cms import parse_signed_data
+from utils.keyring import index_public_keys
+from utils.merkle import document_digest
+from utils.pdf_utils import SignatureResult, check_pdf_exists, read_signature_info, verify_pdf
+
+logger = logging.getLogger("global_logger")
+
+CACHE_MAX_ENTRIES = 100_000
+CACHE_BUSY_TIMEOUT = 30.0
+EVICTION_INTERVAL = 64
+TOUCH_INTERVAL = 60.0
+
+SCHEMA_VERSION = 4
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS verifications (
+        device INTEGER NOT NULL,
+        inode INTEGER NOT NULL,
+        keys BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        ctime_ns INTEGER NOT NULL,
+        digest BLOB NOT NULL,
+        results TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        PRIMARY KEY (device, inode, keys)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS verifications_last_used ON verifications (last_used)",
+)
+
+class VerificationCache:
+    """
+    VerificationCache remembers the verdicts of `verify_pdf` in an SQLite database shared by processes.
+
+    A verdict is stored under the identity of the file (device, inode, size, modification time and status
+    change time, which unlike the modification time cannot be set back), the fingerprint of the accepted
+    public keys and the digest named by the last signature of the file. A later check of the same file
+    with the same keys returns it after reading only the trailer and the last signature dictionary, a few
+    kilobytes whatever the size of the document. Any change of the identity or of the last signature
+    digest is a miss, and the file is verified again.
+
+    A file that grew since, such as a document signed again, is verified in full: appending changes the
+    identity just like an edit in place does, so nothing short of reading the earlier content again tells
+    that it is unchanged, and reading it is the whole cost of a verification.
+
+    The database uses write-ahead logging, so many processes can read it while one writes. Hits refresh the
+    time of last use at most every TOUCH_INTERVAL seconds, and the least recently used entries are evicted
+    beyond `max_entries`. A cache can be used from several threads, and a process forked after opening it
+    reopens the database on first use. A database written by another version of the cache is emptied.
+
+    Attributes:
+        path (str): The path to the database file.
+        hits (int): The number of verdicts returned from the cache by this object.
+        misses (int): The number of files this object had to verify.
+        bytes_hashed (int): The number of bytes this object hashed to verify files.
+
+    Methods:
+        __init__(path: str, max_entries: int = CACHE_MAX_ENTRIES):
+        verify(pdf_path: str, public_key, progress_signal=None) -> list[SignatureResult]:
+            Returns the cached verdict of a PDF file, or verifies it and caches the verdict.
+        lookup(pdf_path: str, public_keys) -> list[SignatureResult] | None:
+            Returns the cached verdict of a PDF file, if it is still current.
+        store(pdf_path: str, public_keys, results: list[SignatureResult], identity: tuple):
+            Caches the verdict of a PDF file.
+        close():
+            Closes the database.
+
+    """
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES):
+        """
+        Opens the database, creating it if needed.
+
+        Args:
+            path (str): The path to the database file.
+            max_entries (int, optional): The number of verdicts kept. Defaults to CACHE_MAX_ENTRIES.
+
+        """
+        self.path = str(path)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+        self._stores = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_hashed = 0
+        with self._lock:
+            self._connect()
+
+    def verify(self, pdf_path: str, public_key, progress_signal=None) -> list[SignatureResult]:
+        """
+        Returns the cached verdict of a PDF file, or verifies it like `verify_pdf` and caches the verdict.
+
+        Args:
+            pdf_path (str): The file path to the PDF document to be verified.
+            public_key (RSA.RsaKey | Iterable[RSA.RsaKey] | Keyring): The public RSA key, the keys of all
+                                                                      signers, or a keyring, used to verify
+                                                                      the signatures.
+            progress_signal (optional): A signal to report progress, if applicable.
+
+        Returns:
+            list[SignatureResult]: The result of every signature, in signing order.
+
+        Raises:
+            Exception: If an error occurs during the verification process. Errors are not cached.
+
+        """
+        public_keys = index_public_keys(public_key)
+        results = self.lookup(pdf_path, public_keys)
+        if results is not None:
+            self.hits += 1
+            if progress_signal:
+                progress_signal.emit("Signature verification result found in cache.", 100)
+            return results
+
+        self.misses += 1
+        check_pdf_exists(pdf_path, progress_signal)
+        identity = _file_identity(pdf_path)
+        results = verify_pdf(pdf_path, public_keys, progress_signal)
+        self.bytes_hashed += identity[2]
+        self.store(pdf_path, public_keys, results, identity)
+        return results
+
+    def lookup(self, pdf_path: str, public_keys) -> list[SignatureResult] | None:
+        """
+        Args:
+            pdf_path (str): The path to the PDF file.
+            public_keys (Iterable[RSA.RsaKey] | Keyring): The public keys of all accepted signers, or a keyring.
+
+        Returns:
+            list[SignatureResult] | None: The cached verdict, or None if there is none or the file changed since.
+
+        """
+        try:
+            device, inode, size, mtime_ns, ctime_ns = _file_identity(pdf_path)
+        except OSError:
+            return None
+        keys = keys_fingerprint(public_keys)
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT size, mtime_ns, ctime_ns, digest, results, last_used FROM verifications "
+                "WHERE device = ? AND inode = ? AND keys = ?",
+                (device, inode, keys),
+            ).fetchone()
+        if row is None or row[:3] != (size, mtime_ns, ctime_ns):
+            return None
+        if _last_signature_digest(pdf_path) != row[3]:
+            logger.info("Cached verdict of %s is stale: its last signature changed", pdf_path)
+            return None
+
+        keys_by_id = index_public_keys(public_keys)
+        results = [_decode_result(result, keys_by_id) for result in json.loads(row[4])]
+        now = time.time()
+        if now - row[5] > TOUCH_INTERVAL:
+            with self._lock:
+                self._write(
+                    "UPDATE verifications SET last_used = ? WHERE device = ? AND inode = ? AND keys = ?",
+                    (now, device, inode, keys),
+                )
+        logger.info("Verification cache hit: %s", pdf_path)
+        return results
+
+    def store(self, pdf_path: str, public_keys, results: list[SignatureResult], identity: tuple):
+        """
+        Caches the verdict of a PDF file, unless the file changed while it was verified.
+
+        Args:
+            pdf_path (str): The path to the verified PDF file.
+            public_keys (Iterable[RSA.RsaKey] | Keyring): The public keys the file was verified with.
+            results (list[SignatureResult]): The verdict returned by `verify_pdf`.
+            identity (tuple): The identity of the file taken before it was verified.
+
+        """
+        digest = _last_signature_digest(pdf_path)
+        try:
+            current_identity = _file_identity(pdf_path)
+        except OSError:
+            return
+        if digest is None or current_identity != identity:
+            logger.info("Not caching the verdict of %s: the file changed while it was verified", pdf_path)
+            return
+
+        device, inode, size, mtime_ns, ctime_ns = identity
+        encoded = json.dumps([_encode_result(result) for result in results])
+        with self._lock:
+            self._write(
+                "INSERT OR REPLACE INTO verifications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (device, inode, keys_fingerprint(public_keys), size, mtime_ns, ctime_ns, digest, encoded, time.time()),
+            )
+            self._stores += 1
+            if self._stores % EVICTION_INTERVAL == 0:
+                self._write(
+                    "DELETE FROM verifications WHERE last_used < "
+                    "(SELECT last_used FROM verifications ORDER BY last_used DESC LIMIT 1 OFFSET ?)",
+                    (self._max_entries - 1,),
+                )
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be used across fork(), so a child process opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=CACHE_BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                # Verdicts stored by another version of the cache are dropped rather than migrated.
+                if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                    connection.execute("DROP TABLE IF EXISTS verifications")
+                    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                for statement in SCHEMA:
+                    connection.execute(statement)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                connection.close()
+                raise
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _write(self, statement: str, parameters: tuple):
+        # The cache only speeds verification up, so a database too busy to write to is not an error.
+        try:
+            self._connect().execute(statement, parameters)
+        except sqlite3.OperationalError as e:
+            logger.warning("Could not update the verification cache %s: %s", self.path, e)
+
+def keys_fingerprint(public_keys) -> bytes:
+    """
+    Args:
+        public_keys (Iterable[RSA.RsaKey] | Keyring): The public keys of all accepted signers, or a keyring.
+
+    Returns:
+        bytes: The SHA-256 hash of the sorted key identifiers, the same whatever the order of the keys.
+
+    """
+    return SHA256.new(b"".join(sorted(index_public_keys(public_keys)))).digest()
+
+def _last_signature_digest(pdf_path: str) -> bytes | None:
+    try:
+        signatures = read_signature_info(pdf_path)
+        if not signatures:
+            return None
+        return document_digest(parse_signed_data(signatures[-1]["/Contents"]))
+    except (OSError, ValueError):
+        return None
+
+def _encode_result(result: SignatureResult) -> dict:
+    return {
+        "index": result.index,
+        "byte_range": result.byte_range,
+        "intact": result.intact,
+        "verified": result.public_key is not None,
+        "error": result.error,
+        "key_id": result.key_id.hex() if result.key_id is not None else None,
+        "changed_ranges": result.changed_ranges,
+    }
+
+def _decode_result(result: dict, keys_by_id: dict) -> SignatureResult:
+    signer = bytes.fromhex(result["key_id"]) if result["key_id"] is not None else None
+    changed_ranges = result["changed_ranges"]
+    return SignatureResult(
+        result["index"],
+        result["byte_range"],
+        result["intact"],
+        keys_by_id.get(signer) if result["verified"] else None,
+        result["error"],
+        signer,
+        [tuple(changed_range) for changed_range in changed_ranges] if changed_ranges is not None else None,
+    )
+
+def _file_identity(pdf_path: str) -> tuple:
+    stat = Path(pdf_path).stat()
+    return stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
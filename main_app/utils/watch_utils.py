@@ -0,0 +1,362 @@
+import contextlib
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import shutil
+import struct
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+from Crypto.PublicKey import RSA
+from utils.batch_utils import JOBS_PER_WORKER, BatchResult, create_worker_pool, sign_in_worker
+
+logger = logging.getLogger("global_logger")
+
+# inotify event flags, from <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_BUFFER_SIZE = 64 * 1024
+SETTLE_TIME = 0.2
+POLL_INTERVAL = 1.0
+
+class Inotify:
+    """
+    Inotify is a minimal wrapper of the Linux inotify API, reached through the C library.
+
+    Methods:
+        __init__():
+        add_watch(path: str, mask: int) -> int:
+            Starts watching a directory for the given events.
+        read_events() -> list[tuple[int, int, str]]:
+            Reads the pending events as (watch descriptor, mask, name) tuples.
+        fileno() -> int:
+            Returns the file descriptor to wait on.
+        close():
+            Closes the inotify instance.
+
+    """
+
+    def __init__(self):
+        """
+        Creates a non-blocking inotify instance.
+
+        Raises:
+            OSError: If inotify is not available on this system.
+
+        """
+        if not sys.platform.startswith("linux"):
+            msg = "inotify is only available on Linux."
+            raise OSError(msg)
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path: str, mask: int) -> int:
+        """
+        Args:
+            path (str): The directory to watch.
+            mask (int): The events to report.
+
+        Returns:
+            int: The watch descriptor of the directory.
+
+        Raises:
+            OSError: If the directory cannot be watched.
+
+        """
+        watch = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask | IN_ONLYDIR)
+        if watch < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return watch
+
+    def read_events(self) -> list[tuple[int, int, str]]:
+        """
+        Returns:
+            list[tuple[int, int, str]]: The pending events as (watch descriptor, mask, name) tuples.
+
+        """
+        try:
+            data = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            watch, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((watch, mask, name))
+        return events
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self):
+        """
+        Closes the inotify instance.
+        """
+        os.close(self._fd)
+
+class _Submission(NamedTuple):
+    path: str
+    identity: tuple
+    output_path: str
+
+class SpoolWatcher:
+    """
+    SpoolWatcher signs every PDF file dropped into spool directories, until it is stopped.
+
+    New files are noticed through inotify when they are closed after writing or moved into a spool
+    directory; elsewhere the directories are scanned every POLL_INTERVAL seconds. A file is signed once
+    it has seen no event for `settle_time` seconds, so files still being written are left alone. Files
+    already in the directories at startup are signed first.
+
+    Signing runs on a pool of worker processes that receive the key once (see `create_worker_pool`),
+    with a bounded number of files in flight. The signed copy is written to the output directory and
+    the original is removed from the spool. A file that cannot be signed is moved to the failure
+    directory next to a `.error` file holding the reason. Neither overwrites an earlier file: a name
+    already taken in the output or failure directory gets a numbered suffix, such as `x-1.pdf`. A file
+    replaced in the spool while it was being signed is left there and signed again, and the signed copy
+    of its older version is removed.
+
+    The watcher holds a pipe used to wake `run`, released by `close` or by leaving a `with` block.
+
+    Attributes:
+        directories (list[str]): The spool directories.
+        output_dir (str): The directory signed files are written to.
+        failed_dir (str): The directory files that could not be signed are moved to.
+
+    Methods:
+        __init__(directories, rsa_key, output_dir, failed_dir, workers=None, settle_time=SETTLE_TIME, on_result=None):
+        run():
+            Watches the directories and signs new files until `stop` is called.
+        stop():
+            Asks `run` to return once the files in flight are done. Safe to call from any thread or signal handler.
+        close():
+            Releases the wake-up pipe. The watcher cannot run again afterwards.
+
+    """
+
+    def __init__(self, directories: Iterable[str], rsa_key: RSA.RsaKey, output_dir: str, failed_dir: str,  # noqa: PLR0913, PLR0917
+                 workers: int | None = None, settle_time: float = SETTLE_TIME,
+                 on_result: Callable[[BatchResult], None] | None = None):
+        """
+        Initializes the watcher. Nothing is watched until `run` is called.
+
+        Args:
+            directories (Iterable[str]): The spool directories.
+            rsa_key (RSA.RsaKey): The RSA key to use for signing.
+            output_dir (str): The directory signed files are written to.
+            failed_dir (str): The directory files that could not be signed are moved to.
+            workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+            settle_time (float, optional): The time without events after which a file is signed, in seconds.
+            on_result (Callable[[BatchResult], None], optional): Called with the result of every file.
+
+        """
+        self.directories = [str(Path(directory).resolve()) for directory in directories]
+        self.output_dir = output_dir
+        self.failed_dir = failed_dir
+        self._rsa_key = rsa_key
+        self._workers = workers or os.cpu_count() or 1
+        self._settle_time = settle_time
+        self._on_result = on_result
+        self._deadlines = {}
+        self._in_flight = {}
+        self._stopping = threading.Event()
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+
+    def run(self):
+        """
+        Watches the directories and signs new files until `stop` is called.
+        """
+        for directory in (self.output_dir, self.failed_dir):
+            Path(directory).mkdir(parents=True, exist_ok=True)
+
+        try:
+            inotify = Inotify()
+            watches = {
+                inotify.add_watch(directory, IN_CLOSE_WRITE | IN_MOVED_TO): directory
+                for directory in self.directories
+            }
+        except OSError as e:
+            logger.warning("inotify not available, scanning spool directories instead: %s", e)
+            inotify = None
+
+        logger.info("Watching %s with %d workers", ", ".join(self.directories), self._workers)
+        known_files = self._scan()
+        for path in known_files:
+            self._touch(path)
+
+        with create_worker_pool(self._workers, self._rsa_key) as executor:
+            try:
+                while not self._stopping.is_set():
+                    if inotify is not None:
+                        self._wait(inotify, watches)
+                    else:
+                        known_files = self._poll(known_files)
+                    self._collect_results()
+                    self._submit_due_files(executor)
+            finally:
+                for future in list(self._in_flight):
+                    future.result()
+                self._collect_results()
+                if inotify is not None:
+                    inotify.close()
+        logger.info("Stopped watching %s", ", ".join(self.directories))
+
+    def stop(self):
+        """
+        Asks `run` to return once the files in flight are done. Safe to call from any thread or signal handler.
+        """
+        self._stopping.set()
+        self._wake()
+
+    def close(self):
+        """
+        Releases the wake-up pipe. The watcher cannot run again afterwards, and `stop` does nothing.
+        """
+        for fd in (self._wake_read, self._wake_write):
+            if fd >= 0:
+                os.close(fd)
+        self._wake_read = self._wake_write = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _wait(self, inotify: Inotify, watches: dict):
+        readable = self._select([inotify], self._timeout())
+        if inotify in readable:
+            for watch, mask, name in inotify.read_events():
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("inotify queue overflowed, rescanning spool directories")
+                    for path in self._scan():
+                        self._touch(path)
+                elif watch in watches:
+                    self._touch(str(Path(watches[watch]) / name))
+
+    def _poll(self, known_files: dict) -> dict:
+        timeout = self._timeout()
+        self._select([], POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL))
+        files = self._scan()
+        for path, identity in files.items():
+            if known_files.get(path) != identity:
+                self._touch(path)
+        return files
+
+    def _select(self, files: list, timeout: float | None) -> list:
+        readable, _, _ = select.select([*files, self._wake_read], [], [], timeout)
+        if self._wake_read in readable:
+            with contextlib.suppress(BlockingIOError):
+                os.read(self._wake_read, INOTIFY_BUFFER_SIZE)
+        return readable
+
+    def _scan(self) -> dict:
+        files = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.name.lower().endswith(".pdf") and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _touch(self, path: str):
+        # A file in flight has no deadline: `_finish` sees whether it changed meanwhile and touches it again.
+        if path.lower().endswith(".pdf") and all(submission.path != path for submission in self._in_flight.values()):
+            self._deadlines[path] = time.monotonic() + self._settle_time
+
+    def _timeout(self) -> float | None:
+        if not self._deadlines or len(self._in_flight) >= self._max_in_flight():
+            return None
+        return max(min(self._deadlines.values()) - time.monotonic(), 0)
+
+    def _max_in_flight(self) -> int:
+        return self._workers * JOBS_PER_WORKER
+
+    def _submit_due_files(self, executor):
+        now = time.monotonic()
+        for path, deadline in sorted(self._deadlines.items(), key=lambda item: item[1]):
+            if deadline > now or len(self._in_flight) >= self._max_in_flight():
+                break
+            del self._deadlines[path]
+            try:
+                identity = _file_identity(path)
+            except OSError:
+                continue
+            reserved = {submission.output_path for submission in self._in_flight.values()}
+            output_path = _unique_path(self.output_dir, Path(path).name, reserved)
+            future = executor.submit(sign_in_worker, path, output_path)
+            self._in_flight[future] = _Submission(path, identity, output_path)
+            future.add_done_callback(lambda _: self._wake())
+
+    def _collect_results(self):
+        for future in [future for future in self._in_flight if future.done()]:
+            submission = self._in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.exception("Worker failed while signing %s", submission.path)
+                result = BatchResult(submission.path, ok=False, elapsed_ms=0.0, error=str(e))
+            self._finish(result, submission)
+
+    def _finish(self, result: BatchResult, submission: _Submission):
+        source = Path(result.path)
+        try:
+            if _file_identity(source) != submission.identity:
+                # A newer version was written to the spool meanwhile: it is kept and signed on its own.
+                logger.warning("%s changed while it was being signed, signing it again", source.name)
+                if result.ok:
+                    Path(submission.output_path).unlink(missing_ok=True)
+                self._touch(str(source))
+            elif result.ok:
+                source.unlink()
+                logger.info("Signed %s into %s in %.1f ms", source.name, submission.output_path, result.elapsed_ms)
+            else:
+                destination = Path(_unique_path(self.failed_dir, source.name))
+                shutil.move(source, destination)
+                destination.with_name(destination.name + ".error").write_text(f"{result.error}\n", encoding="utf-8")
+                logger.error("Could not sign %s, moved to %s: %s", source.name, destination, result.error)
+        except FileNotFoundError:
+            logger.warning("%s was removed from the spool while it was being signed", source)
+        except OSError:
+            logger.exception("Error while clearing %s from the spool", source)
+        if self._on_result is not None:
+            self._on_result(result)
+
+    def _wake(self):
+        # A full pipe already wakes `run`, and a closed one means there is nothing left to wake.
+        with contextlib.suppress(OSError):
+            os.write(self._wake_write, b"\0")
+
+def _file_identity(path: str | Path) -> tuple:
+    stat = Path(path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+def _unique_path(directory: str, name: str, reserved: Iterable[str] = ()) -> str:
+    # The name is numbered until it matches neither an existing file nor a path reserved by a file in flight.
+    reserved = set(reserved)
+    path = Path(directory) / name
+    number = 0
+    while path.exists() or path.with_name(path.name + ".error").exists() or str(path) in reserved:
+        number += 1
+        path = Path(directory) / f"{Path(name).stem}-{number}{Path(name).suffix}"
+    return str(path)
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+from Crypto.PublicKey import RSA
+
+sys.path[:0] = [str(Path(__file__).resolve().parent.parent / "main_app")]
+
+PDF_OBJECTS = (
+    b"<< /Type /Catalog /Pages 2 0 R >>",
+    b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+    b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>",
+)
+
+@pytest.fixture(scope="session")
+def rsa_key() -> RSA.RsaKey:
+    return RSA.generate(2048)
+
+@pytest.fixture
+def make_pdf():
+    """
+    Returns a function writing a small unsigned PDF, padded to `size` bytes with a comment, with a classic
+    cross-reference table or, with `xref_stream`, an uncompressed cross-reference stream.
+    """
+
+    def make(path: Path, size: int = 0, *, xref_stream: bool = False) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = bytearray(b"%PDF-1.7\n")
+        if size:
+            content += b"%" + b"x" * size + b"\n"
+        offsets = []
+        for number, body in enumerate(PDF_OBJECTS, start=1):
+            offsets.append(len(content))
+            content += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        xref_offset = len(content)
+        if xref_stream:
+            size_entry = len(PDF_OBJECTS) + 2
+            rows = b"\x00\x00\x00\x00\x00\xff\xff"
+            rows += b"".join(b"\x01" + offset.to_bytes(4, "big") + b"\x00\x00" for offset in [*offsets, xref_offset])
+            content += (
+                b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Length %d >>\nstream\n"
+                % (size_entry - 1, size_entry, len(rows))
+            )
+            content += rows + b"\nendstream\nendobj\n"
+        else:
+            content += b"xref\n0 %d\n0000000000 65535 f \n" % (len(PDF_OBJECTS) + 1)
+            content += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+            content += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(PDF_OBJECTS) + 1)
+        content += b"startxref\n%d\n%%%%EOF\n" % xref_offset
+        path.write_bytes(content)
+        return path
+
+    return make
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from utils import async_utils
+from utils.async_utils import (
+    ProgressEvent,
+    set_default_executor,
+    sign_bytes_async,
+    sign_pdf_async,
+    verify_bytes_async,
+    verify_pdf_async,
+)
+from utils.pdf_utils import sign_bytes
+
+
+async def progress_and_result(operation):
+    events = [event async for event in operation]
+    return events, await operation
+
+
+def test_sign_and_verify_file(tmp_path, make_pdf, rsa_key):
+    pdf_path = str(make_pdf(tmp_path / "a.pdf"))
+
+    async def main():
+        sign_events, signed = await progress_and_result(sign_pdf_async(pdf_path, rsa_key))
+        verify_events, results = await progress_and_result(verify_pdf_async(pdf_path, rsa_key.public_key()))
+        return sign_events, signed, verify_events, results
+
+    sign_events, signed, verify_events, results = asyncio.run(main())
+
+    assert signed is None
+    assert [result.valid for result in results] == [True]
+    assert all(isinstance(event, ProgressEvent) for event in sign_events + verify_events)
+    assert verify_events[-1] == ProgressEvent("Signature verification successful.", 100)
+
+
+def test_sign_and_verify_bytes(tmp_path, make_pdf, rsa_key):
+    pdf_data = make_pdf(tmp_path / "a.pdf").read_bytes()
+
+    async def main():
+        signed = await sign_bytes_async(pdf_data, rsa_key)
+        return signed, await verify_bytes_async(signed, rsa_key.public_key())
+
+    signed, results = asyncio.run(main())
+
+    assert signed.startswith(pdf_data)
+    assert [result.valid for result in results] == [True]
+
+
+def test_tampered_file_is_reported(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=1_000)
+
+    async def main():
+        await sign_pdf_async(str(pdf_path), rsa_key)
+        content = bytearray(pdf_path.read_bytes())
+        content[500] ^= 1
+        pdf_path.write_bytes(content)
+        return await progress_and_result(verify_pdf_async(str(pdf_path), rsa_key.public_key()))
+
+    events, results = asyncio.run(main())
+
+    assert [result.valid for result in results] == [False]
+    assert events[-1] == ProgressEvent("Error: Signature verification failed.", 100)
+
+
+@pytest.mark.parametrize(
+    ("name", "error", "message"),
+    [("missing.pdf", FileNotFoundError, "PDF file not found"), ("a.pdf", ValueError, "No signature found")],
+)
+def test_errors_propagate(tmp_path, make_pdf, rsa_key, name, error, message):  # noqa: PLR0913, PLR0917
+    make_pdf(tmp_path / "a.pdf")
+
+    async def main():
+        operation = verify_pdf_async(str(tmp_path / name), rsa_key.public_key())
+        events = [event async for event in operation]
+        with pytest.raises(error, match=message):
+            await operation
+        return events, operation.done()
+
+    events, done = asyncio.run(main())
+
+    assert done
+    assert events[-1].value == 100
+    assert events[-1].message.startswith("Error:")
+
+
+def test_default_executor_runs_operations(tmp_path, make_pdf, rsa_key, monkeypatch):
+    pdf_data = make_pdf(tmp_path / "a.pdf").read_bytes()
+    threads = []
+
+    def recording_sign_bytes(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return sign_bytes(*args, **kwargs)
+
+    async def main():
+        return await progress_and_result(sign_bytes_async(pdf_data, rsa_key))
+
+    monkeypatch.setattr(async_utils, "sign_bytes", recording_sign_bytes)
+    with ThreadPoolExecutor(thread_name_prefix="signing") as executor:
+        set_default_executor(executor)
+        try:
+            _, signed = asyncio.run(main())
+        finally:
+            set_default_executor(None)
+
+    assert signed.startswith(pdf_data)
+    assert len(threads) == 1
+    assert threads[0].startswith("signing")
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from utils.batch_utils import expand_pdf_inputs, sign_batch, sign_merkle_batch
+from utils.pdf_utils import verify_pdf
+
+
+def make_tree(tmp_path, make_pdf):
+    for name in ("in/a/x.pdf", "in/c/x.pdf", "in/y.pdf"):
+        make_pdf(tmp_path / name)
+    return str(tmp_path / "in" / "**" / "*.pdf")
+
+
+def signed_files(output_dir: Path) -> list[str]:
+    return sorted(str(path.relative_to(output_dir)) for path in output_dir.rglob("*.pdf"))
+
+
+def test_expand_pdf_inputs_names_files_below_the_pattern_root(tmp_path, make_pdf):
+    pattern = make_tree(tmp_path, make_pdf)
+
+    names = sorted(pdf_input.name for pdf_input in expand_pdf_inputs([pattern]))
+
+    assert names == ["a/x.pdf", "c/x.pdf", "y.pdf"]
+
+
+def test_sign_batch_keeps_relative_paths(tmp_path, make_pdf, rsa_key):
+    pattern = make_tree(tmp_path, make_pdf)
+    output_dir = tmp_path / "out"
+
+    results = list(sign_batch(expand_pdf_inputs([pattern]), rsa_key, str(output_dir), workers=2))
+
+    assert all(result.ok for result in results)
+    assert signed_files(output_dir) == ["a/x.pdf", "c/x.pdf", "y.pdf"]
+    for path in output_dir.rglob("*.pdf"):
+        assert [result.valid for result in verify_pdf(str(path), rsa_key.public_key())] == [True]
+
+
+def test_sign_merkle_batch_keeps_relative_paths(tmp_path, make_pdf, rsa_key):
+    pattern = make_tree(tmp_path, make_pdf)
+    output_dir = tmp_path / "out"
+
+    results = list(sign_merkle_batch(expand_pdf_inputs([pattern]), rsa_key, str(output_dir), workers=2))
+
+    assert all(result.ok for result in results)
+    assert signed_files(output_dir) == ["a/x.pdf", "c/x.pdf", "y.pdf"]
+    for path in output_dir.rglob("*.pdf"):
+        assert [result.valid for result in verify_pdf(str(path), rsa_key.public_key())] == [True]
+
+
+def test_colliding_output_paths_fail_instead_of_overwriting(tmp_path, make_pdf, rsa_key):
+    make_tree(tmp_path, make_pdf)
+    paths = [str(tmp_path / "in" / "a" / "x.pdf"), str(tmp_path / "in" / "c" / "x.pdf")]
+    output_dir = tmp_path / "out"
+
+    for sign in (sign_batch, sign_merkle_batch):
+        results = sorted(sign(paths, rsa_key, str(output_dir), workers=2), key=lambda result: result.ok)
+
+        assert [result.ok for result in results] == [False, True]
+        assert "already used" in results[0].error
+        assert signed_files(output_dir) == ["x.pdf"]
@@ -0,0 +1,80 @@
+import pytest
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from utils.cms import (
+    build_signed_attributes,
+    build_signed_data,
+    key_id,
+    parse_signed_data,
+    placeholder_size,
+    sign_attributes,
+    verify_signed_data,
+)
+
+DIGEST = SHA256.new(b"document").digest()
+
+
+def make_signed_data(rsa_key, digest=DIGEST, unsigned_attributes=None) -> bytes:
+    signed_attributes = build_signed_attributes(digest)
+    signature = sign_attributes(rsa_key, signed_attributes)
+    return build_signed_data(key_id(rsa_key), signed_attributes, signature, unsigned_attributes)
+
+
+def test_signed_data_round_trip(rsa_key):
+    signed_data = parse_signed_data(make_signed_data(rsa_key))
+
+    assert signed_data.key_id == key_id(rsa_key.public_key())
+    assert signed_data.digest == DIGEST
+    assert signed_data.unsigned_attributes == {}
+    assert verify_signed_data(rsa_key.public_key(), signed_data)
+
+
+def test_placeholder_padding_is_ignored(rsa_key):
+    contents = make_signed_data(rsa_key)
+    padded = contents.ljust(placeholder_size(rsa_key), b"\0")
+
+    assert len(contents) <= placeholder_size(rsa_key)
+    assert parse_signed_data(padded) == parse_signed_data(contents)
+
+
+def test_unsigned_attributes_round_trip(rsa_key):
+    value = b"\x04\x03abc"
+
+    signed_data = parse_signed_data(make_signed_data(rsa_key, unsigned_attributes={"1.2.3.4": value}))
+
+    assert signed_data.unsigned_attributes == {"1.2.3.4": [value]}
+    assert verify_signed_data(rsa_key.public_key(), signed_data)
+
+
+def test_other_key_does_not_verify(rsa_key):
+    signed_data = parse_signed_data(make_signed_data(rsa_key))
+
+    assert not verify_signed_data(RSA.generate(2048).public_key(), signed_data)
+
+
+def test_tampered_digest_does_not_verify(rsa_key):
+    signed_data = parse_signed_data(make_signed_data(rsa_key))
+    tampered = signed_data._replace(signed_attributes=build_signed_attributes(SHA256.new(b"other").digest()))
+
+    assert not verify_signed_data(rsa_key.public_key(), tampered)
+
+
+def test_flipped_signature_byte_does_not_verify(rsa_key):
+    signed_data = parse_signed_data(make_signed_data(rsa_key))
+    signature = bytearray(signed_data.signature)
+    signature[-1] ^= 1
+
+    assert not verify_signed_data(rsa_key.public_key(), signed_data._replace(signature=bytes(signature)))
+
+
+@pytest.mark.parametrize("contents", [b"", b"\0" * 64, b"\x30\x03\x02\x01\x01", b"not DER at all"])
+def test_malformed_contents_are_rejected(contents):
+    with pytest.raises(ValueError, match="Malformed CMS signature"):
+        parse_signed_data(contents)
+
+
+def test_truncated_contents_are_rejected(rsa_key):
+    contents = make_signed_data(rsa_key)
+
+    with pytest.raises(ValueError, match="Malformed CMS signature"):
+        parse_signed_data(contents[:len(contents) // 2])
@@ -0,0 +1,47 @@
+import http.client
+import threading
+
+import pytest
+from utils.http_service import SigningServer
+from utils.pdf_utils import verify_pdf
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def server(rsa_key):
+    with SigningServer(("127.0.0.1", 0), rsa_key, workers=1, token=TOKEN) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+
+
+def post(server, body: bytes, headers: dict) -> http.client.HTTPResponse:
+    connection = http.client.HTTPConnection(*server.server_address[:2])
+    connection.request("POST", "/sign", body=body, headers=headers)
+    return connection.getresponse()
+
+
+def test_non_loopback_address_requires_a_token(rsa_key):
+    with pytest.raises(ValueError, match="requires a token"):
+        SigningServer(("0.0.0.0", 0), rsa_key, workers=1)  # noqa: S104
+
+
+def test_sign_requires_the_token(server, tmp_path, make_pdf):
+    body = make_pdf(tmp_path / "a.pdf").read_bytes()
+
+    assert post(server, body, {}).status == http.client.UNAUTHORIZED
+    assert post(server, body, {"Authorization": "Bearer wrong"}).status == http.client.UNAUTHORIZED
+
+
+def test_sign_with_the_token(server, tmp_path, make_pdf, rsa_key):
+    body = make_pdf(tmp_path / "a.pdf").read_bytes()
+
+    response = post(server, body, {"Authorization": f"Bearer {TOKEN}"})
+
+    assert response.status == http.client.OK
+    signed_path = tmp_path / "signed.pdf"
+    signed_path.write_bytes(response.read())
+    assert [result.valid for result in verify_pdf(str(signed_path), rsa_key.public_key())] == [True]
@@ -0,0 +1,42 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from utils.key_agent import AgentKey, KeyAgent
+from utils.pdf_utils import sign_pdf, verify_pdf
+
+
+@pytest.fixture
+def agent_key(rsa_key):
+    # The temporary directories of pytest are too deep for the length limit of Unix socket paths.
+    socket_dir = tempfile.TemporaryDirectory()
+    agent = KeyAgent(str(Path(socket_dir.name) / "agent.sock"), rsa_key, idle_timeout=None)
+    thread = threading.Thread(target=agent.run)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not Path(agent.socket_path).is_socket() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    key = AgentKey(agent.socket_path)
+    yield key
+    key.close()
+    agent.stop()
+    thread.join()
+    socket_dir.cleanup()
+
+
+def test_agent_key_signs_documents(tmp_path, make_pdf, rsa_key, agent_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+
+    assert agent_key.public_key() == rsa_key.public_key()
+    sign_pdf(str(pdf_path), agent_key)
+
+    assert [result.valid for result in verify_pdf(str(pdf_path), rsa_key.public_key())] == [True]
+
+
+def test_locked_agent_refuses_to_sign(agent_key):
+    agent_key.lock()
+
+    with pytest.raises(ValueError, match="locked"):
+        agent_key.sign_digest(bytes(32))
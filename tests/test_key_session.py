@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from Crypto.PublicKey import RSA
+from utils.key_session import PRIVATE_KEY_FILE, KeySession
+
+
+@pytest.fixture
+def drive(tmp_path):
+    (tmp_path / PRIVATE_KEY_FILE).write_bytes(b"encrypted")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def unlock(rsa_key):
+    calls = []
+
+    def unlock() -> RSA.RsaKey:
+        calls.append(1)
+        return RSA.construct((rsa_key.n, rsa_key.e, rsa_key.d, rsa_key.p, rsa_key.q))
+
+    unlock.calls = calls
+    return unlock
+
+
+def test_key_is_unlocked_once(drive, unlock):
+    session = KeySession(idle_timeout=60)
+
+    for _ in range(3):
+        with session.signing_key(drive, unlock) as rsa_key:
+            assert rsa_key.has_private()
+
+    assert len(unlock.calls) == 1
+    assert session.holds_key(drive)
+
+
+def test_key_is_wiped_after_max_uses(drive, unlock):
+    session = KeySession(idle_timeout=60, max_uses=2)
+
+    with session.signing_key(drive, unlock):
+        pass
+    with session.signing_key(drive, unlock) as rsa_key:
+        pass
+
+    assert not session.holds_key(drive)
+    assert rsa_key.d == 0
+
+
+def test_key_is_dropped_when_idle_or_removed(drive, unlock):
+    session = KeySession(idle_timeout=0.05)
+    with session.signing_key(drive, unlock):
+        pass
+    time.sleep(0.1)
+    assert not session.holds_key(drive)
+
+    session.idle_timeout = 60
+    with session.signing_key(drive, unlock):
+        pass
+    session.retain_drives([])
+    assert not session.holds_key(drive)
+
+
+def test_key_in_use_is_wiped_when_released(drive, unlock):
+    session = KeySession(idle_timeout=60)
+
+    with session.signing_key(drive, unlock) as rsa_key:
+        session.clear()
+        assert rsa_key.d != 0
+
+    assert rsa_key.d == 0
@@ -0,0 +1,41 @@
+from Crypto.PublicKey import RSA
+from utils.cms import key_id
+from utils.keyring import KEYRING_INDEX, Keyring
+from utils.pdf_utils import sign_pdf, verify_pdf
+
+
+def test_keyring_finds_the_signer_key(tmp_path, make_pdf, rsa_key):
+    keyring_dir = tmp_path / "keys"
+    keyring_dir.mkdir()
+    other_key = RSA.generate(2048)
+    (keyring_dir / "signer.pub").write_bytes(rsa_key.public_key().export_key())
+    (keyring_dir / "other.pub").write_bytes(other_key.public_key().export_key())
+    (keyring_dir / "notes.pem").write_text("not a key")
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+
+    keyring = Keyring(str(keyring_dir))
+
+    assert len(keyring) == 2
+    assert keyring[key_id(rsa_key.public_key())] == rsa_key.public_key()
+    assert (keyring_dir / KEYRING_INDEX).exists()
+    [result] = verify_pdf(str(pdf_path), keyring)
+    assert result.valid
+    assert result.public_key == rsa_key.public_key()
+
+
+def test_keyring_follows_added_and_removed_keys(tmp_path, rsa_key):
+    keyring_dir = tmp_path / "keys"
+    keyring_dir.mkdir()
+    keyring = Keyring(str(keyring_dir))
+    assert len(keyring) == 0
+
+    key_path = keyring_dir / "signer.pub"
+    key_path.write_bytes(rsa_key.public_key().export_key())
+    keyring.refresh()
+    assert key_id(rsa_key.public_key()) in keyring
+    assert len(Keyring(str(keyring_dir))) == 1
+
+    key_path.unlink()
+    keyring.refresh()
+    assert key_id(rsa_key.public_key()) not in keyring
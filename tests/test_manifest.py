@@ -0,0 +1,19 @@
+from utils.pdf_utils import sign_pdf, verify_pdf
+
+CHUNK_SIZE = 64 * 1024
+
+
+def test_manifest_locates_changed_chunks(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=1_000_000)
+    sign_pdf(str(pdf_path), rsa_key, chunk_size=CHUNK_SIZE)
+    assert [result.valid for result in verify_pdf(str(pdf_path), rsa_key)] == [True]
+
+    with pdf_path.open("r+b") as pdf_file:
+        pdf_file.seek(300_000)
+        pdf_file.write(b"y")
+
+    [result] = verify_pdf(str(pdf_path), rsa_key)
+    assert not result.valid
+    assert result.changed_ranges
+    assert all(length <= CHUNK_SIZE for _, length in result.changed_ranges)
+    assert any(offset <= 300_000 < offset + length for offset, length in result.changed_ranges)
@@ -0,0 +1,106 @@
+import pytest
+from Crypto.Hash import SHA256
+from utils.cms import parse_signed_data
+from utils.merkle import (
+    MERKLE_PROOF_OID,
+    create_batch_signatures,
+    decode_proof,
+    digest_matches,
+    document_digest,
+    encode_proof,
+    get_proof,
+    merkle_root,
+    merkle_tree,
+    verify_root,
+)
+
+
+def digests(count: int) -> list[bytes]:
+    return [SHA256.new(b"document %d" % index).digest() for index in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 13])
+def test_every_proof_leads_to_the_root(count):
+    root, proofs = merkle_tree(digests(count))
+
+    assert [merkle_root(proof) for proof in proofs] == [root] * count
+    assert [decode_proof(encode_proof(proof)) for proof in proofs] == proofs
+
+
+def test_root_is_not_a_document_digest():
+    document = SHA256.new(b"document").digest()
+
+    root, _ = merkle_tree([document])
+
+    assert root != document
+
+
+def test_flipped_sibling_changes_the_root():
+    root, proofs = merkle_tree(digests(5))
+    path = list(proofs[2].path)
+    path[1] = bytes([path[1][0] ^ 1]) + path[1][1:]
+
+    assert merkle_root(proofs[2]._replace(path=path)) != root
+
+
+def test_other_document_digest_changes_the_root():
+    root, proofs = merkle_tree(digests(4))
+
+    assert merkle_root(proofs[0]._replace(digest=digests(5)[4])) != root
+
+
+def test_swapped_index_changes_the_root():
+    root, proofs = merkle_tree(digests(4))
+
+    assert merkle_root(proofs[0]._replace(index=1)) != root
+
+
+@pytest.mark.parametrize(
+    ("change", "message"),
+    [
+        ({"index": 4}, "out of range"),
+        ({"index": -1}, "out of range"),
+        ({"count": 8}, "too short"),
+        ({"count": 2}, "too long"),
+    ],
+)
+def test_proof_of_wrong_shape_is_rejected(change, message):
+    _, proofs = merkle_tree(digests(4))
+
+    with pytest.raises(ValueError, match=message):
+        merkle_root(proofs[1]._replace(**change))
+
+
+def test_malformed_proof_is_rejected():
+    _, proofs = merkle_tree(digests(2))
+
+    with pytest.raises(ValueError, match="Malformed Merkle proof"):
+        decode_proof(encode_proof(proofs[0])[:-5])
+
+
+def test_empty_batch_is_rejected():
+    with pytest.raises(ValueError, match="without documents"):
+        merkle_tree([])
+
+
+def test_batch_signatures_cover_their_documents(rsa_key):
+    batch = digests(3)
+
+    signatures = [parse_signed_data(contents) for contents in create_batch_signatures(rsa_key, batch)]
+
+    for digest, signed_data in zip(batch, signatures, strict=True):
+        assert get_proof(signed_data) is not None
+        assert document_digest(signed_data) == digest
+        assert digest_matches(signed_data, digest)
+        assert verify_root(rsa_key.public_key(), signed_data)
+    assert not digest_matches(signatures[0], batch[1])
+
+
+def test_batch_signature_with_bad_proof_does_not_match(rsa_key):
+    batch = digests(3)
+    signed_data = parse_signed_data(create_batch_signatures(rsa_key, batch)[0])
+    proof = get_proof(signed_data)
+    path = [bytes(len(node)) for node in proof.path]
+    tampered = signed_data._replace(unsigned_attributes={MERKLE_PROOF_OID: [encode_proof(proof._replace(path=path))]})
+
+    assert not digest_matches(tampered, batch[0])
@@ -0,0 +1,119 @@
+import zlib
+
+import pytest
+from utils.pdf_trailer import PdfTrailer, Reference, decode_stream, find_startxref
+
+
+def png_up_rows(rows: list[bytes]) -> bytes:
+    encoded = bytearray()
+    previous = bytes(len(rows[0]))
+    for row in rows:
+        encoded += b"\x02" + bytes((value - above) & 0xFF for value, above in zip(row, previous, strict=True))
+        previous = row
+    return bytes(encoded)
+
+
+def make_compressed_pdf() -> bytes:
+    """A PDF with objects 2 and 3 in an object stream, indexed by a compressed cross-reference stream."""
+    content = bytearray(b"%PDF-1.7\n")
+    catalog_offset = len(content)
+    content += b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+    pages = b"<< /Type /Pages /Kids [3 0 R] /Count 1 >> "
+    objects = pages + b"<< /Type /Page /Parent 2 0 R >>"
+    header = b"2 0 3 %d " % len(pages)
+    stream_offset = len(content)
+    content += b"4 0 obj\n<< /Type /ObjStm /N 2 /First %d /Length %d >>\nstream\n" % (
+        len(header), len(header) + len(objects)
+    )
+    content += header + objects + b"\nendstream\nendobj\n"
+    xref_offset = len(content)
+    rows = [
+        b"\x00\x00\x00\x00\x00\xff",
+        b"\x01" + catalog_offset.to_bytes(4, "big") + b"\x00",
+        b"\x02" + (4).to_bytes(4, "big") + b"\x00",
+        b"\x02" + (4).to_bytes(4, "big") + b"\x01",
+        b"\x01" + stream_offset.to_bytes(4, "big") + b"\x00",
+        b"\x01" + xref_offset.to_bytes(4, "big") + b"\x00",
+    ]
+    data = zlib.compress(png_up_rows(rows))
+    content += (
+        b"5 0 obj\n<< /Type /XRef /Size 6 /W [1 4 1] /Root 1 0 R /Filter /FlateDecode "
+        b"/DecodeParms << /Predictor 12 /Columns 6 >> /Length %d >>\nstream\n" % len(data)
+    )
+    content += data + b"\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n" % xref_offset
+    return bytes(content)
+
+
+@pytest.mark.parametrize("xref_stream", [False, True])
+def test_trailer_resolves_objects(tmp_path, make_pdf, xref_stream):
+    content = make_pdf(tmp_path / "a.pdf", xref_stream=xref_stream).read_bytes()
+
+    trailer = PdfTrailer(content)
+
+    assert trailer.startxref == content.index(b"4 0 obj\n" if xref_stream else b"xref\n")
+    assert trailer.dictionary["/Root"] == Reference(1, 0)
+    assert trailer.lookup(1) == ("offset", content.index(b"1 0 obj"))
+    assert trailer.lookup(0) is None
+    assert trailer.lookup(99) is None
+    page = trailer.resolve(Reference(3, 0))
+    assert page["/Type"] == "/Page"
+    assert page["/MediaBox"] == [0, 0, 612, 792]
+    assert trailer.resolve(page["/Parent"])["/Count"] == 1
+    assert trailer.info() is None
+
+
+def test_compressed_xref_stream_and_object_stream():
+    content = make_compressed_pdf()
+
+    trailer = PdfTrailer(memoryview(content))
+
+    assert trailer.dictionary["/Type"] == "/XRef"
+    assert trailer.lookup(3) == ("compressed", 4, 1)
+    pages = trailer.resolve(trailer.resolve(trailer.dictionary["/Root"])["/Pages"])
+    assert pages["/Kids"] == [Reference(3, 0)]
+    assert trailer.resolve(Reference(3, 0))["/Parent"] == Reference(2, 0)
+
+
+def test_earlier_sections_are_followed_through_prev(tmp_path, make_pdf):
+    content = bytearray(make_pdf(tmp_path / "a.pdf").read_bytes())
+    previous_xref = find_startxref(bytes(content))
+    info_offset = len(content)
+    content += b"4 0 obj\n<< /Title (Updated) >>\nendobj\n"
+    xref_offset = len(content)
+    content += b"xref\n4 1\n%010d 00000 n \n" % info_offset
+    content += b"trailer\n<< /Size 5 /Root 1 0 R /Info 4 0 R /Prev %d >>\nstartxref\n%d\n%%%%EOF\n" % (
+        previous_xref, xref_offset
+    )
+
+    trailer = PdfTrailer(bytes(content))
+
+    assert trailer.info()["/Title"] == b"Updated"
+    assert trailer.resolve(Reference(1, 0))["/Type"] == "/Catalog"
+
+
+def test_decode_stream_undoes_flate_and_png_predictor():
+    rows = [bytes([row, row * 2, 255 - row]) for row in range(5)]
+    dictionary = {"/Filter": "/FlateDecode", "/DecodeParms": {"/Predictor": 12, "/Columns": 3}}
+
+    assert decode_stream(dictionary, zlib.compress(png_up_rows(rows))) == b"".join(rows)
+
+
+def test_unsupported_filter_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported PDF stream filter"):
+        decode_stream({"/Filter": "/LZWDecode"}, b"")
+
+
+@pytest.mark.parametrize("tail", [b"%%EOF\n", b"startxref\nabc\n%%EOF\n"])
+def test_missing_startxref_is_rejected(tail):
+    with pytest.raises(ValueError, match="startxref"):
+        find_startxref(tail)
+
+
+@pytest.mark.parametrize("offset_change", [-1, 10_000])
+def test_wrong_startxref_is_rejected(tmp_path, make_pdf, offset_change):
+    content = make_pdf(tmp_path / "a.pdf").read_bytes()
+    startxref = find_startxref(content)
+    content = content.replace(b"startxref\n%d" % startxref, b"startxref\n%d" % (startxref + offset_change))
+
+    with pytest.raises(ValueError):  # noqa: PT011 - the message depends on what the wrong offset points to
+        PdfTrailer(content)
@@ -0,0 +1,136 @@
+import re
+
+import pytest
+from Crypto.PublicKey import RSA
+from utils.pdf_document import PdfDocument
+from utils.pdf_trailer import PdfTrailer
+from utils.pdf_utils import sign_bytes, sign_pdf, verify_bytes, verify_pdf
+
+
+def flip_byte(path, offset):
+    with path.open("r+b") as pdf_file:
+        pdf_file.seek(offset)
+        value = pdf_file.read(1)[0]
+        pdf_file.seek(offset)
+        pdf_file.write(bytes([value ^ 1]))
+
+
+def valid(results):
+    return [result.valid for result in results]
+
+
+@pytest.mark.parametrize("xref_stream", [False, True])
+def test_single_signature_round_trip(tmp_path, make_pdf, rsa_key, xref_stream):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=10_000, xref_stream=xref_stream)
+
+    sign_pdf(str(pdf_path), rsa_key)
+    results = verify_pdf(str(pdf_path), rsa_key.public_key())
+
+    assert valid(results) == [True]
+    assert results[0].byte_range[0] == 0
+    assert results[0].byte_range[2] + results[0].byte_range[3] == pdf_path.stat().st_size
+
+
+@pytest.mark.parametrize("xref_stream", [False, True])
+def test_multiple_signatures_round_trip(tmp_path, make_pdf, rsa_key, xref_stream):
+    pdf_path = make_pdf(tmp_path / "a.pdf", xref_stream=xref_stream)
+    other_key = RSA.generate(2048)
+
+    sign_pdf(str(pdf_path), rsa_key)
+    sign_pdf(str(pdf_path), other_key)
+    sign_pdf(str(pdf_path), rsa_key)
+    results = verify_pdf(str(pdf_path), [rsa_key.public_key(), other_key.public_key()])
+
+    assert valid(results) == [True, True, True]
+    assert [result.public_key for result in results] == [rsa_key.public_key(), other_key.public_key(),
+                                                          rsa_key.public_key()]
+
+
+def test_xref_stream_input_keeps_xref_streams(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", xref_stream=True)
+
+    sign_pdf(str(pdf_path), rsa_key)
+
+    with PdfDocument(str(pdf_path)) as document:
+        trailer = PdfTrailer(document.view)
+        assert trailer.dictionary["/Type"] == "/XRef"
+        assert trailer.dictionary["/Prev"] < trailer.startxref
+        assert trailer.resolve(trailer.dictionary["/Root"])["/Type"] == "/Catalog"
+
+
+def test_sign_bytes_round_trip(tmp_path, make_pdf, rsa_key):
+    pdf_data = make_pdf(tmp_path / "a.pdf").read_bytes()
+
+    signed = sign_bytes(pdf_data, rsa_key)
+
+    assert signed.startswith(pdf_data)
+    assert valid(verify_bytes(signed, rsa_key.public_key())) == [True]
+
+
+def test_other_key_does_not_verify(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+
+    results = verify_pdf(str(pdf_path), RSA.generate(2048).public_key())
+
+    assert results[0].intact
+    assert not results[0].valid
+
+
+@pytest.mark.parametrize("xref_stream", [False, True])
+def test_flipped_byte_in_signed_range_is_detected(tmp_path, make_pdf, rsa_key, xref_stream):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=10_000, xref_stream=xref_stream)
+    sign_pdf(str(pdf_path), rsa_key)
+    sign_pdf(str(pdf_path), rsa_key)
+
+    flip_byte(pdf_path, 5_000)
+    results = verify_pdf(str(pdf_path), rsa_key.public_key())
+
+    assert not results[0].intact
+    assert results[0].error
+    assert not results[1].valid
+
+
+def test_flipped_byte_in_last_revision_is_detected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+    sign_pdf(str(pdf_path), rsa_key)
+
+    # The end-of-file marker of the last revision is covered by the tail of its byte range.
+    flip_byte(pdf_path, pdf_path.stat().st_size - 3)
+    results = verify_pdf(str(pdf_path), rsa_key.public_key())
+
+    assert valid(results) == [True, False]
+
+
+def test_truncated_byte_range_is_rejected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+    content = pdf_path.read_bytes()
+    byte_range = re.search(rb"/ByteRange (\[\d+ \d+ \d+) \d+\]", content)
+
+    # Drop the last number, keeping every offset of the file the same.
+    truncated = (byte_range.group(1) + b"]").ljust(byte_range.end() - byte_range.start(1))
+    pdf_path.write_bytes(content[:byte_range.start(1)] + truncated + content[byte_range.end():])
+
+    with pytest.raises(ValueError, match="Malformed signature byte range"):
+        verify_pdf(str(pdf_path), rsa_key.public_key())
+
+
+def test_appended_data_is_detected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+
+    with pdf_path.open("ab") as pdf_file:
+        pdf_file.write(b"% appended after signing\n")
+    results = verify_pdf(str(pdf_path), rsa_key.public_key())
+
+    assert not results[0].valid
+    assert results[0].error == "PDF file was modified after signing."
+
+
+def test_unsigned_file_is_rejected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+
+    with pytest.raises(ValueError, match="No signature found"):
+        verify_pdf(str(pdf_path), rsa_key.public_key())
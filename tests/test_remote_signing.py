@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+from utils.cms import sign_digest
+from utils.pdf_utils import verify_pdf
+from utils.remote_signing import SigningContext, abort_pdf, finalize_pdf, prepare_pdf
+
+
+def test_prepare_leaves_the_input_untouched(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "archive.pdf")
+    original = pdf_path.read_bytes()
+
+    digest, context = prepare_pdf(str(pdf_path), rsa_key.public_key())
+
+    assert pdf_path.read_bytes() == original
+    assert context.path == str(tmp_path / "archive.prepared.pdf")
+    finalize_pdf(SigningContext.decode(context.encode()), sign_digest(rsa_key, digest))
+    assert [result.valid for result in verify_pdf(context.path, rsa_key.public_key())] == [True]
+
+
+def test_abort_removes_a_prepared_copy(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "archive.pdf")
+
+    _, context = prepare_pdf(str(pdf_path), rsa_key.public_key())
+    abort_pdf(context)
+
+    assert not Path(context.path).exists()
+    assert pdf_path.exists()
+
+
+def test_abort_restores_a_file_prepared_in_place(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "archive.pdf")
+    original = pdf_path.read_bytes()
+
+    _, context = prepare_pdf(str(pdf_path), rsa_key.public_key(), output_path=str(pdf_path))
+    assert pdf_path.read_bytes() != original
+    abort_pdf(SigningContext.decode(context.encode()))
+
+    assert pdf_path.read_bytes() == original
+
+
+def test_abort_refuses_a_finalized_file(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "archive.pdf")
+    digest, context = prepare_pdf(str(pdf_path), rsa_key.public_key(), output_path=str(pdf_path))
+    finalize_pdf(context, sign_digest(rsa_key, digest))
+
+    with pytest.raises(ValueError, match="changed since it was prepared"):
+        abort_pdf(context)
@@ -0,0 +1,27 @@
+import io
+
+from utils.pdf_utils import sign_pdf
+from utils.stream_utils import sign_stream, verify_stream
+
+
+def test_streamed_signature_verifies(tmp_path, make_pdf, rsa_key):
+    content = make_pdf(tmp_path / "a.pdf", size=300_000).read_bytes()
+    signed = io.BytesIO()
+
+    sign_stream(io.BytesIO(content), signed, rsa_key)
+
+    assert signed.getvalue().startswith(content)
+    assert [result.valid for result in verify_stream(io.BytesIO(signed.getvalue()), rsa_key.public_key())] == [True]
+
+
+def test_stream_follows_the_hash_chain(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=300_000)
+    sign_pdf(str(pdf_path), rsa_key)
+    signed = io.BytesIO()
+    sign_stream(io.BytesIO(pdf_path.read_bytes()), signed, rsa_key)
+
+    tampered = bytearray(signed.getvalue())
+    tampered[100_000] ^= 1
+
+    assert [result.valid for result in verify_stream(io.BytesIO(signed.getvalue()), rsa_key)] == [True, True]
+    assert not any(result.valid for result in verify_stream(io.BytesIO(bytes(tampered)), rsa_key))
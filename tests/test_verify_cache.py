@@ -0,0 +1,86 @@
+from Crypto.Hash import SHA256
+from utils.pdf_utils import sign_pdf, verify_pdf
+from utils.verify_cache import VerificationCache
+
+
+def flip_byte(path, offset):
+    with path.open("r+b") as pdf_file:
+        pdf_file.seek(offset)
+        value = pdf_file.read(1)[0]
+        pdf_file.seek(offset)
+        pdf_file.write(bytes([value ^ 1]))
+
+
+def test_cached_verdict_is_reused(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf")
+    sign_pdf(str(pdf_path), rsa_key)
+    cache = VerificationCache(tmp_path / "cache.sqlite3")
+
+    assert [result.valid for result in cache.verify(str(pdf_path), rsa_key.public_key())] == [True]
+    assert [result.valid for result in cache.verify(str(pdf_path), rsa_key.public_key())] == [True]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_edit_in_place_is_detected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=200_000)
+    sign_pdf(str(pdf_path), rsa_key)
+    cache = VerificationCache(tmp_path / "cache.sqlite3")
+    cache.verify(str(pdf_path), rsa_key.public_key())
+
+    flip_byte(pdf_path, 150_000)
+
+    assert [result.valid for result in verify_pdf(str(pdf_path), rsa_key.public_key())] == [False]
+    assert [result.valid for result in cache.verify(str(pdf_path), rsa_key.public_key())] == [False]
+
+
+def test_grown_file_is_verified_again(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=200_000)
+    sign_pdf(str(pdf_path), rsa_key)
+    cache = VerificationCache(tmp_path / "cache.sqlite3")
+    cache.verify(str(pdf_path), rsa_key.public_key())
+
+    sign_pdf(str(pdf_path), rsa_key)
+    results = cache.verify(str(pdf_path), rsa_key.public_key())
+
+    assert [result.valid for result in results] == [True, True]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_edit_before_growth_is_detected(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=200_000)
+    sign_pdf(str(pdf_path), rsa_key)
+    cache = VerificationCache(tmp_path / "cache.sqlite3")
+    cache.verify(str(pdf_path), rsa_key.public_key())
+
+    flip_byte(pdf_path, 150_000)
+    sign_pdf(str(pdf_path), rsa_key)
+
+    expected = [result.valid for result in verify_pdf(str(pdf_path), rsa_key.public_key())]
+    assert expected[0] is False
+    assert [result.valid for result in cache.verify(str(pdf_path), rsa_key.public_key())] == expected
+
+
+def test_miss_hashes_file_once(tmp_path, make_pdf, rsa_key, monkeypatch):
+    pdf_path = make_pdf(tmp_path / "a.pdf", size=200_000)
+    sign_pdf(str(pdf_path), rsa_key)
+    sign_pdf(str(pdf_path), rsa_key)
+    size = pdf_path.stat().st_size
+    hashed = []
+    update = SHA256.SHA256Hash.update
+
+    def counting_update(self, data):
+        hashed.append(len(data))
+        return update(self, data)
+
+    monkeypatch.setattr(SHA256.SHA256Hash, "update", counting_update)
+    cache = VerificationCache(tmp_path / "cache.sqlite3")
+
+    assert [result.valid for result in cache.verify(str(pdf_path), rsa_key.public_key())] == [True, True]
+    # Every byte but the signature values, once.
+    assert 0.9 * size < sum(hashed) <= size
+    assert cache.bytes_hashed == size
+
+    cache.verify(str(pdf_path), rsa_key.public_key())
+
+    assert sum(hashed) <= size
+    assert cache.bytes_hashed == size
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+import pytest
+from utils.batch_utils import BatchResult
+from utils.pdf_utils import verify_pdf
+from utils.watch_utils import SpoolWatcher, _file_identity, _Submission
+
+TIMEOUT = 30.0
+
+
+def run_watcher(watcher: SpoolWatcher, results: list, expected: int):
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        deadline = time.monotonic() + TIMEOUT
+        while len(results) < expected and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+        thread.join(TIMEOUT)
+        watcher.close()
+    assert len(results) == expected
+
+
+def test_same_names_do_not_overwrite_signed_files(tmp_path, make_pdf, rsa_key):
+    spools = [tmp_path / "spool1", tmp_path / "spool2"]
+    for spool in spools:
+        make_pdf(spool / "x.pdf")
+    output_dir = tmp_path / "out"
+    results = []
+    watcher = SpoolWatcher(
+        spools, rsa_key, str(output_dir), str(tmp_path / "failed"), workers=2, settle_time=0.05,
+        on_result=results.append,
+    )
+    (output_dir / "x.pdf").parent.mkdir()
+    (output_dir / "x.pdf").write_bytes(b"signed earlier")
+
+    run_watcher(watcher, results, expected=2)
+
+    assert all(result.ok for result in results)
+    assert (output_dir / "x.pdf").read_bytes() == b"signed earlier"
+    assert sorted(path.name for path in output_dir.iterdir()) == ["x-1.pdf", "x-2.pdf", "x.pdf"]
+    for name in ("x-1.pdf", "x-2.pdf"):
+        assert [result.valid for result in verify_pdf(str(output_dir / name), rsa_key.public_key())] == [True]
+
+
+def test_failures_do_not_overwrite_earlier_failures(tmp_path, rsa_key):
+    spool, failed_dir = tmp_path / "spool", tmp_path / "failed"
+    spool.mkdir()
+    failed_dir.mkdir()
+    (failed_dir / "x.pdf").write_bytes(b"failed earlier")
+    (failed_dir / "x.pdf.error").write_text("earlier error\n")
+    (spool / "x.pdf").write_bytes(b"not a PDF")
+    results = []
+    watcher = SpoolWatcher(
+        [spool], rsa_key, str(tmp_path / "out"), str(failed_dir), workers=1, settle_time=0.05,
+        on_result=results.append,
+    )
+
+    run_watcher(watcher, results, expected=1)
+
+    assert not results[0].ok
+    assert (failed_dir / "x.pdf").read_bytes() == b"failed earlier"
+    assert (failed_dir / "x.pdf.error").read_text() == "earlier error\n"
+    assert (failed_dir / "x-1.pdf").read_bytes() == b"not a PDF"
+    assert (failed_dir / "x-1.pdf.error").exists()
+
+
+def test_file_replaced_while_signing_is_kept(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "spool" / "x.pdf")
+    output_path = make_pdf(tmp_path / "out" / "x.pdf")
+    with SpoolWatcher([tmp_path / "spool"], rsa_key, str(tmp_path / "out"), str(tmp_path / "failed")) as watcher:
+        submission = _Submission(str(pdf_path), _file_identity(pdf_path), str(output_path))
+
+        make_pdf(pdf_path, size=100)
+        watcher._finish(BatchResult(str(pdf_path), ok=True, elapsed_ms=1.0), submission)  # noqa: SLF001
+
+        assert pdf_path.exists()
+        assert not output_path.exists()
+        assert str(pdf_path) in watcher._deadlines  # noqa: SLF001
+
+
+def test_file_touched_while_signing_waits_for_its_result(tmp_path, make_pdf, rsa_key):
+    pdf_path = make_pdf(tmp_path / "spool" / "x.pdf")
+    with SpoolWatcher([tmp_path / "spool"], rsa_key, str(tmp_path / "out"), str(tmp_path / "failed")) as watcher:
+        submission = _Submission(str(pdf_path), _file_identity(pdf_path), str(tmp_path / "out" / "x.pdf"))
+        watcher._in_flight[object()] = submission  # noqa: SLF001
+
+        watcher._touch(str(pdf_path))  # noqa: SLF001
+
+        # Without a deadline, run() sleeps until the result arrives instead of polling without pause.
+        assert watcher._deadlines == {}  # noqa: SLF001
+        assert watcher._timeout() is None  # noqa: SLF001
+
+
+def test_close_releases_wake_pipe(tmp_path, rsa_key):
+    watcher = SpoolWatcher([tmp_path], rsa_key, str(tmp_path / "out"), str(tmp_path / "failed"))
+    fds = watcher._wake_read, watcher._wake_write  # noqa: SLF001
+
+    watcher.close()
+    watcher.stop()
+
+    for fd in fds:
+        with pytest.raises(OSError, match="Bad file descriptor"):
+            os.fstat(fd)